@@ -1,5 +1,9 @@
+import os
+from collections.abc import Mapping
+
 import flet as ft
-from database import db
+from database import async_db as adb
+from database import backup, db, instrumentation
 
 
 def get_admin_page(
@@ -33,19 +37,38 @@ def get_admin_page(
     # -----------------------------
     # Data
     # -----------------------------
-    logs = db.get_logs()
+    # Only the newest rows are listed; older history comes from the daily rollups
+    LOG_LIST_LIMIT = 500
+
+    # Listings read the newest backup snapshot (read-only) so they don't compete
+    # with user writes. After an admin action reads go live, so the change shows,
+    # until the admin switches back.
+    live_reads = page.session.get("admin_live_reads") is True
+    snapshot, snapshot_at = (None, None) if live_reads else backup.reporting_snapshot()
+
+    logs = db.get_logs(limit=LOG_LIST_LIMIT, conn=snapshot)
+    try:
+        rollups = db.get_log_rollups(days=30, conn=snapshot)
+    except Exception:
+        rollups = []
 
     try:
-        users = db.get_users()
+        users = db.get_users(conn=snapshot)
     except Exception:
         users = []
 
+    # Per-user row counts; with sharding on this fans out to every shard in parallel
+    try:
+        data_counts = db.get_user_data_counts(conn=snapshot)
+    except Exception:
+        data_counts = {}
+
     # Remove the admin account from the user list
     filtered_users = []
     for u in users:
         role = ""
         email = ""
-        if isinstance(u, dict):
+        if isinstance(u, Mapping):
             role = (u.get("role") or "").lower()
             email = (u.get("email") or "").lower()
         else:
@@ -69,7 +92,9 @@ def get_admin_page(
             page.snack_bar.open = True
         page.update()
 
-    def refresh_admin():
+    def refresh_admin(live=None):
+        if live is not None:
+            page.session.set("admin_live_reads", live)
         page.clean()
         page.add(
             get_admin_page(
@@ -95,6 +120,16 @@ def get_admin_page(
         page.clean()
         page.update()
 
+    async def run_backup():
+        show_message("Backing up...", PINK_DARK)
+        try:
+            path = await adb.run(backup.create_backup)
+        except Exception as ex:
+            show_message(f"Backup failed: {ex}", "#E11D48")
+            return
+        show_message(f"Backup saved: {os.path.basename(path)}", "#16A34A")
+        refresh_admin(live=False)
+
     def ban_user(user_id: int):
         try:
             db.ban_user(int(user_id))
@@ -103,7 +138,7 @@ def get_admin_page(
             except Exception:
                 pass
             show_message("User banned.", PINK_STRONG)
-            refresh_admin()
+            refresh_admin(live=True)
         except Exception as ex:
             show_message(f"Ban failed: {ex}", "#E11D48")
 
@@ -115,7 +150,7 @@ def get_admin_page(
             except Exception:
                 pass
             show_message("Ban lifted.", "#16A34A")
-            refresh_admin()
+            refresh_admin(live=True)
         except Exception as ex:
             show_message(f"Unban failed: {ex}", "#E11D48")
 
@@ -124,6 +159,26 @@ def get_admin_page(
             show_message("Delete failed: invalid user id.", "#E11D48")
             return
 
+        progress_bar = ft.ProgressBar(value=0, color=PINK_STRONG, bgcolor=PINK_SOFT, visible=False)
+        progress_text = ft.Text("", size=12, color=SECONDARY_TEXT, visible=False)
+
+        def on_progress(p):
+            # Called from the purge thread after every chunk
+            total = p.get("total") or 0
+            progress_bar.value = 1 if not total else p.get("done", 0) / total
+            progress_text.value = f"Removed {p.get('done', 0)} of {total} rows"
+
+            if p.get("error"):
+                dlg.open = False
+                page.update()
+                show_message(f"Delete failed: {p['error']}", "#E11D48")
+            elif p.get("finished"):
+                dlg.open = False
+                page.update()
+                show_message("User deleted.", "#E11D48")
+            else:
+                page.update()
+
         def do_delete(e):
             try:
                 uid_int = int(user_id)
@@ -133,13 +188,13 @@ def get_admin_page(
                 except Exception:
                     pass
 
-                db.delete_user(uid_int)
-
-                dlg.open = False
-                page.update()
+                # The account is hidden at once; its rows are purged in the background
+                db.delete_user(uid_int, background=True, on_progress=on_progress)
 
-                show_message("User deleted.", "#E11D48")
-                refresh_admin()
+                progress_bar.visible = True
+                progress_text.visible = True
+                dlg.actions = []
+                refresh_admin(live=True)
             except Exception as ex:
                 show_message(f"Delete failed: {ex}", "#E11D48")
 
@@ -151,7 +206,15 @@ def get_admin_page(
             modal=True,
             bgcolor=WHITE,
             title=ft.Text("Delete User?", color=PRIMARY_TEXT, weight=ft.FontWeight.BOLD),
-            content=ft.Text("This will permanently remove the account and data.", color=SECONDARY_TEXT),
+            content=ft.Column(
+                tight=True,
+                spacing=10,
+                controls=[
+                    ft.Text("This will permanently remove the account and data.", color=SECONDARY_TEXT),
+                    progress_bar,
+                    progress_text,
+                ],
+            ),
             actions=[
                 ft.TextButton("Cancel", on_click=close),
                 ft.ElevatedButton("Delete", on_click=do_delete, bgcolor="#E11D48", color="white"),
@@ -219,6 +282,7 @@ def get_admin_page(
         tabs=[
             ft.Tab(text="Users"),
             ft.Tab(text="Logs"),
+            ft.Tab(text="Queries"),
         ],
     )
 
@@ -230,7 +294,7 @@ def get_admin_page(
 
         to_render = []
         for u in filtered_users:
-            if isinstance(u, dict):
+            if isinstance(u, Mapping):
                 name = (u.get("name") or "").strip()
                 email = (u.get("email") or "").strip()
             else:
@@ -244,7 +308,7 @@ def get_admin_page(
 
         cards = []
         for display_id, u in enumerate(to_render, start=1):
-            if isinstance(u, dict):
+            if isinstance(u, Mapping):
                 uid = u.get("id")
                 name = u.get("name") or ""
                 email = u.get("email") or ""
@@ -328,6 +392,18 @@ def get_admin_page(
                                                     border=ft.border.all(1, "#FFD6E6"),
                                                     content=ft.Text(f"Role: {role or 'user'}", size=11, color=PINK_DARK, weight=ft.FontWeight.W_600),
                                                 ),
+                                                ft.Container(
+                                                    padding=ft.padding.symmetric(horizontal=10, vertical=6),
+                                                    border_radius=999,
+                                                    bgcolor="#FFF7FA",
+                                                    border=ft.border.all(1, "#FFD6E6"),
+                                                    content=ft.Text(
+                                                        "Tasks: {tasks} · Journals: {journals}".format(
+                                                            **data_counts.get(uid, {"tasks": 0, "journals": 0})
+                                                        ),
+                                                        size=11, color=PINK_DARK, weight=ft.FontWeight.W_600,
+                                                    ),
+                                                ),
                                             ],
                                         ),
                                     ],
@@ -444,6 +520,104 @@ def get_admin_page(
             ]
         return cards
 
+    # -----------------------------
+    # Log rollup summary (last 30 days)
+    # -----------------------------
+    def build_rollup_summary():
+        totals = {}
+        for r in rollups:
+            action = (r.get("action") or "").strip().upper() or "ACTION"
+            totals[action] = totals.get(action, 0) + r.get("count", 0)
+
+        if not totals:
+            return ft.Container()
+
+        chips = [
+            ft.Container(
+                padding=ft.padding.symmetric(horizontal=10, vertical=6),
+                border_radius=999,
+                bgcolor=PINK_SOFT,
+                content=ft.Text(f"{action}: {count}", size=11, weight=ft.FontWeight.W_600, color=TEXT_DARK),
+            )
+            for action, count in sorted(totals.items(), key=lambda kv: -kv[1])
+        ]
+
+        return soft_card(
+            ft.Column(
+                spacing=8,
+                controls=[
+                    ft.Text("Last 30 days", size=12, weight=ft.FontWeight.BOLD, color=TEXT_DARK),
+                    ft.Row(wrap=True, spacing=8, run_spacing=8, controls=chips),
+                ],
+            ),
+            padding=14,
+        )
+
+    # -----------------------------
+    # Query instrumentation (opt-in via DB_INSTRUMENT=1)
+    # -----------------------------
+    def build_query_cards():
+        snap = instrumentation.snapshot(top=15)
+        if not snap["enabled"] and not snap["functions"]:
+            return [
+                soft_card(
+                    ft.Column(
+                        horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                        spacing=8,
+                        controls=[
+                            ft.Icon(ft.Icons.SPEED_OUTLINED, size=44, color=TEXT_MUTED),
+                            ft.Text("Query instrumentation is off.", size=13, color=TEXT_MUTED),
+                            ft.Text("Set DB_INSTRUMENT=1 and restart to collect timings.", size=12, color=TEXT_MUTED),
+                        ],
+                    ),
+                    padding=20,
+                )
+            ]
+
+        def stat_row(name, r):
+            return ft.Row(
+                controls=[
+                    ft.Text(name, size=12, color=TEXT_DARK, expand=True, no_wrap=True, overflow=ft.TextOverflow.ELLIPSIS),
+                    ft.Text(f"{r['calls']}×", size=12, color=TEXT_MUTED, width=70),
+                    ft.Text(f"p50 {r['p50_ms']:.2f}", size=12, color=TEXT_MUTED, width=90),
+                    ft.Text(f"p95 {r['p95_ms']:.2f}", size=12, color=TEXT_MUTED, width=90),
+                    ft.Text(f"p99 {r['p99_ms']:.2f} ms", size=12, color=TEXT_MUTED, width=110),
+                ],
+            )
+
+        cards = [
+            soft_card(
+                ft.Column(
+                    spacing=6,
+                    controls=[ft.Text("Slowest functions (total time)", size=12, weight=ft.FontWeight.BOLD, color=TEXT_DARK)]
+                    + [stat_row(r["function"], r) for r in snap["functions"]],
+                ),
+                padding=14,
+            )
+        ]
+
+        for q in snap["slow_queries"][:20]:
+            cards.append(
+                soft_card(
+                    ft.Column(
+                        spacing=4,
+                        controls=[
+                            ft.Row(
+                                alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                                controls=[
+                                    ft.Text(f"{q['ms']:.1f} ms · {q['function']}", size=13, weight=ft.FontWeight.BOLD, color="#E11D48"),
+                                    ft.Text(q["at"], size=11, color=TEXT_MUTED),
+                                ],
+                            ),
+                            ft.Text(q["sql"], size=12, color=TEXT_DARK, selectable=True),
+                        ]
+                        + [ft.Text(f"  {line}", size=11, color=TEXT_MUTED) for line in q["plan"]],
+                    ),
+                    padding=14,
+                )
+            )
+        return cards
+
     # -----------------------------
     # Main content host (switch by tab)
     # -----------------------------
@@ -459,12 +633,22 @@ def get_admin_page(
                     ft.Container(expand=True, content=ft.ListView(expand=True, spacing=10, controls=build_user_cards())),
                 ],
             )
+        elif tab.selected_index == 2:
+            content_host.content = ft.Column(
+                expand=True,
+                spacing=12,
+                controls=[
+                    section_title(f"Query Timings (slow ≥ {instrumentation.slow_threshold_ms():g} ms)", ft.Icons.SPEED_OUTLINED),
+                    ft.Container(expand=True, content=ft.ListView(expand=True, spacing=10, controls=build_query_cards())),
+                ],
+            )
         else:
             content_host.content = ft.Column(
                 expand=True,
                 spacing=12,
                 controls=[
                     section_title("Log History", ft.Icons.RECEIPT_LONG_OUTLINED),
+                    build_rollup_summary(),
                     ft.Container(expand=True, content=ft.ListView(expand=True, spacing=10, controls=build_log_cards())),
                 ],
             )
@@ -483,6 +667,14 @@ def get_admin_page(
     # -----------------------------
     # Header (top section)
     # -----------------------------
+    if snapshot is not None:
+        source_text = f"Reading snapshot from {snapshot_at:%Y-%m-%d %H:%M}"
+    else:
+        source_text = "Reading live database"
+
+    # Audit rows the log writer gave up on (after retries) since the app started
+    dropped_logs = db.log_writer_stats()["dropped"]
+
     header = soft_card(
         ft.Row(
             alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
@@ -504,6 +696,13 @@ def get_admin_page(
                             controls=[
                                 ft.Text("Admin Panel", size=20, weight=ft.FontWeight.BOLD, color=TEXT_DARK),
                                 ft.Text("Manage users and review system logs.", size=12, color=TEXT_MUTED),
+                                ft.Text(source_text, size=11, color=TEXT_MUTED, italic=True),
+                                ft.Text(
+                                    f"{dropped_logs} audit log row(s) could not be written (see server log)",
+                                    size=11,
+                                    color="#E11D48",
+                                    visible=dropped_logs > 0,
+                                ),
                             ],
                         ),
                     ],
@@ -511,6 +710,19 @@ def get_admin_page(
                 ft.Row(
                     spacing=6,
                     controls=[
+                        ft.IconButton(
+                            icon=ft.Icons.BACKUP_OUTLINED,
+                            tooltip="Back up now",
+                            icon_color=PINK_DARK,
+                            on_click=lambda e: page.run_task(run_backup),
+                        ),
+                        ft.IconButton(
+                            icon=ft.Icons.SYNC if snapshot is not None else ft.Icons.HISTORY,
+                            tooltip="Read live data" if snapshot is not None else "Read latest snapshot",
+                            icon_color=PINK_DARK,
+                            on_click=lambda e: refresh_admin(live=snapshot is not None),
+                            visible=snapshot is not None or live_reads,
+                        ),
                         ft.IconButton(
                             icon=ft.Icons.REFRESH,
                             tooltip="Refresh",
@@ -549,7 +761,7 @@ def get_admin_page(
                     spacing=12,
                     controls=[
                         ft.Container(expand=True, content=search_tf),
-                        ft.Container(width=260, content=tab),
+                        ft.Container(width=360, content=tab),
                     ],
                 ),
                 ft.Container(
@@ -1,11 +1,13 @@
 import flet as ft
-from passlib.hash import bcrypt
 import asyncio  # ✅ ADDED
 
+from app import passwords
 from app.admin import get_admin_page
 from app.vault import get_secret
 from app.contact_admin import contact_admin_page
 
+from database import async_db as adb
+from database import backup
 from database import db
 from taskwise.app import run_taskwise_app
 
@@ -31,6 +33,10 @@ def main(page: ft.Page):
     # Database startup
     # -----------------------------
     db.init_db()
+    db.start_log_maintenance()  # retention runs once per process, in the background
+    db.resume_pending_purges()  # finish account deletions an earlier run left behind
+    backup.start_backup_scheduler()  # rotating online backups; the newest feeds admin reports
+    passwords.start()  # calibrate the bcrypt cost and warm the hashing pool before the first login
     try:
         print("USING DB:", db.get_db_path())
     except:
@@ -324,7 +330,7 @@ def main(page: ft.Page):
     # -----------------------------
     # Signup handler
     # -----------------------------
-    def handle_signup(e):
+    async def handle_signup(e):
         name = (name_field.value or "").strip()
         email = (email_field.value or "").strip().lower()
         pw = password_field.value or ""
@@ -343,12 +349,12 @@ def main(page: ft.Page):
             return
 
         try:
-            if db.get_user_by_email(email):
+            if await adb.run(db.get_user_by_email, email):
                 show_message("Email is already registered.", suggestion="Try logging in instead, or use a different email.")
                 return
 
-            pw_hash = bcrypt.hash(pw)
-            created = db.create_user(name, email, pw_hash)
+            pw_hash = await passwords.hash_password(pw)  # on the hashing pool, not the event loop
+            created = await adb.run(db.create_user, name, email, pw_hash)
             if not created:
                 show_message("Account creation failed. Try again.", suggestion="Check your internet connection or try a different email.")
                 return
@@ -397,7 +403,7 @@ def main(page: ft.Page):
         await asyncio.sleep(LOGIN_LOADING_SECONDS)
 
         try:
-            user = db.get_user_by_email(email)
+            user = await adb.run(db.get_user_by_email, email)  # off the event loop
 
             if not user:
                 hide_loader()
@@ -409,10 +415,14 @@ def main(page: ft.Page):
                 show_message("Your account is banned. Contact admin.", suggestion="Use the 'Contact Admin' option for support.")
                 return
 
-            if not bcrypt.verify(pw, user["password_hash"]):
+            ok, upgraded = await passwords.verify_and_update(pw, user["password_hash"])
+            if not ok:
                 hide_loader()
                 show_message("Invalid email or password.", suggestion="Try resetting your password if you forgot it.")
                 return
+            if upgraded:
+                # Stored with a lower cost than this machine now uses
+                await adb.run(db.update_user_password, user["id"], upgraded)
 
             page.session.set("user_id", user["id"])
             page.session.set("user_name", user["name"])
@@ -856,7 +866,7 @@ def main(page: ft.Page):
                                             confirm_password_field,
                                             ft.ElevatedButton(
                                                 "Sign Up",
-                                                on_click=handle_signup,
+                                                on_click=lambda e: page.run_task(handle_signup, e),
                                                 bgcolor=BUTTON_COLOR,
                                                 color=PRIMARY_TEXT,
                                                 width=200,
@@ -948,4 +958,6 @@ def main(page: ft.Page):
     page.run_task(app_boot)
 
 
-ft.app(target=main, assets_dir="assets")
\ No newline at end of file
+# Guarded: the password pool's spawned workers re-import this module
+if __name__ == "__main__":
+    ft.app(target=main, assets_dir="assets")
\ No newline at end of file
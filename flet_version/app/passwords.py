@@ -0,0 +1,221 @@
+import asyncio
+import atexit
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from passlib.hash import bcrypt
+
+from app.vault import get_secret
+
+
+# -----------------------------
+# Password hashing off the event loop
+# -----------------------------
+# bcrypt is CPU-bound for a few hundred ms per call, so hashes and verifies run
+# on a process pool and the Flet event loop only awaits them:
+#
+#     from app import passwords
+#     pw_hash = await passwords.hash_password(pw)
+#     ok, upgraded = await passwords.verify_and_update(pw, user["password_hash"])
+#     if upgraded:  # stored with a cost below the current one
+#         db.update_user_password(user["id"], upgraded)
+#
+# The cost (bcrypt rounds) is calibrated once so that one hash takes about
+# PASSWORD_HASH_TARGET_MS on this machine; PASSWORD_ROUNDS pins it instead.
+# Calibration itself runs in a pool worker, never on the event loop; hashes
+# requested before it finishes wait for it, so every worker uses one cost.
+
+PASSWORD_HASH_TARGET_MS = float(get_secret("PASSWORD_HASH_TARGET_MS", "250"))
+PASSWORD_MIN_ROUNDS = int(get_secret("PASSWORD_MIN_ROUNDS", "10"))
+PASSWORD_MAX_ROUNDS = int(get_secret("PASSWORD_MAX_ROUNDS", "15"))
+PASSWORD_ROUNDS = get_secret("PASSWORD_ROUNDS", "")
+# Hashing processes (0 = one per CPU)
+PASSWORD_WORKERS = int(get_secret("PASSWORD_WORKERS", "0"))
+
+# Cheap cost timed during calibration; every extra round doubles the time
+_PROBE_ROUNDS = 6
+
+_rounds = None
+_rounds_lock = threading.Lock()
+# start()'s calibration; early hashes wait for it so every worker uses one cost
+_calibration = None
+_calibration_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# -----------------------------
+# Work factor
+# -----------------------------
+def calibrate_rounds(target_ms=None):
+    """Rounds whose hash time is closest to target_ms, within PASSWORD_MIN/MAX_ROUNDS."""
+    target_ms = PASSWORD_HASH_TARGET_MS if target_ms is None else target_ms
+    probe = bcrypt.using(rounds=_PROBE_ROUNDS)
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        probe.hash("calibration")
+        best = min(best, (time.perf_counter() - start) * 1000)
+    rounds = _PROBE_ROUNDS + round(math.log2(max(target_ms, 1e-3) / max(best, 1e-3)))
+    return max(PASSWORD_MIN_ROUNDS, min(PASSWORD_MAX_ROUNDS, rounds))
+
+
+def current_rounds():
+    """The cost new hashes use: PASSWORD_ROUNDS, else calibrated on first use."""
+    global _rounds
+    if _rounds is None:
+        with _rounds_lock:
+            if _rounds is None:
+                _rounds = int(PASSWORD_ROUNDS) if PASSWORD_ROUNDS else calibrate_rounds()
+    return _rounds
+
+
+def _known_rounds():
+    """The cost if already settled in this process, else None (a worker resolves it)."""
+    if _rounds is not None:
+        return _rounds
+    return int(PASSWORD_ROUNDS) if PASSWORD_ROUNDS else None
+
+
+def _adopt_rounds(rounds):
+    """Settles the cost unless it already is; returns the settled one."""
+    global _rounds
+    with _rounds_lock:
+        if _rounds is None:
+            _rounds = rounds
+        return _rounds
+
+
+def _set_rounds(future):
+    # Done-callback of start()'s calibration; runs on the pool's management thread
+    if not future.cancelled() and future.exception() is None:
+        _adopt_rounds(future.result())
+
+
+def hash_rounds(pw_hash):
+    """Cost a stored bcrypt hash was made with, or None if it isn't one."""
+    try:
+        return bcrypt.from_string(pw_hash).rounds
+    except (ValueError, TypeError):
+        return None
+
+
+# -----------------------------
+# Worker functions (run in the pool processes)
+# -----------------------------
+def hash_sync(password, rounds=None):
+    return bcrypt.using(rounds=rounds or current_rounds()).hash(password)
+
+
+def verify_sync(password, pw_hash):
+    try:
+        return bcrypt.verify(password, pw_hash)
+    except (ValueError, TypeError):
+        return False  # malformed or missing hash: same answer as a wrong password
+
+
+def _verify_and_update(password, pw_hash, rounds=None):
+    if not verify_sync(password, pw_hash):
+        return False, None
+    rounds = rounds or current_rounds()
+    stored = hash_rounds(pw_hash)
+    if stored is not None and stored < rounds:
+        return True, hash_sync(password, rounds)
+    return True, None
+
+
+# -----------------------------
+# Process pool
+# -----------------------------
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: forking a process that runs Flet and SQLite threads isn't safe
+                _pool = ProcessPoolExecutor(
+                    max_workers=PASSWORD_WORKERS or os.cpu_count() or 1,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                atexit.register(shutdown)
+    return _pool
+
+
+def shutdown(wait=True):
+    """Stops the pool; queued hashes are cancelled, running ones finish first unless wait is False."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def start():
+    """
+    Spawns the pool and calibrates the cost in one of its workers without
+    waiting for either, so the first login doesn't pay for them. Returns the
+    warm-up future.
+    """
+    global _calibration
+    if _known_rounds() is not None:
+        return get_pool().submit(hash_rounds, "")  # just brings the workers up
+    with _calibration_lock:
+        future = _calibration
+        if future is None or (future.done() and (future.cancelled() or future.exception() is not None)):
+            future = _calibration = get_pool().submit(current_rounds)
+            future.add_done_callback(_set_rounds)
+    return future
+
+
+async def _settled_rounds():
+    """The cost for new hashes, awaiting start()'s calibration while it runs."""
+    rounds = _known_rounds()
+    if rounds is None:
+        try:
+            rounds = await asyncio.wrap_future(start())
+        except BrokenProcessPool:
+            shutdown(wait=False)
+            rounds = await asyncio.wrap_future(start())
+        # Don't rely on the done-callback having run yet
+        rounds = _adopt_rounds(rounds)
+    return rounds
+
+
+async def _run(fn, *args):
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_pool(), fn, *args)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed by the OS): start a fresh pool for the next call
+        shutdown(wait=False)
+        return await loop.run_in_executor(get_pool(), fn, *args)
+
+
+# -----------------------------
+# Public API
+# -----------------------------
+async def hash_password(password):
+    return await _run(hash_sync, password, await _settled_rounds())
+
+
+async def verify_password(password, pw_hash):
+    return await _run(verify_sync, password, pw_hash)
+
+
+async def verify_and_update(password, pw_hash):
+    """
+    (ok, new_hash). new_hash is a fresh hash at the current cost when the
+    password is right but pw_hash was made with fewer rounds; store it.
+    """
+    return await _run(_verify_and_update, password, pw_hash, await _settled_rounds())
+
+
+def hash_many(passwords, rounds=None, chunksize=16):
+    """Hashes a batch across the pool (bulk provisioning); returns the hashes in order."""
+    rounds = rounds or current_rounds()
+    return list(get_pool().map(hash_sync, passwords, [rounds] * len(passwords), chunksize=chunksize))
@@ -1,58 +1,166 @@
 # vault.py
 import os
 import stat
+import threading
 from pathlib import Path
-from typing import Optional
-from dotenv import load_dotenv
-from cryptography.fernet import Fernet, InvalidToken
+from typing import Dict, Iterable, Mapping, Optional, Union
+from dotenv import dotenv_values
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 
 # Load .env in project root
 PROJECT_ROOT = Path(__file__).resolve().parent
 ENV_PATH = PROJECT_ROOT / ".env"
 VAULT_KEY_PATH = PROJECT_ROOT / ".vault_key"
 
-# Load environment variables from .env (if present)
-load_dotenv(dotenv_path=ENV_PATH)
+# Nothing is read at import time: .env is loaded by the first get_secret(),
+# and .vault_key only once an ENC(...) value has to be decrypted (or encrypted).
+_lock = threading.RLock()
+_env_loaded = False
+_env_from_file: Dict[str, str] = {}  # values this module put into os.environ from .env
+_fernet: Optional[MultiFernet] = None
+_decrypted: Dict[str, str] = {}  # ENC token -> plaintext
+
 
 # ---------------------------
-# Key management
+# .env loading
 # ---------------------------
-def _ensure_key() -> bytes:
+def _load_env() -> None:
     """
-    Ensure a Fernet key exists in .vault_key (create if missing).
-    Returns the raw key bytes.
+    Copies .env into os.environ. Variables set by the real environment win, as
+    with load_dotenv(); values that came from an earlier load are replaced, and
+    dropped if the file no longer has them.
     """
-    if VAULT_KEY_PATH.exists():
-        key = VAULT_KEY_PATH.read_bytes()
-        # key is stored as the raw bytes of the base64 key
-        return key
-    else:
-        # generate a secure key
-        key = Fernet.generate_key()
+    global _env_loaded
+    values = dotenv_values(ENV_PATH) if ENV_PATH.exists() else {}
+    for name, old in list(_env_from_file.items()):
+        if os.environ.get(name) == old:
+            del os.environ[name]  # not overridden since; the file's current value (if any) goes back below
+        del _env_from_file[name]
+    for name, value in values.items():
+        if value is None:
+            continue
+        if name not in os.environ:
+            os.environ[name] = value
+            _env_from_file[name] = value
+    _env_loaded = True
+
+
+def _ensure_env() -> None:
+    if not _env_loaded:
+        with _lock:
+            if not _env_loaded:
+                _load_env()
+
+
+# ---------------------------
+# Key management
+# ---------------------------
+def _write_keys(keys) -> None:
+    data = b"\n".join(keys)
+    try:
+        # write atomically
+        tmp = VAULT_KEY_PATH.with_suffix(".tmp")
+        tmp.write_bytes(data)
+        # set permissions: owner read/write only where supported
         try:
-            # write atomically
-            tmp = VAULT_KEY_PATH.with_suffix(".tmp")
-            tmp.write_bytes(key)
-            # set permissions: owner read/write only where supported
-            try:
-                os.chmod(tmp, stat.S_IRUSR | stat.S_IWUSR)
-            except Exception:
-                # On Windows, chmod may be no-op; ignore
-                pass
-            tmp.replace(VAULT_KEY_PATH)
-            try:
-                os.chmod(VAULT_KEY_PATH, stat.S_IRUSR | stat.S_IWUSR)
-            except Exception:
-                pass
+            os.chmod(tmp, stat.S_IRUSR | stat.S_IWUSR)
         except Exception:
-            # fallback: write directly
-            VAULT_KEY_PATH.write_bytes(key)
-        return key
+            # On Windows, chmod may be no-op; ignore
+            pass
+        tmp.replace(VAULT_KEY_PATH)
+        try:
+            os.chmod(VAULT_KEY_PATH, stat.S_IRUSR | stat.S_IWUSR)
+        except Exception:
+            pass
+    except Exception:
+        # fallback: write directly
+        VAULT_KEY_PATH.write_bytes(data)
 
 
-# Create/load the Fernet instance (singleton)
-_KEY = _ensure_key()
-_FERNET = Fernet(_KEY)
+def _read_keys() -> list:
+    """
+    Fernet keys from .vault_key, newest first (one per line; a file from before
+    rotation holds a single key). Creates the file with a new key if missing.
+    """
+    if VAULT_KEY_PATH.exists():
+        # keys are stored as the raw bytes of the base64 keys
+        keys = [line.strip() for line in VAULT_KEY_PATH.read_bytes().splitlines() if line.strip()]
+        if keys:
+            return keys
+    # generate a secure key
+    keys = [Fernet.generate_key()]
+    _write_keys(keys)
+    return keys
+
+
+def _get_fernet() -> MultiFernet:
+    """Encrypts with the newest key; decrypts with any key still in .vault_key."""
+    global _fernet
+    if _fernet is None:
+        with _lock:
+            if _fernet is None:
+                _fernet = MultiFernet([Fernet(k) for k in _read_keys()])
+    return _fernet
+
+
+def reload() -> None:
+    """
+    Re-reads .env and forgets the loaded key and every decrypted value, e.g.
+    after editing .env or replacing .vault_key. Secrets are resolved afresh
+    on the next get_secret().
+    """
+    global _fernet
+    with _lock:
+        _load_env()
+        _fernet = None
+        _decrypted.clear()
+
+
+def rotate_key(drop_old: bool = False) -> int:
+    """
+    Adds a new newest key to .vault_key and re-encrypts every ENC(...) value
+    in .env with it. Old keys are kept (so ENC values set outside .env still
+    decrypt) unless drop_old is True. Returns the number of values re-encrypted.
+    """
+    with _lock:
+        old_keys = _read_keys()
+        old = MultiFernet([Fernet(k) for k in old_keys])
+        keys = [Fernet.generate_key()] + old_keys
+        new = MultiFernet([Fernet(k) for k in keys])
+        # Saved before .env changes, so an interrupted rotation can't strand a token
+        _write_keys(keys)
+
+        rotated = 0
+        if ENV_PATH.exists():
+            lines = ENV_PATH.read_text(encoding="utf-8").splitlines(keepends=True)
+            for i, line in enumerate(lines):
+                name, sep, value = line.partition("=")
+                value = value.strip()
+                if not sep or name.lstrip().startswith("#") or not (value.startswith("ENC(") and value.endswith(")")):
+                    continue
+                # Decrypt with the old keys, encrypt with the new primary
+                token = new.encrypt(old.decrypt(value[4:-1].encode())).decode()
+                ending = line[len(line.rstrip("\r\n")):]
+                lines[i] = f"{name}=ENC({token}){ending}"
+                rotated += 1
+            ENV_PATH.write_text("".join(lines), encoding="utf-8")
+
+        if drop_old:
+            _write_keys(keys[:1])
+        reload()
+        return rotated
+
+
+def _decrypt(key: str, token: str) -> str:
+    plain = _decrypted.get(token)
+    if plain is None:
+        try:
+            plain = _get_fernet().decrypt(token.encode()).decode()
+        except (InvalidToken, Exception):
+            # If decryption fails, raise an informative error so you can re-encrypt properly
+            raise RuntimeError(f"Failed to decrypt secret for key '{key}'. The token might be invalid or the vault key changed.")
+        _decrypted[token] = plain
+    return plain
 
 
 # ---------------------------
@@ -64,8 +172,10 @@ def get_secret(key: str, default: Optional[str] = None) -> Optional[str]:
     it must be in the form: ENC(<fernet-token>) and this function will decrypt it.
     Otherwise the environment value is returned as-is.
 
-    Returns default if the key is not set in the environment.
+    Returns default if the key is not set in the environment. Decrypted values
+    are memoized per token, so repeated lookups don't decrypt again.
     """
+    _ensure_env()
     raw = os.getenv(key)
     if raw is None:
         return default
@@ -74,39 +184,49 @@ def get_secret(key: str, default: Optional[str] = None) -> Optional[str]:
 
     # Encrypted value wrapper: ENC(<token>)
     if raw.startswith("ENC(") and raw.endswith(")"):
-        token = raw[4:-1]
-        try:
-            plain = _FERNET.decrypt(token.encode())
-            return plain.decode()
-        except (InvalidToken, Exception):
-            # If decryption fails, raise an informative error so you can re-encrypt properly
-            raise RuntimeError(f"Failed to decrypt secret for key '{key}'. The token might be invalid or the vault key changed.")
+        return _decrypt(key, raw[4:-1])
     else:
         # Plain text (ok for development; for production you should encrypt)
         return raw
 
 
+def get_secrets(keys: Iterable[str], defaults: Union[Mapping[str, Optional[str]], str, None] = None) -> Dict[str, Optional[str]]:
+    """
+    get_secret() for several keys at once: {key: value}. `defaults` is either
+    one default for every key or a {key: default} mapping.
+    """
+    if isinstance(defaults, Mapping):
+        return {key: get_secret(key, defaults.get(key)) for key in keys}
+    return {key: get_secret(key, defaults) for key in keys}
+
+
 def encrypt_value(plaintext: str) -> str:
     """
     Encrypt a plaintext string and return the value formatted for .env:
         ENC(<token>)
     Use this function or the CLI below to produce encrypted entries to put into .env.
     """
-    token = _FERNET.encrypt(plaintext.encode()).decode()
+    token = _get_fernet().encrypt(plaintext.encode()).decode()
     return f"ENC({token})"
 
 
 # ---------------------------
-# CLI helper (encrypt a value)
+# CLI helper (encrypt a value, rotate the key)
 # ---------------------------
 if __name__ == "__main__":
     import sys
 
     if len(sys.argv) < 2:
         print("Usage: python vault.py <secret-to-encrypt>")
+        print("       python vault.py --rotate [--drop-old]")
         print("Example: python vault.py Admin123")
         sys.exit(1)
 
+    if sys.argv[1] == "--rotate":
+        count = rotate_key(drop_old="--drop-old" in sys.argv[2:])
+        print(f"New vault key written to {VAULT_KEY_PATH}; re-encrypted {count} value(s) in {ENV_PATH}.")
+        sys.exit(0)
+
     secret = sys.argv[1]
     wrapped = encrypt_value(secret)
     print(wrapped)
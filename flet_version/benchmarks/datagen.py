@@ -0,0 +1,175 @@
+"""
+Deterministic synthetic data for the benchmarks: N users, each with M tasks,
+journal entries and audit-log rows. The same seed always produces the same
+database, so timings from two runs (or two machines) compare like for like.
+
+Run from flet_version/:
+    python -m benchmarks.datagen --db /tmp/bench.db --users 100 --tasks 1000
+"""
+
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from database import db  # noqa: E402
+
+
+# Fixed reference point: generated dates never depend on when the run happens
+EPOCH = datetime(2026, 1, 1)
+
+CATEGORIES = ("Personal", "Work", "Study", "Others", "Bills")
+MOODS = ("Happy", "Calm", "Neutral", "Sad", "Anxious", "Angry", "")
+LOG_ACTIONS = ("Login", "LOGOUT", "Signup", "Password Change")
+WORDS = (
+    "report", "invoice", "meeting", "review", "draft", "budget", "groceries", "exam",
+    "project", "call", "email", "plan", "gym", "rent", "notes", "lecture", "deploy",
+    "design", "refactor", "family", "doctor", "trip", "reading", "taxes", "garden",
+)
+PASSWORD_HASH = "$2b$12$benchmarkbenchmarkbenchmarkbenchmarkbenchmarkbenchmark"
+
+# Rows per executemany() batch; keeps memory flat at 1M rows
+BATCH = 5000
+
+
+def email_for(n):
+    return f"user{n}@bench.test"
+
+
+def _phrase(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _stamp(dt):
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _task_rows(rng, user_id, count):
+    for _ in range(count):
+        created = EPOCH - timedelta(minutes=rng.randrange(365 * 24 * 60))
+        due = ""
+        if rng.random() < 0.8:
+            d = EPOCH + timedelta(days=rng.randrange(-60, 120))
+            due = d.strftime("%Y-%m-%d") + (f" {rng.randrange(1, 13)}:{rng.choice(('00', '30'))} {rng.choice(('AM', 'PM'))}"
+                                             if rng.random() < 0.5 else "")
+        yield (
+            user_id,
+            _phrase(rng, 3).capitalize(),
+            _phrase(rng, rng.randrange(0, 12)),
+            rng.choice(CATEGORIES),
+            due,
+            db.parse_due_ts(due),
+            "completed" if rng.random() < 0.4 else "pending",
+            _stamp(created),
+            _stamp(created),
+        )
+
+
+def _journal_rows(rng, user_id, count):
+    for _ in range(count):
+        created = EPOCH - timedelta(minutes=rng.randrange(365 * 24 * 60))
+        yield (
+            user_id,
+            _phrase(rng, 2).capitalize(),
+            _phrase(rng, rng.randrange(20, 80)),
+            rng.choice(MOODS),
+            _stamp(created),
+            _stamp(created + timedelta(minutes=rng.randrange(600))),
+        )
+
+
+def _log_rows(rng, user_id, count):
+    for _ in range(count):
+        created = EPOCH - timedelta(seconds=rng.randrange(90 * 24 * 3600))
+        yield (user_id, email_for(user_id), rng.choice(LOG_ACTIONS), "", _stamp(created))
+
+
+def _insert(cursor, sql, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            cursor.executemany(sql, batch)
+            batch.clear()
+    if batch:
+        cursor.executemany(sql, batch)
+
+
+def generate(users, tasks_per_user, journals_per_user=None, logs_per_user=None, seed=42, progress=None):
+    """
+    Fills the current db.DB_NAME (already migrated) with synthetic rows.
+    Journals and logs default to a fifth and a half of the task count.
+    Returns {"users", "tasks", "journals", "logs", "user_ids"}.
+    """
+    if journals_per_user is None:
+        journals_per_user = max(1, tasks_per_user // 5)
+    if logs_per_user is None:
+        logs_per_user = max(1, tasks_per_user // 2)
+
+    rng = random.Random(seed)
+    user_ids = []
+    for n in range(1, users + 1):
+        # One transaction per user: bounded WAL growth, and an interrupted run keeps whole users
+        with db.transaction() as cursor:
+            cursor.execute(
+                "INSERT INTO users (name, email, password_hash) VALUES (?, ?, ?)",
+                (f"User {n}", email_for(n), PASSWORD_HASH),
+            )
+            user_id = cursor.lastrowid
+            # Same transaction unless sharded, where the user's data lives in its shard
+            with db.transaction(user_id) as data:
+                _insert(
+                    data,
+                    "INSERT INTO tasks (user_id, title, description, category, due_date, due_ts, status, "
+                    "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    _task_rows(rng, user_id, tasks_per_user),
+                )
+                _insert(
+                    data,
+                    "INSERT INTO journals (user_id, title, content, mood, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    _journal_rows(rng, user_id, journals_per_user),
+                )
+            _insert(
+                cursor,
+                "INSERT INTO logs (user_id, email, action, details, created_at) VALUES (?, ?, ?, ?, ?)",
+                _log_rows(rng, user_id, logs_per_user),
+            )
+        user_ids.append(user_id)
+        if progress:
+            progress(n, users)
+
+    db.connect().execute("ANALYZE")
+    if db.is_sharded():
+        db.fan_out("ANALYZE")
+    return {
+        "users": users,
+        "tasks": users * tasks_per_user,
+        "journals": users * journals_per_user,
+        "logs": users * logs_per_user,
+        "user_ids": user_ids,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="database file to create")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=100, help="tasks per user")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        parser.error(f"{args.db} already exists")
+    db.DB_NAME = args.db
+    db.migrate()
+    counts = generate(args.users, args.tasks, seed=args.seed)
+    db.close_connections()
+    print({k: v for k, v in counts.items() if k != "user_ids"})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Times the database/db.py paths the app hits hardest on a synthetic database
+(see benchmarks.datagen) and writes the results as JSON. With --baseline the
+run is compared against an earlier result file and exits 1 on a regression.
+
+Run from flet_version/:
+    python -m benchmarks.db_bench --scale 100k --out bench.json
+    python -m benchmarks.db_bench --scale 100k --baseline bench.json
+
+--scale is the total task-row count (1k, 100k or 1m); journals and logs are
+generated alongside at 1/5 and 1/2 of it. Pass --db to keep the generated
+database and reuse it on the next run (1m takes a few minutes to build).
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks import datagen  # noqa: E402
+from database import db  # noqa: E402
+
+
+# scale -> (users, tasks per user)
+SCALES = {
+    "1k": (10, 100),
+    "100k": (500, 200),
+    "1m": (2000, 500),
+}
+
+# A scenario is slower than its baseline when its median exceeds baseline * (1 + tolerance)
+DEFAULT_TOLERANCE = 0.25
+
+
+# -----------------------------
+# Scenarios
+# -----------------------------
+def _scenarios(user_ids, rng):
+    """name -> (callable taking a user id, repeat count). Each call is timed separately."""
+    month_start = db.due_ts_from_datetime(datagen.EPOCH)  # EPOCH is the 1st of a month
+    month_end = db.due_ts_from_datetime(datetime(datagen.EPOCH.year, datagen.EPOCH.month + 1, 1))
+    now_ts = db.due_ts_from_datetime(datagen.EPOCH)
+
+    def login_lookup(user_id):
+        db.get_user_by_email(datagen.email_for(user_id))
+
+    def login_lookup_uncached(user_id):
+        db._user_cache.clear()
+        db.get_user_by_email(datagen.email_for(user_id))
+
+    def filtered_search(user_id):
+        db.query_tasks(user_id, category="Work", text=rng.choice(datagen.WORDS), sort="Due Date", limit=50)
+
+    def ranked_search(user_id):
+        db.search_tasks(user_id, rng.choice(datagen.WORDS), limit=50)
+
+    def analytics(user_id):
+        db.get_task_stats(user_id)
+        db.count_overdue_tasks(user_id, now_ts)
+
+    return {
+        "login_lookup": (login_lookup, 200),
+        "login_lookup_uncached": (login_lookup_uncached, 200),
+        "get_tasks_by_user": (db.get_tasks_by_user, 30),
+        "filtered_search": (filtered_search, 50),
+        "ranked_search": (ranked_search, 50),
+        "analytics": (analytics, 50),
+        "calendar_month": (lambda user_id: db.get_tasks_due_between(user_id, month_start, month_end), 50),
+        "get_logs": (lambda user_id: db.get_logs(limit=200), 30),
+    }
+
+
+def _summary(samples):
+    samples = sorted(samples)
+    return {
+        "runs": len(samples),
+        "min_ms": round(samples[0], 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+    }
+
+
+def _time(fn, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return _summary(samples)
+
+
+def run_scenarios(user_ids, seed=42, repeat_scale=1.0, delete_runs=3):
+    """Times every scenario against the current database. delete_user runs last: it removes users."""
+    rng = random.Random(seed)
+    results = {}
+    for name, (fn, repeat) in _scenarios(user_ids, rng).items():
+        picks = [(rng.choice(user_ids),) for _ in range(max(1, int(repeat * repeat_scale)))]
+        fn(*picks[0])  # warm the page cache and the statement cache
+        results[name] = _time(fn, picks)
+
+    victims = rng.sample(user_ids, min(delete_runs, len(user_ids)))
+    results["delete_user"] = _time(db.delete_user, [(user_id,) for user_id in victims])
+    return results
+
+
+# -----------------------------
+# Baseline comparison
+# -----------------------------
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Returns [(name, median_ms, baseline_median_ms, ratio, regressed)] for the
+    scenarios both runs have. Baselines from a different scale are not comparable.
+    """
+    rows = []
+    old = baseline.get("results", {})
+    for name, now in results["results"].items():
+        if name not in old:
+            continue
+        base = old[name]["median_ms"]
+        ratio = now["median_ms"] / base if base else float("inf")
+        rows.append((name, now["median_ms"], base, ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def _meta(scale, counts):
+    return {
+        "scale": scale,
+        "rows": {k: v for k, v in counts.items() if k != "user_ids"},
+        "schema_version": db.SCHEMA_VERSION,
+        "sqlite_version": sqlite3.sqlite_version,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def _prepare(path, scale, seed):
+    """Migrates `path` and fills it for `scale` unless a previous run already did."""
+    users, tasks = SCALES[scale]
+    db.DB_NAME = path
+    db.migrate()
+    seeded = db.connect().execute(
+        "SELECT COUNT(*) FROM users WHERE email LIKE '%@bench.test'"
+    ).fetchone()[0]
+    if seeded:
+        user_ids = [r[0] for r in db.connect().execute(
+            "SELECT id FROM users WHERE email LIKE '%@bench.test' AND is_deleted = 0 ORDER BY id"
+        )]
+        return {"users": seeded, "tasks": seeded * tasks, "reused": True, "user_ids": user_ids}
+
+    def progress(n, total):
+        if n % max(1, total // 10) == 0:
+            print(f"  generated {n}/{total} users", file=sys.stderr)
+
+    return datagen.generate(users, tasks, seed=seed, progress=progress)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="1k")
+    parser.add_argument("--db", help="database file to build or reuse (default: a temp file)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat-scale", type=float, default=1.0, help="multiply every scenario's run count")
+    parser.add_argument("--out", help="write the JSON result here (default: stdout)")
+    parser.add_argument("--baseline", help="earlier JSON result to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        counts = _prepare(args.db or os.path.join(tmp, "bench.db"), args.scale, args.seed)
+        results = {
+            "meta": _meta(args.scale, counts),
+            "results": run_scenarios(counts["user_ids"], seed=args.seed, repeat_scale=args.repeat_scale),
+        }
+        db.close_connections()
+
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("meta", {}).get("scale") != args.scale:
+        print(f"baseline is for scale {baseline.get('meta', {}).get('scale')!r}, not {args.scale!r}", file=sys.stderr)
+        return 2
+
+    regressed = False
+    print(f"\n{'scenario':<24}{'median ms':>12}{'baseline':>12}{'ratio':>8}", file=sys.stderr)
+    for name, now, base, ratio, slow in compare(results, baseline, args.tolerance):
+        regressed |= slow
+        flag = "  REGRESSED" if slow else ""
+        print(f"{name:<24}{now:>12.3f}{base:>12.3f}{ratio:>8.2f}{flag}", file=sys.stderr)
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
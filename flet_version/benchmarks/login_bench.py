@@ -0,0 +1,119 @@
+"""
+Login benchmark: N concurrent logins on one asyncio event loop (as Flet runs
+them), each verifying a bcrypt hash, in two modes: the verify called inline
+on the loop (how login used to work) and awaited on app/passwords.py's process
+pool. Reports logins/s, per-login latency and event-loop lag (how late a
+10 ms ticker wakes while the logins run; that is what a user sees as a frozen UI).
+Prints or writes JSON.
+
+Run from flet_version/:
+    python -m benchmarks.login_bench --logins 32 --rounds 10
+    python -m benchmarks.login_bench --logins 64 --workers 4 --out logins.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import passwords  # noqa: E402
+from benchmarks.db_bench import _summary  # noqa: E402
+
+MODES = ("inline", "pool")
+TICK = 0.01
+
+
+async def _ticker(lags, stop):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(max(0.0, time.perf_counter() - t0 - TICK) * 1000)
+
+
+async def _logins(mode, n, password, pw_hash):
+    samples, lags = [], []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    await asyncio.sleep(0)
+
+    async def login():
+        t0 = time.perf_counter()
+        if mode == "inline":
+            ok = passwords.verify_sync(password, pw_hash)
+        else:
+            ok = await passwords.verify_password(password, pw_hash)
+        assert ok
+        samples.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(n)))
+    seconds = time.perf_counter() - t0
+    stop.set()
+    await ticker
+    return samples, lags, seconds
+
+
+def run_logins(mode, logins=32, rounds=None):
+    """Runs `logins` concurrent verifies in `mode` (see MODES) and returns their stats."""
+    rounds = rounds or passwords.current_rounds()
+    password = "correct horse battery staple"
+    pw_hash = passwords.hash_sync(password, rounds)
+    if mode == "pool":
+        passwords.get_pool().submit(passwords.hash_rounds, "").result()  # workers up before timing
+
+    samples, lags, seconds = asyncio.run(_logins(mode, logins, password, pw_hash))
+    return {
+        "logins": logins,
+        "rounds": rounds,
+        "seconds": round(seconds, 4),
+        "logins_per_s": round(logins / seconds, 2) if seconds else None,
+        "latency": _summary(samples),
+        "loop_lag": _summary(lags) if lags else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--rounds", type=int, help="bcrypt cost (default: calibrated for this machine)")
+    parser.add_argument("--workers", type=int, help="hashing processes (default: PASSWORD_WORKERS)")
+    parser.add_argument("--out", help="write the JSON result here (default: stdout)")
+    args = parser.parse_args()
+    if args.logins < 1:
+        parser.error("--logins must be at least 1")
+
+    if args.workers:
+        passwords.PASSWORD_WORKERS = args.workers
+    try:
+        results = {
+            "meta": {
+                "logins": args.logins,
+                "rounds": args.rounds or passwords.current_rounds(),
+                "workers": passwords.PASSWORD_WORKERS or os.cpu_count(),
+                "cpus": os.cpu_count(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+            },
+            "results": {mode: run_logins(mode, args.logins, args.rounds) for mode in MODES},
+        }
+    finally:
+        passwords.shutdown()
+
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
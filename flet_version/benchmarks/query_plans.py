@@ -0,0 +1,95 @@
+"""
+Show how the hot read paths are planned before and after the secondary indexes.
+
+Run from flet_version/:
+    python -m benchmarks.query_plans [--users 50] [--rows 200]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from database import db  # noqa: E402
+
+
+# Same statements the db helpers issue
+HOT_QUERIES = {
+    "get_tasks_by_user": (
+        "SELECT id, title, description, category, due_date, status, created_at, updated_at "
+        "FROM tasks WHERE user_id = ? ORDER BY created_at DESC",
+        (1,),
+    ),
+    "get_journals_by_user": (
+        "SELECT id, title, content, mood, created_at, updated_at, "
+        "COALESCE(ai_reflection, ''), COALESCE(ai_mood, '') FROM journals WHERE user_id = ? ORDER BY updated_at DESC",
+        (1,),
+    ),
+    "get_logs": (
+        "SELECT id, user_id, email, action, details, created_at FROM logs ORDER BY created_at DESC",
+        (),
+    ),
+    "get_user_by_username": (
+        "SELECT id, name, email, password_hash, role, COALESCE(is_banned, 0) FROM users WHERE name = ?",
+        ("user1",),
+    ),
+}
+
+
+def seed(users, rows):
+    with db.transaction() as cursor:
+        for u in range(1, users + 1):
+            cursor.execute(
+                "INSERT INTO users (name, email, password_hash) VALUES (?, ?, ?)",
+                (f"user{u}", f"user{u}@example.com", "x"),
+            )
+            user_id = cursor.lastrowid
+            cursor.executemany(
+                "INSERT INTO tasks (user_id, title, created_at) VALUES (?, ?, datetime('now', ?))",
+                [(user_id, f"Task {i}", f"-{i} minutes") for i in range(rows)],
+            )
+            cursor.executemany(
+                "INSERT INTO journals (user_id, title, updated_at) VALUES (?, ?, datetime('now', ?))",
+                [(user_id, f"Entry {i}", f"-{i} minutes") for i in range(rows)],
+            )
+            cursor.executemany(
+                "INSERT INTO logs (user_id, action, created_at) VALUES (?, 'login', datetime('now', ?))",
+                [(user_id, f"-{i} minutes") for i in range(rows)],
+            )
+
+
+def report(label, repeat=20):
+    conn = db.connect()
+    print(f"\n== {label} ==")
+    for name, (sql, params) in HOT_QUERIES.items():
+        plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(sql, params).fetchall()
+        elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+        print(f"{name:<22} {elapsed_ms:8.3f} ms  | " + " ; ".join(plan))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_NAME = os.path.join(tmp, "bench.db")
+        db.migrate(target_version=1)
+        seed(args.users, args.rows)
+        report("schema v1 (no secondary indexes)")
+
+        db.migrate()
+        db.connect().execute("ANALYZE")
+        report(f"schema v{db.SCHEMA_VERSION}")
+        db.close_connections()
+
+
+if __name__ == "__main__":
+    main()
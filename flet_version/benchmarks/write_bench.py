@@ -0,0 +1,165 @@
+"""
+Concurrent-write benchmark: N simulated sessions (one thread and one user
+each) hammer database/db.py with the writes the pages make (status toggles,
+new tasks, edits, settings) in three modes: every thread writing directly,
+through the single-writer queue (DB_SINGLE_WRITER), and through the queue with
+status toggles submitted as futures that are collected at the end (so repeated
+flips of one task can be coalesced). Prints or writes JSON.
+
+Run from flet_version/:
+    python -m benchmarks.write_bench --sessions 50 --ops 40
+    python -m benchmarks.write_bench --sessions 50 --busy-timeout 200 --out writes.json
+
+--busy-timeout lowers SQLite's lock wait (ms) so direct writers show the
+"database is locked" errors a burst causes instead of only waiting them out.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks import datagen  # noqa: E402
+from benchmarks.db_bench import _summary  # noqa: E402
+from database import db  # noqa: E402
+
+MODES = ("direct", "queued", "queued_async")
+
+
+def _session(user_id, task_ids, ops, seed, start, samples, errors, async_toggles=False):
+    """One simulated user: mostly rapid status flips on a few tasks, some adds/edits/settings."""
+    rng = random.Random(seed)
+    hot = task_ids[:3]
+    status = {task_id: "pending" for task_id in hot}
+    pending = []
+    start.wait()
+    for n in range(ops):
+        roll = rng.random()
+        t0 = time.perf_counter()
+        try:
+            if roll < 0.6:
+                task_id = rng.choice(hot)
+                status[task_id] = "completed" if status[task_id] == "pending" else "pending"
+                if async_toggles:
+                    pending.append(db.update_task_status.submit(user_id, task_id, status[task_id]))
+                else:
+                    db.update_task_status(user_id, task_id, status[task_id])
+            elif roll < 0.8:
+                db.add_task(user_id, f"session task {n}", "", "Work", "")
+            elif roll < 0.9:
+                db.update_task(user_id, rng.choice(task_ids), f"edited {n}", "", "Study", "", "pending")
+            else:
+                db.set_setting(user_id, "theme_name", rng.choice(("Light Mode", "Dark Mode")))
+        except sqlite3.OperationalError as ex:
+            errors.append(str(ex))
+            continue
+        samples.append((time.perf_counter() - t0) * 1000)
+
+    for future in pending:
+        try:
+            future.result()
+        except sqlite3.OperationalError as ex:
+            errors.append(str(ex))
+
+
+def run_sessions(user_ids, mode, ops=40, seed=42):
+    """Runs one session thread per user in `mode` (see MODES) and returns its stats."""
+    task_ids = {user_id: [t.id for t in db.get_tasks_by_user(user_id)] for user_id in user_ids}
+    previous = db.DB_SINGLE_WRITER
+    db.DB_SINGLE_WRITER = mode != "direct"
+    db._write_queue.reset_stats()
+
+    samples, errors = [], []
+    start = threading.Barrier(len(user_ids) + 1)
+    threads = [
+        threading.Thread(
+            target=_session,
+            args=(user_id, task_ids[user_id], ops, seed + i, start, samples, errors, mode == "queued_async"),
+        )
+        for i, user_id in enumerate(user_ids)
+    ]
+    try:
+        for thread in threads:
+            thread.start()
+        start.wait()
+        t0 = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - t0
+    finally:
+        db.DB_SINGLE_WRITER = previous
+
+    queue = db.write_queue_stats()
+    result = {
+        "sessions": len(user_ids),
+        "writes": len(samples),
+        "errors": len(errors),
+        "seconds": round(seconds, 4),
+        "writes_per_s": round(len(samples) / seconds, 1) if seconds else None,
+        "latency": _summary(samples) if samples else None,
+        # Direct writers commit once per call
+        "transactions": len(samples) if mode == "direct" else queue["transactions"],
+        "coalesced": queue["coalesced"],
+    }
+    if errors:
+        result["first_error"] = errors[0]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--ops", type=int, default=40, help="writes per session")
+    parser.add_argument("--tasks-per-user", type=int, default=20)
+    parser.add_argument("--busy-timeout", type=int, help="ms; overrides the connection busy_timeout")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write the JSON result here (default: stdout)")
+    args = parser.parse_args()
+    if args.tasks_per_user < 1:
+        parser.error("--tasks-per-user must be at least 1")
+
+    if args.busy_timeout is not None:
+        db.CONNECTION_PRAGMAS = tuple(
+            (name, args.busy_timeout if name == "busy_timeout" else value) for name, value in db.CONNECTION_PRAGMAS
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_NAME = os.path.join(tmp, "writes.db")
+        db.migrate()
+        user_ids = datagen.generate(args.sessions, args.tasks_per_user, seed=args.seed)["user_ids"]
+
+        results = {
+            "meta": {
+                "sessions": args.sessions,
+                "ops_per_session": args.ops,
+                "busy_timeout_ms": dict(db.CONNECTION_PRAGMAS)["busy_timeout"],
+                "sqlite_version": sqlite3.sqlite_version,
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+            },
+            "results": {mode: run_sessions(user_ids, mode, ops=args.ops, seed=args.seed) for mode in MODES},
+        }
+        db.flush_writes()
+        db.close_connections()
+
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
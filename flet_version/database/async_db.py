@@ -0,0 +1,138 @@
+import asyncio
+import atexit
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.vault import get_secret
+from database import db
+
+
+# -----------------------------
+# Async facade over database.db
+# -----------------------------
+# Flet event handlers and page.run_task() coroutines await these instead of
+# calling db directly, so the event loop keeps painting while SQLite works:
+#
+#     from database import async_db as adb
+#     tasks = await adb.get_tasks_by_user(user_id)
+#     rows, cursor = await adb.run(S.db.query_tasks, user_id, limit=50)
+#
+# Calls run on a small dedicated thread pool. Each worker thread keeps its own
+# pooled connection (see db.connect), so reads never share a connection.
+
+DB_WORKERS = int(get_secret("DB_WORKERS", "2"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="taskwise-db")
+                atexit.register(shutdown)
+    return _executor
+
+
+def shutdown():
+    """Stop the worker threads; queued calls that haven't started are dropped."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def run(fn, *args, **kwargs):
+    """Runs fn(*args, **kwargs) on the db executor and awaits its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(fn, *args, **kwargs))
+
+
+class AsyncDB:
+    """
+    Awaitable view of a db-like object: AsyncDB(S.db).query_tasks(...) runs
+    S.db.query_tasks on the executor. Pages wrap S.db so test doubles work too.
+    """
+
+    def __init__(self, target=db):
+        self._target = target
+
+    def __getattr__(self, name):
+        fn = getattr(self._target, name)
+        if not callable(fn):
+            raise AttributeError(name)
+
+        @functools.wraps(fn)
+        async def call(*args, **kwargs):
+            return await run(fn, *args, **kwargs)
+
+        return call
+
+
+_default = AsyncDB(db)
+
+
+def __getattr__(name):
+    # Module-level shortcut: adb.get_tasks_by_user(...) == AsyncDB(db).get_tasks_by_user(...)
+    if name.startswith("__"):
+        raise AttributeError(name)
+    return getattr(_default, name)
+
+
+# -----------------------------
+# Stale request cancellation
+# -----------------------------
+class RequestScope:
+    """
+    Tracks in-flight reads for the current screen. start(key, ...) cancels the
+    previous request under the same key (a newer search or refresh replaces
+    it), and cancel() drops everything, e.g. when the user navigates away.
+
+    A cancelled call that already reached SQLite finishes in its worker, but
+    its result is discarded and the coroutine never touches the UI. Writes
+    shouldn't go through a scope: they must complete even after navigation.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def start(self, page, key, handler, *args):
+        """Schedules handler(*args) (a coroutine function) via page.run_task under `key`."""
+        future = page.run_task(handler, *args)
+        with self._lock:
+            previous = self._pending.get(key)
+            self._pending[key] = future
+        if previous is not None and previous is not future:
+            _cancel(previous)
+        return future
+
+    def cancel(self, key=None):
+        with self._lock:
+            if key is None:
+                futures = list(self._pending.values())
+                self._pending.clear()
+            else:
+                futures = [f for f in [self._pending.pop(key, None)] if f is not None]
+        for future in futures:
+            _cancel(future)
+
+    def pending(self):
+        """Keys whose request hasn't finished yet."""
+        with self._lock:
+            return [k for k, f in self._pending.items() if not _done(f)]
+
+
+def _cancel(future):
+    cancel = getattr(future, "cancel", None)
+    if callable(cancel):
+        cancel()
+
+
+def _done(future):
+    done = getattr(future, "done", None)
+    return bool(done()) if callable(done) else True
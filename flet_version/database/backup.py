@@ -0,0 +1,333 @@
+import atexit
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from app.vault import get_secret
+from database import db
+
+
+# -----------------------------
+# Online backups + read-only reporting snapshot
+# -----------------------------
+# create_backup() copies the live database with sqlite3.Connection.backup,
+# BACKUP_PAGES_PER_STEP pages at a time with a short pause between steps. The
+# source is read through its own connection in WAL mode, so app writers are
+# never blocked; if they change pages under a running copy SQLite restarts
+# it, and after BACKUP_MAX_RESTARTS restarts the copy is taken in one step.
+#
+# Each backup lands as <db>-YYYYmmdd-HHMMSS-ffffff.db in BACKUP_DIR (default:
+# "backups" next to the database); only the newest BACKUP_KEEP are kept.
+# The newest one doubles as a reporting snapshot: reporting_snapshot() opens
+# it read-only so admin listings don't compete with user writes.
+#
+# With DB_SHARDS set the global file only holds users and logs, so every shard
+# file is copied too, into <backup>.shards/ under the same timestamp; the set
+# is rotated as one and the snapshot reads across it. Each file is copied
+# consistently on its own, one after the other (not as one atomic cut).
+#
+#     from database import backup
+#     path = backup.create_backup()
+#     conn, taken_at = backup.reporting_snapshot()
+#     logs = db.get_logs(limit=500, conn=conn)   # conn None -> live database
+
+BACKUP_DIR = get_secret("BACKUP_DIR", "")
+BACKUP_KEEP = int(get_secret("BACKUP_KEEP", "7"))
+BACKUP_PAGES_PER_STEP = int(get_secret("BACKUP_PAGES_PER_STEP", "256"))
+BACKUP_STEP_PAUSE = float(get_secret("BACKUP_STEP_PAUSE", "0.005"))
+BACKUP_MAX_RESTARTS = int(get_secret("BACKUP_MAX_RESTARTS", "3"))
+
+# Scheduler: a backup whenever the newest one is older than this (0 = off)
+BACKUP_INTERVAL_HOURS = float(get_secret("BACKUP_INTERVAL_HOURS", "24"))
+
+# Admin reads use the newest snapshot while it is younger than this
+REPORTING_SNAPSHOT = get_secret("REPORTING_SNAPSHOT", "1") == "1"
+REPORTING_MAX_AGE_HOURS = float(get_secret("REPORTING_MAX_AGE_HOURS", "24"))
+
+_BACKUP_SUFFIX = ".db"
+_PARTIAL_SUFFIX = ".partial"
+_SHARDS_SUFFIX = ".shards"
+
+_backup_lock = threading.Lock()
+_snapshot_lock = threading.Lock()
+_snapshot = None  # (path, connection)
+_scheduler_stop = threading.Event()
+_scheduler_thread = None
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+# -----------------------------
+# Backups
+# -----------------------------
+def backup_dir():
+    """BACKUP_DIR, or a "backups" folder next to the live database."""
+    if BACKUP_DIR:
+        return BACKUP_DIR
+    return os.path.join(os.path.dirname(os.path.abspath(db.get_db_path())), "backups")
+
+
+def _stem():
+    return Path(db.get_db_path()).stem or "taskwise"
+
+
+def list_backups(dest_dir=None):
+    """Paths of the finished backups of the current database, newest first."""
+    dest_dir = dest_dir or backup_dir()
+    prefix = _stem() + "-"
+    try:
+        names = os.listdir(dest_dir)
+    except FileNotFoundError:
+        return []
+    names = [n for n in names if n.startswith(prefix) and n.endswith(_BACKUP_SUFFIX)]
+    # The timestamp in the name sorts chronologically
+    return [os.path.join(dest_dir, n) for n in sorted(names, reverse=True)]
+
+
+def latest_backup(dest_dir=None):
+    backups = list_backups(dest_dir)
+    return backups[0] if backups else None
+
+
+def backup_shard_paths(path):
+    """Shard copies that belong to the backup at `path` (none for an unsharded backup)."""
+    shards = path + _SHARDS_SUFFIX
+    try:
+        names = os.listdir(shards)
+    except FileNotFoundError:
+        return []
+    return [os.path.join(shards, n) for n in sorted(names) if n.endswith(_BACKUP_SUFFIX)]
+
+
+def backup_taken_at(path):
+    return datetime.fromtimestamp(os.path.getmtime(path))
+
+
+def _copy(src, dst, pages, pause, on_progress):
+    restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal restarts, last_remaining
+        if last_remaining is not None and remaining > last_remaining:
+            # a writer touched the source; SQLite started the copy over
+            restarts += 1
+            if pages > 0 and restarts > BACKUP_MAX_RESTARTS:
+                raise _TooManyRestarts()
+        last_remaining = remaining
+        if on_progress:
+            on_progress({"copied": total - remaining, "total": total, "restarts": restarts})
+
+    src.backup(dst, pages=pages, progress=progress, sleep=pause)
+
+
+def create_backup(dest_dir=None, pages=None, pause=None, keep=None, on_progress=None):
+    """
+    Copies the live database into a new backup file and rotates old ones.
+    pages/pause default to BACKUP_PAGES_PER_STEP/BACKUP_STEP_PAUSE (pages=-1
+    copies everything in one step). on_progress({"copied", "total", "restarts"})
+    is called after every step. Returns the new backup's path.
+    """
+    dest_dir = dest_dir or backup_dir()
+    pages = BACKUP_PAGES_PER_STEP if pages is None else pages
+    pause = BACKUP_STEP_PAUSE if pause is None else pause
+    os.makedirs(dest_dir, exist_ok=True)
+
+    with _backup_lock:
+        path = os.path.join(dest_dir, f"{_stem()}-{datetime.now():%Y%m%d-%H%M%S-%f}{_BACKUP_SUFFIX}")
+        partial = path + _PARTIAL_SUFFIX
+        shards_partial = path + _SHARDS_SUFFIX + _PARTIAL_SUFFIX
+        try:
+            db.flush_logs()
+            # Shards first: the global file appearing under its final name marks the set complete
+            shard_paths = db.shard_paths()
+            if shard_paths:
+                shutil.rmtree(shards_partial, ignore_errors=True)
+                os.makedirs(shards_partial)
+                for shard in shard_paths:
+                    _backup_file(shard, os.path.join(shards_partial, os.path.basename(shard)),
+                                 pages, pause, on_progress)
+                os.replace(shards_partial, path + _SHARDS_SUFFIX)
+            _backup_file(db.get_db_path(), partial, pages, pause, on_progress)
+            os.replace(partial, path)
+        except BaseException:
+            _remove(partial)
+            shutil.rmtree(shards_partial, ignore_errors=True)
+            if not os.path.exists(path):
+                shutil.rmtree(path + _SHARDS_SUFFIX, ignore_errors=True)
+            raise
+
+    rotate_backups(dest_dir, keep)
+    return path
+
+
+def _backup_file(source, partial, pages, pause, on_progress):
+    # A dedicated source connection: the backup must not share the caller's pooled one
+    src = sqlite3.connect(source)
+    try:
+        src.execute("PRAGMA busy_timeout=5000")
+        try:
+            _copy_to(src, partial, pages, pause, on_progress)
+        except _TooManyRestarts:
+            _copy_to(src, partial, -1, 0, on_progress)
+    except BaseException:
+        _remove(partial)
+        raise
+    finally:
+        src.close()
+
+
+def _copy_to(src, partial, pages, pause, on_progress):
+    _remove(partial)
+    dst = sqlite3.connect(partial)
+    try:
+        _copy(src, dst, pages, pause, on_progress)
+        # Snapshots are opened read-only: a rollback journal needs no -wal/-shm files
+        dst.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        dst.close()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def rotate_backups(dest_dir=None, keep=None):
+    """Deletes all but the newest `keep` (BACKUP_KEEP) backups. Returns the removed paths."""
+    keep = max(1, BACKUP_KEEP if keep is None else keep)
+    removed = []
+    for path in list_backups(dest_dir)[keep:]:
+        try:
+            os.remove(path)
+            removed.append(path)
+        except OSError:
+            continue  # still open somewhere (Windows); the next rotation retries
+        shutil.rmtree(path + _SHARDS_SUFFIX, ignore_errors=True)
+    return removed
+
+
+# -----------------------------
+# Read-only reporting snapshot
+# -----------------------------
+class SnapshotConnection(sqlite3.Connection):
+    """
+    Read-only connection to a backup's global file. fan_out() runs a query on
+    the backup's shard copies (or on this file when the backup isn't sharded),
+    the snapshot counterpart of db.fan_out().
+    """
+
+    shards = ()
+
+    def fan_out(self, sql, params=()):
+        if not self.shards:
+            return self.execute(sql, params).fetchall()
+        futures = [db._get_fanout_executor().submit(_query, shard, sql, params) for shard in self.shards]
+        return [row for future in futures for row in future.result()]
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+        super().close()
+
+
+def _query(conn, sql, params):
+    return conn.execute(sql, params).fetchall()
+
+
+def _open_read_only(path, factory=sqlite3.Connection):
+    # immutable=1: no locks, no journal lookups
+    uri = Path(path).resolve().as_uri() + "?mode=ro&immutable=1"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False, factory=factory)
+    conn.execute("PRAGMA query_only=ON")
+    return conn
+
+
+def open_snapshot(path):
+    """Read-only connection to a backup, its shard copies included (see SnapshotConnection)."""
+    conn = _open_read_only(path, SnapshotConnection)
+    conn.shards = tuple(_open_read_only(shard) for shard in backup_shard_paths(path))
+    return conn
+
+
+def reporting_snapshot(max_age_hours=None):
+    """
+    (connection, taken_at) for the newest backup, or (None, None) when
+    REPORTING_SNAPSHOT is off or no backup is younger than max_age_hours.
+    The connection is shared and replaced when a newer backup appears.
+    """
+    global _snapshot
+    if not REPORTING_SNAPSHOT:
+        return None, None
+    max_age_hours = REPORTING_MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+
+    path = latest_backup()
+    if path is None:
+        return None, None
+    taken_at = backup_taken_at(path)
+    if (datetime.now() - taken_at).total_seconds() > max_age_hours * 3600:
+        return None, None
+
+    with _snapshot_lock:
+        if _snapshot is not None and _snapshot[0] == path:
+            return _snapshot[1], taken_at
+        old, _snapshot = _snapshot, (path, open_snapshot(path))
+        conn = _snapshot[1]
+    if old is not None:
+        old[1].close()
+    return conn, taken_at
+
+
+def close_snapshot():
+    global _snapshot
+    with _snapshot_lock:
+        old, _snapshot = _snapshot, None
+    if old is not None:
+        old[1].close()
+
+
+atexit.register(close_snapshot)
+
+
+# -----------------------------
+# Scheduler
+# -----------------------------
+def start_backup_scheduler(interval_hours=None):
+    """
+    Backs up on a daemon thread whenever the newest backup is older than
+    interval_hours (BACKUP_INTERVAL_HOURS; 0 disables). Safe to call twice.
+    """
+    global _scheduler_thread
+    interval = (BACKUP_INTERVAL_HOURS if interval_hours is None else interval_hours) * 3600
+    if interval <= 0 or (_scheduler_thread is not None and _scheduler_thread.is_alive()):
+        return
+    _scheduler_stop.clear()
+
+    def work():
+        while not _scheduler_stop.is_set():
+            latest = latest_backup()
+            age = time.time() - os.path.getmtime(latest) if latest else None
+            if age is None or age >= interval:
+                try:
+                    create_backup()
+                    age = 0
+                except (sqlite3.Error, OSError) as ex:
+                    print(f"[backup] failed: {ex}", file=sys.stderr)
+                    age = interval - 300  # try again in five minutes
+            _scheduler_stop.wait(max(60, interval - age))
+
+    _scheduler_thread = threading.Thread(target=work, name="taskwise-backup", daemon=True)
+    _scheduler_thread.start()
+
+
+def stop_backup_scheduler():
+    _scheduler_stop.set()
@@ -1,7 +1,22 @@
+import atexit
+import calendar
+import functools
+import os
+import re
 import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from passlib.hash import bcrypt
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from app.vault import get_secret
+from database import instrumentation
+from database.log_writer import LogWriter
+from database.writer import WriteQueue
+from database.models import Journal, LogEntry, Task, TaskStatus, User
 from taskwise.theme import CATEGORIES
 
 # -----------------------------
@@ -10,22 +25,374 @@ from taskwise.theme import CATEGORIES
 DB_NAME = get_secret("DB_NAME", "taskwise.db")
 ADMIN_DEFAULT_PASSWORD = get_secret("ADMIN_DEFAULT_PASSWORD", "Admin123")
 
+# Log retention: rows older than this many days, or beyond this many rows, are
+# moved to monthly archive tables by run_log_maintenance()
+LOG_RETENTION_DAYS = int(get_secret("LOG_RETENTION_DAYS", "90"))
+LOG_MAX_ROWS = int(get_secret("LOG_MAX_ROWS", "50000"))
+
+# Delete markers kept for changes_since(); clients older than this reload in full
+TOMBSTONE_RETENTION_DAYS = int(get_secret("TOMBSTONE_RETENTION_DAYS", "30"))
+
+# User lookup cache bounds
+USER_CACHE_SIZE = int(get_secret("USER_CACHE_SIZE", "256"))
+USER_CACHE_TTL = float(get_secret("USER_CACHE_TTL", "300"))
+
+# Rows deleted per transaction when purging a deleted account
+PURGE_CHUNK_SIZE = int(get_secret("PURGE_CHUNK_SIZE", "500"))
+
+# Sharding. "0" keeps everything in DB_NAME. "N" spreads users' tasks, journals
+# and settings over N shard files by user_id % N; "user" gives every user a
+# file of their own. Users and logs always stay in DB_NAME (the global database).
+DB_SHARDS = get_secret("DB_SHARDS", "0")
+DB_SHARD_DIR = get_secret("DB_SHARD_DIR", "")
+# Threads used to run an admin query on every shard at once
+SHARD_FANOUT_WORKERS = int(get_secret("SHARD_FANOUT_WORKERS", "4"))
+
+# Single writer: per-user writes from every session run on one thread, which
+# commits everything queued in one transaction per tick (see database/writer.py).
+# WRITE_LINGER_MS > 0 holds a tick open that long for more writes to join it.
+DB_SINGLE_WRITER = get_secret("DB_SINGLE_WRITER", "1") == "1"
+WRITE_BATCH_SIZE = int(get_secret("WRITE_BATCH_SIZE", "500"))
+WRITE_LINGER_MS = float(get_secret("WRITE_LINGER_MS", "0"))
+
+# Applied once to every new connection (page cache, mmap and lock wait are per connection)
+CONNECTION_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("busy_timeout", 5000),        # ms to wait on a locked database before failing
+    ("cache_size", -16000),        # negative = KiB, so ~16 MB of page cache
+    ("mmap_size", 134217728),      # 128 MB memory-mapped reads
+    ("temp_store", "MEMORY"),
+    ("foreign_keys", "ON"),        # enforce REFERENCES users(id) ... ON DELETE CASCADE
+)
+
+# -----------------------------
+# Due date helpers
+# -----------------------------
+# tasks.due_ts holds the due wall-clock time as epoch seconds read as UTC, so
+# day and month boundaries are exact whatever the machine's timezone is.
+# due_date keeps the original string for display only.
+NO_DUE_TS = 253402300799  # 9999-12-31 23:59:59 — tasks without a due date sort last
+DUE_TS_KEY = f"ifnull(due_ts, {NO_DUE_TS})"  # must match idx_tasks_user_due exactly
+
+
+def parse_due_datetime(s):
+    """
+    Parses the due_date strings the UI stores ("YYYY-MM-DD", "YYYY-MM-DD h:mm AM",
+    "YYYY-MM-DD HH:MM" or ISO). A bare date counts as due at 23:59. Returns None
+    when empty or unparseable.
+    """
+    s = (s or "").strip().replace("T", " ")
+    if not s:
+        return None
+
+    for fmt in ("%Y-%m-%d %I:%M %p", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            dt = datetime.strptime(s, fmt)
+            if fmt == "%Y-%m-%d":
+                return datetime(dt.year, dt.month, dt.day, 23, 59)
+            return dt
+        except ValueError:
+            continue
+
+    try:
+        return datetime.fromisoformat(s)
+    except ValueError:
+        return None
+
+
+def due_ts_from_datetime(dt):
+    return calendar.timegm(dt.timetuple())
+
+
+def parse_due_ts(s):
+    dt = parse_due_datetime(s)
+    return due_ts_from_datetime(dt) if dt else None
+
+
+def now_due_ts():
+    return due_ts_from_datetime(datetime.now())
+
+
+# -----------------------------
+# Full-text search helpers
+# -----------------------------
+# Marks the matched words inside search snippets
+SNIPPET_OPEN = "["
+SNIPPET_CLOSE = "]"
+
+
+def _fts_query(text):
+    """
+    Turns free text typed in a search box into an FTS5 query: every word is
+    quoted (so punctuation/operators are literal) and matched as a prefix.
+    Returns "" when there is nothing to search for.
+    """
+    terms = []
+    for word in (text or "").split():
+        word = word.replace('"', '""')
+        terms.append(f'"{word}"*')
+    return " ".join(terms)
+
+
 # -----------------------------
 # DB helpers
 # -----------------------------
+_local = threading.local()
+_open_conns = []
+_open_conns_lock = threading.Lock()
+_generation = 0
+
+# Shard files migrated by this process (so a new thread's connection skips the check)
+_shards_ready = set()
+_shards_ready_lock = threading.Lock()
+
+
 def get_db_path():
     return DB_NAME
 
-def connect():
-    return sqlite3.connect(DB_NAME, check_same_thread=False)
+
+def is_sharded():
+    return DB_SHARDS.strip().lower() not in ("", "0")
+
+
+def shard_dir():
+    """DB_SHARD_DIR, or "<db name>_shards" next to the global database."""
+    if DB_SHARD_DIR:
+        return DB_SHARD_DIR
+    base = os.path.abspath(get_db_path())
+    return os.path.join(os.path.dirname(base), os.path.splitext(os.path.basename(base))[0] + "_shards")
+
+
+def shard_name(user_id):
+    mode = DB_SHARDS.strip().lower()
+    if mode == "user":
+        return f"user-{int(user_id)}.db"
+    return f"shard-{int(user_id) % int(mode):04d}.db"
+
+
+def user_db_path(user_id):
+    """File holding user_id's tasks, journals and settings (DB_NAME when not sharded)."""
+    if not is_sharded():
+        return get_db_path()
+    return os.path.join(shard_dir(), shard_name(user_id))
+
+
+def shard_paths():
+    """Shard files that exist so far (none when not sharded)."""
+    if not is_sharded():
+        return []
+    try:
+        names = os.listdir(shard_dir())
+    except FileNotFoundError:
+        return []
+    return [os.path.join(shard_dir(), n) for n in sorted(names) if n.endswith(".db")]
+
+
+def _open_connection(path):
+    # isolation_level=None: no implicit transactions, transaction() issues BEGIN itself.
+    # The factory is a plain sqlite3.Connection unless DB_INSTRUMENT is on.
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None,
+                           factory=instrumentation.connection_factory())
+    for name, value in CONNECTION_PRAGMAS:
+        conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+
+def _connect_path(path):
+    if getattr(_local, "generation", None) != _generation:
+        _local.conns = {}
+        _local.generation = _generation
+
+    conn = _local.conns.get(path)
+    if conn is None:
+        shard = path != get_db_path()
+        if shard:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = _open_connection(path)
+        if shard:
+            # The users rows these keys point at live in the global database
+            conn.execute("PRAGMA foreign_keys=OFF")
+            _ensure_shard_schema(conn, path)
+        _local.conns[path] = conn
+        with _open_conns_lock:
+            _open_conns.append(conn)
+    return conn
+
+
+def connect(user_id=None):
+    """
+    Returns this thread's connection to DB_NAME, opening and tuning it on
+    first use. Connections are reused for the life of the thread, so callers
+    must NOT close them (use close_connections() on shutdown).
+
+    connect(user_id) is the connection to the file holding that user's
+    tasks, journals and settings: their shard when sharded, else DB_NAME.
+    """
+    return _connect_path(get_db_path() if user_id is None else user_db_path(user_id))
+
+
+def close_connections():
+    """Close every pooled connection (all threads). Safe to call at shutdown or between tests."""
+    global _generation
+    with _open_conns_lock:
+        conns = list(_open_conns)
+        _open_conns.clear()
+        _generation += 1
+
+    for conn in conns:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    with _shards_ready_lock:
+        _shards_ready.clear()
+
+    # Cached user rows may belong to a database that is about to be replaced
+    _user_cache.clear()
+
+
+# Closing on exit lets SQLite checkpoint the WAL back into the main file
+atexit.register(close_connections)
+
+
+def transaction(user_id=None):
+    """
+    Write transaction on this thread's connection:
+
+        with transaction() as cur:
+            cur.execute(...)
+
+    Commits on success and rolls back on any exception. Nested use joins
+    the outer transaction, so helpers can be composed into one commit.
+    transaction(user_id) writes to the file holding that user's data; with
+    sharding on it is a separate transaction from the global one.
+    """
+    return _transaction(connect(user_id))
+
+
+@contextmanager
+def _transaction(conn):
+    if conn.in_transaction:
+        yield conn.cursor()
+        return
+
+    # IMMEDIATE takes the write lock up front instead of failing mid-transaction
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn.cursor()
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
 
 # -----------------------------
-# Database setup + migrations
+# Single-writer queue
 # -----------------------------
-def init_db():
-    conn = connect()
-    cursor = conn.cursor()
+@contextmanager
+def _write_tick(path):
+    # One per database file per tick (so per shard when sharded); instrumentation
+    # charges the tick's BEGIN/COMMIT here and each statement to its write function
+    with _transaction(_connect_path(path)) as cursor:
+        yield cursor
+
+
+_write_queue = WriteQueue(_write_tick, batch_size=WRITE_BATCH_SIZE, linger=WRITE_LINGER_MS / 1000)
+
+
+def _in_write_transaction():
+    if getattr(_local, "generation", None) != _generation:
+        return False
+    return any(conn.in_transaction for conn in _local.conns.values())
+
+
+def queued_write(coalesce=None):
+    """
+    Decorator for per-user write functions (user_id first). With DB_SINGLE_WRITER
+    on, a call is run by the writer thread and the caller waits for its commit;
+    fn.submit(...) queues it and returns a Future instead. A caller already in
+    a transaction runs the write itself, joining that transaction.
+
+    coalesce(user_id, *args) names the row a call overwrites: of several queued
+    calls with the same key only the last runs. Keys must include user_id:
+    unsharded, every user shares one target, and a call made with another
+    user's id must not replace the owner's write.
+    """
+    def wrap(fn):
+        def submit(user_id, *args, **kwargs):
+            if _in_write_transaction() or _write_queue.in_worker():
+                future = Future()
+                try:
+                    future.set_result(fn(user_id, *args, **kwargs))
+                except Exception as ex:
+                    future.set_exception(ex)
+                return future
+            key = coalesce(user_id, *args, **kwargs) if coalesce else None
+            return _write_queue.submit(user_db_path(user_id), fn, (user_id, *args), kwargs, key)
+
+        @functools.wraps(fn)
+        def call(user_id, *args, **kwargs):
+            if not DB_SINGLE_WRITER or _in_write_transaction() or _write_queue.in_worker():
+                return fn(user_id, *args, **kwargs)
+            return submit(user_id, *args, **kwargs).result()
+
+        call.submit = submit
+        return call
+    return wrap
+
+
+def flush_writes(timeout=5.0):
+    """Waits for every queued write to commit."""
+    return _write_queue.flush(timeout)
+
+
+def write_queue_stats():
+    """{"writes", "transactions", "coalesced", "failed"} since start (or the last reset)."""
+    return _write_queue.stats()
+
+
+# -----------------------------
+# Shards: parallel fan-out reads
+# -----------------------------
+_fanout_executor = None
+_fanout_lock = threading.Lock()
+
+
+def _get_fanout_executor():
+    global _fanout_executor
+    if _fanout_executor is None:
+        with _fanout_lock:
+            if _fanout_executor is None:
+                _fanout_executor = ThreadPoolExecutor(max_workers=SHARD_FANOUT_WORKERS,
+                                                      thread_name_prefix="taskwise-shard")
+                atexit.register(_fanout_executor.shutdown, wait=False, cancel_futures=True)
+    return _fanout_executor
 
+
+def _fan_out_query(path, sql, params):
+    # Runs on a fan-out worker, which keeps its own pooled connection per shard
+    return _connect_path(path).execute(sql, params).fetchall()
+
+
+def fan_out(sql, params=()):
+    """
+    Runs a read-only query on every shard at once and returns all their rows
+    (DB_NAME only when not sharded). Aggregates must be combined by the caller.
+    """
+    paths = shard_paths() if is_sharded() else [get_db_path()]
+    if len(paths) <= 1:
+        return [row for path in paths for row in _fan_out_query(path, sql, params)]
+    futures = [_get_fanout_executor().submit(_fan_out_query, path, sql, params) for path in paths]
+    return [row for future in futures for row in future.result()]
+
+
+# -----------------------------
+# Database setup + migrations
+# -----------------------------
+def _migration_1_base_schema(cursor):
     # Users table
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS users (
@@ -114,11 +481,9 @@ def init_db():
     if "ai_mood" not in journal_cols:
         cursor.execute("ALTER TABLE journals ADD COLUMN ai_mood TEXT DEFAULT ''")
 
-    conn.commit()
-
-    # Create the default admin account once
+    # Create the default admin account once (in the global database, not in shards)
     cursor.execute("SELECT * FROM users WHERE email = 'admin@taskwise.com'")
-    if not cursor.fetchone():
+    if not cursor.fetchone() and not _is_shard(cursor):
         cursor.execute(
             "INSERT INTO users (name, email, password_hash, role, is_banned) VALUES (?, ?, ?, ?, ?)",
             (
@@ -129,155 +494,747 @@ def init_db():
                 0,
             )
         )
-        conn.commit()
 
-    conn.close()
+
+def _migration_2_hot_query_indexes(cursor):
+    # get_tasks_by_user: WHERE user_id = ? ORDER BY created_at DESC
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_user_created ON tasks(user_id, created_at)")
+    # get_journals_by_user: WHERE user_id = ? ORDER BY updated_at DESC
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_journals_user_updated ON journals(user_id, updated_at)")
+    # get_logs: ORDER BY created_at DESC
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_logs_created ON logs(created_at)")
+    # get_user_by_username: WHERE name = ?
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_name ON users(name)")
+
+
+def _migration_3_task_title_index(cursor):
+    # query_tasks title sorts: ORDER BY lower(trim(title)), id
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_user_title ON tasks(user_id, lower(trim(title)))")
+
+
+# Full-text search: external-content FTS5 tables (no duplicate text storage),
+# kept in sync by triggers. The update triggers only fire on the indexed columns.
+FTS_SCHEMA = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        title, description,
+        content='tasks', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS journals_fts USING fts5(
+        title, content, ai_reflection,
+        content='journals', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS journals_fts_ai AFTER INSERT ON journals BEGIN
+        INSERT INTO journals_fts(rowid, title, content, ai_reflection)
+        VALUES (new.id, new.title, new.content, new.ai_reflection);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS journals_fts_ad AFTER DELETE ON journals BEGIN
+        INSERT INTO journals_fts(journals_fts, rowid, title, content, ai_reflection)
+        VALUES ('delete', old.id, old.title, old.content, old.ai_reflection);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS journals_fts_au AFTER UPDATE OF title, content, ai_reflection ON journals BEGIN
+        INSERT INTO journals_fts(journals_fts, rowid, title, content, ai_reflection)
+        VALUES ('delete', old.id, old.title, old.content, old.ai_reflection);
+        INSERT INTO journals_fts(rowid, title, content, ai_reflection)
+        VALUES (new.id, new.title, new.content, new.ai_reflection);
+    END""",
+)
+
+
+# Daily per-action counts, bumped on every log insert (archiving doesn't touch them)
+LOG_ROLLUP_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS logs_rollup_ai AFTER INSERT ON logs
+    WHEN new.created_at IS NOT NULL
+    BEGIN
+        INSERT INTO log_daily (day, action, count) VALUES (date(new.created_at), new.action, 1)
+        ON CONFLICT(day, action) DO UPDATE SET count = count + 1;
+    END
+"""
+
+
+# Per-user, per-category task counts kept exact by triggers. An UPDATE is applied
+# as "remove the old row, add the new one"; empty buckets are dropped.
+TASK_STATS_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS task_stats_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO task_stats (user_id, category, total, completed)
+        VALUES (new.user_id, ifnull(trim(new.category), ''), 1, new.status = 'completed')
+        ON CONFLICT(user_id, category) DO UPDATE SET
+            total = total + 1, completed = completed + excluded.completed;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS task_stats_ad AFTER DELETE ON tasks BEGIN
+        UPDATE task_stats SET total = total - 1, completed = completed - (old.status = 'completed')
+        WHERE user_id = old.user_id AND category = ifnull(trim(old.category), '');
+        DELETE FROM task_stats
+        WHERE user_id = old.user_id AND category = ifnull(trim(old.category), '') AND total <= 0;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS task_stats_au AFTER UPDATE OF user_id, category, status ON tasks BEGIN
+        UPDATE task_stats SET total = total - 1, completed = completed - (old.status = 'completed')
+        WHERE user_id = old.user_id AND category = ifnull(trim(old.category), '');
+        DELETE FROM task_stats
+        WHERE user_id = old.user_id AND category = ifnull(trim(old.category), '') AND total <= 0;
+        INSERT INTO task_stats (user_id, category, total, completed)
+        VALUES (new.user_id, ifnull(trim(new.category), ''), 1, new.status = 'completed')
+        ON CONFLICT(user_id, category) DO UPDATE SET
+            total = total + 1, completed = completed + excluded.completed;
+    END""",
+)
+
+
+def _migration_4_full_text_search(cursor):
+    for ddl in FTS_SCHEMA:
+        cursor.execute(ddl)
+    # Index rows that existed before the triggers
+    cursor.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+    cursor.execute("INSERT INTO journals_fts(journals_fts) VALUES ('rebuild')")
+
+
+def _migration_5_due_timestamps(cursor):
+    cursor.execute("PRAGMA table_info(tasks)")
+    if "due_ts" not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE tasks ADD COLUMN due_ts INTEGER")
+
+    # One-time backfill; add_task/update_task keep it current from here on
+    rows = cursor.execute("SELECT id, due_date FROM tasks WHERE COALESCE(due_date, '') != ''").fetchall()
+    cursor.executemany(
+        "UPDATE tasks SET due_ts = ? WHERE id = ?",
+        [(parse_due_ts(due_date), task_id) for task_id, due_date in rows],
+    )
+
+    # Serves the Due Date sort, due-soon checks and calendar month ranges
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_tasks_user_due ON tasks(user_id, {DUE_TS_KEY})")
+
+
+def _migration_6_untitled_allocator(cursor):
+    for table in ("tasks", "journals"):
+        cursor.execute(f"PRAGMA table_info({table})")
+        if "untitled_n" not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN untitled_n INTEGER")
+
+        rows = cursor.execute(f"SELECT id, title FROM {table} WHERE title LIKE 'Untitled%'").fetchall()
+        cursor.executemany(
+            f"UPDATE {table} SET untitled_n = ? WHERE id = ?",
+            [(_untitled_number(title), row_id) for row_id, title in rows],
+        )
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_user_untitled ON {table}(user_id, untitled_n)")
+
+    # Free ranges are filled in lazily per user by _untitled_ensure
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS untitled_free (
+            kind TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            lo INTEGER NOT NULL,
+            hi INTEGER,
+            PRIMARY KEY (kind, user_id, lo)
+        ) WITHOUT ROWID
+    """)
+
+
+def _migration_7_log_rollups(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS log_daily (
+            day TEXT NOT NULL,
+            action TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, action)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute(LOG_ROLLUP_TRIGGER)
+    cursor.execute("""
+        INSERT OR REPLACE INTO log_daily (day, action, count)
+        SELECT date(created_at), action, COUNT(*) FROM logs
+        WHERE created_at IS NOT NULL
+        GROUP BY date(created_at), action
+    """)
+
+
+def _migration_8_task_stats(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS task_stats (
+            user_id INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, category)
+        ) WITHOUT ROWID
+    """)
+    for ddl in TASK_STATS_TRIGGERS:
+        cursor.execute(ddl)
+    cursor.execute("""
+        INSERT OR REPLACE INTO task_stats (user_id, category, total, completed)
+        SELECT user_id, ifnull(trim(category), ''), COUNT(*), SUM(status = 'completed')
+        FROM tasks
+        GROUP BY user_id, ifnull(trim(category), '')
+    """)
+    # count_overdue_tasks: one range scan over pending rows only
+    cursor.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_tasks_user_pending_due
+        ON tasks(user_id, {DUE_TS_KEY}) WHERE status = 'pending'
+    """)
+
+
+# Child tables whose user_id gets REFERENCES users(id) ON DELETE CASCADE
+CASCADE_TABLES = ("tasks", "journals", "app_settings")
+
+
+def _rebuild_with_cascade(cursor, table):
+    """SQLite can't alter a foreign key in place: copy into a new table, swap, re-create indexes and triggers."""
+    sql = cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()[0]
+    if "ON DELETE CASCADE" in sql:
+        return
+
+    # Indexes and triggers go away with the old table; keep their DDL
+    extras = [r[0] for r in cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL",
+        (table,)
+    ).fetchall()]
+    seq = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+
+    if "REFERENCES users(id)" in sql:
+        new_sql = sql.replace("REFERENCES users(id)", "REFERENCES users(id) ON DELETE CASCADE")
+    else:
+        new_sql = re.sub(r"\)\s*$", ",\n    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE\n)", sql)
+    new_sql = re.sub(rf'^CREATE TABLE (IF NOT EXISTS )?"?{table}"?', f"CREATE TABLE {table}_new", new_sql)
+
+    # Orphans would violate the new key (their delete triggers keep FTS and task_stats in step).
+    # A shard's users table is always empty: its rows belong to users of the global database.
+    if not _is_shard(cursor):
+        cursor.execute(f"DELETE FROM {table} WHERE user_id NOT IN (SELECT id FROM users)")
+    cursor.execute(new_sql)
+    cursor.execute(f"INSERT INTO {table}_new SELECT * FROM {table}")
+    cursor.execute(f"DROP TABLE {table}")
+    cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+    if seq:
+        # Never hand out an id that was used before the rebuild
+        cursor.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = ?", (seq[0], table))
+    for ddl in extras:
+        cursor.execute(ddl)
+
+
+def _migration_9_cascading_deletes(cursor):
+    cursor.execute("PRAGMA table_info(users)")
+    if "is_deleted" not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE users ADD COLUMN is_deleted INTEGER NOT NULL DEFAULT 0")
+    # resume_pending_purges: the few tombstoned accounts
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_deleted ON users(id) WHERE is_deleted = 1")
+
+    for table in CASCADE_TABLES:
+        _rebuild_with_cascade(cursor, table)
+
+
+# Change feed: every insert/update/delete of a task or journal takes the next
+# number of its user's change_seq and stamps it on the row (row_version);
+# deletes leave a tombstone carrying that number. changes_since() reads both.
+# The UPDATE OF lists name every column but row_version, so stamping a row
+# doesn't fire the update trigger again.
+CHANGE_FEED_COLUMNS = {
+    "tasks": "user_id, title, description, category, due_date, status, created_at, updated_at, due_ts, untitled_n",
+    "journals": "user_id, title, content, mood, ai_reflection, ai_mood, created_at, updated_at, untitled_n",
+}
+
+
+def _change_feed_triggers(table, columns):
+    def bump(ref):
+        return f"""
+        INSERT INTO change_seq (user_id, version) VALUES ({ref}.user_id, 1)
+        ON CONFLICT(user_id) DO UPDATE SET version = version + 1;"""
+
+    def current(ref):
+        return f"(SELECT version FROM change_seq WHERE user_id = {ref}.user_id)"
+
+    stamp = f"UPDATE {table} SET row_version = {current('new')} WHERE id = new.id;"
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS {table}_feed_ai AFTER INSERT ON {table} BEGIN{bump('new')}\n        {stamp}\n    END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_feed_au AFTER UPDATE OF {columns} ON {table} BEGIN"
+        f"{bump('new')}\n        {stamp}\n    END",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_feed_ad AFTER DELETE ON {table} BEGIN{bump('old')}
+        INSERT INTO tombstones (user_id, row_version, kind, row_id)
+        VALUES (old.user_id, {current('old')}, '{table}', old.id);
+    END""",
+    )
+
+
+def _migration_10_change_feed(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS change_seq (
+            user_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            floor INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    # floor: tombstones up to this version were pruned (see prune_tombstones)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tombstones (
+            user_id INTEGER NOT NULL,
+            row_version INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, row_version)
+        ) WITHOUT ROWID
+    """)
+    for table, columns in CHANGE_FEED_COLUMNS.items():
+        cursor.execute(f"PRAGMA table_info({table})")
+        if "row_version" not in [row[1] for row in cursor.fetchall()]:
+            # Existing rows stay NULL: clients always start from a full load
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN row_version INTEGER")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_user_version ON {table}(user_id, row_version)")
+        for ddl in _change_feed_triggers(table, columns):
+            cursor.execute(ddl)
+
+
+# Ordered (version, migration) pairs. Append new steps; never edit a shipped one.
+MIGRATIONS = [
+    (1, _migration_1_base_schema),
+    (2, _migration_2_hot_query_indexes),
+    (3, _migration_3_task_title_index),
+    (4, _migration_4_full_text_search),
+    (5, _migration_5_due_timestamps),
+    (6, _migration_6_untitled_allocator),
+    (7, _migration_7_log_rollups),
+    (8, _migration_8_task_stats),
+    (9, _migration_9_cascading_deletes),
+    (10, _migration_10_change_feed),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version():
+    return connect().execute("PRAGMA user_version").fetchone()[0]
+
+
+def _is_shard(cursor):
+    return cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'shard_meta'"
+    ).fetchone() is not None
+
+
+def _ensure_shard_schema(conn, path):
+    """Creates/upgrades a shard file on its first connection in this process."""
+    with _shards_ready_lock:
+        if path in _shards_ready:
+            return
+    # The marker goes in first: migrations check it to skip global-only steps
+    conn.execute("CREATE TABLE IF NOT EXISTS shard_meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID")
+    conn.execute("INSERT OR IGNORE INTO shard_meta (key, value) VALUES ('layout', ?)", (DB_SHARDS,))
+    _migrate(conn)
+    with _shards_ready_lock:
+        _shards_ready.add(path)
+
+
+def migrate(target_version=None):
+    """
+    Apply pending migrations up to target_version (default: latest).
+    Each step runs in its own transaction together with the user_version bump,
+    so an interrupted upgrade resumes from the last completed step.
+    Existing shard files are brought to the latest schema as well.
+    """
+    _migrate(connect(), target_version)
+    for path in shard_paths():
+        _connect_path(path)
+
+    # Migrations may seed users (the default admin)
+    _user_cache.clear()
+
+
+def _migrate(conn, target_version=None):
+    target = SCHEMA_VERSION if target_version is None else target_version
+
+    for version, step in MIGRATIONS:
+        if version > target:
+            break
+        with _transaction(conn) as cursor:
+            # Re-read under the write lock in case another process migrated first
+            current = cursor.execute("PRAGMA user_version").fetchone()[0]
+            if version <= current:
+                continue
+            step(cursor)
+            cursor.execute(f"PRAGMA user_version = {int(version)}")
+
+
+def init_db():
+    # Fast path: a single PRAGMA read when the schema is already current
+    if get_schema_version() < SCHEMA_VERSION:
+        migrate()
+
+    if is_sharded() and connect().execute("SELECT 1 FROM tasks UNION ALL SELECT 1 FROM journals LIMIT 1").fetchone():
+        print("[db] DB_SHARDS is set but the global database still holds tasks/journals; "
+              "run `python -m database.shard_migrate` to move them into shards", file=sys.stderr)
+
+
+# -----------------------------
+# User cache
+# -----------------------------
+class UserCache:
+    """
+    Bounded LRU + TTL cache of user records, reachable by id and by email.
+
+    Entries are keyed per database path so switching DB_NAME never serves
+    rows from another file. A missing email is cached too (as None) until
+    create_user invalidates it. User records are read-only, so one instance
+    is shared by every caller.
+    """
+
+    def __init__(self, maxsize=256, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (path, "id"|"email", value) -> (expires_at, user or None)
+        self._lock = threading.Lock()
+
+    def get(self, kind, value):
+        """Returns (found, user). found is False on a miss or an expired entry."""
+        key = (get_db_path(), kind, value)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            user = entry[1]
+        return True, user
+
+    def put(self, kind, value, user):
+        path = get_db_path()
+        expires_at = time.monotonic() + self.ttl
+        keys = [(path, kind, value)]
+        if user:
+            keys = [(path, "id", user["id"]), (path, "email", user["email"])]
+        with self._lock:
+            for key in keys:
+                self._entries[key] = (expires_at, user)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id=None, email=None):
+        """Drop every entry for this user id and/or email (including a cached miss)."""
+        with self._lock:
+            stale = [
+                key for key, (_, user) in self._entries.items()
+                if (key[1] == "email" and key[2] == email and email is not None)
+                or (user and user_id is not None and user["id"] == user_id)
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+_user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+
+def user_cache_stats():
+    """Hit/miss counters for get_user_by_email / get_user_by_id."""
+    return _user_cache.stats()
+
+def reset_user_cache_stats():
+    _user_cache.reset_stats()
 
 # -----------------------------
 # User functions
 # -----------------------------
+def _user_from_row(row):
+    return User.from_row(row)
+
 def create_user(name, email, password_hash, role="user"):
     try:
-        conn = connect()
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO users (name, email, password_hash, role, is_banned, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-            (name, email, password_hash, role, 0, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-        )
-        conn.commit()
-        conn.close()
+        with transaction() as cursor:
+            cursor.execute(
+                "INSERT INTO users (name, email, password_hash, role, is_banned, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (name, email, password_hash, role, 0, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
         return True
     except sqlite3.IntegrityError:
         return False
+    finally:
+        _user_cache.invalidate(email=email)
 
-def get_user_by_email(email):
+def create_users_bulk(users):
+    """
+    Inserts many accounts in one transaction. Each item is a tuple in
+    create_user's argument order: (name, email, password_hash, role="user").
+    Returns one bool per item; False where email UNIQUE rejected the row (the
+    address is taken, or repeated earlier in the batch). The rest still commit.
+    """
+    created = []
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        with transaction() as cursor:
+            for name, email, password_hash, *role in users:
+                try:
+                    cursor.execute(
+                        "INSERT INTO users (name, email, password_hash, role, is_banned, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                        (name, email, password_hash, role[0] if role else "user", 0, now)
+                    )
+                    created.append(True)
+                except sqlite3.IntegrityError:
+                    # Only this statement is undone; the transaction stays open
+                    created.append(False)
+    finally:
+        for name, email, *_ in users:
+            _user_cache.invalidate(email=email)
+    return created
+
+def get_taken_emails(emails):
+    """The subset of `emails` already registered, deleted accounts included (email is UNIQUE)."""
+    taken = set()
     conn = connect()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT id, name, email, password_hash, role, COALESCE(is_banned, 0) FROM users WHERE email = ?",
+    for chunk in _chunks(list(emails)):
+        marks = ",".join("?" * len(chunk))
+        taken.update(r[0] for r in conn.execute(f"SELECT email FROM users WHERE email IN ({marks})", chunk))
+    return taken
+
+def get_user_by_email(email):
+    found, user = _user_cache.get("email", email)
+    if found:
+        return user
+
+    row = connect().execute(
+        "SELECT id, name, email, password_hash, role, COALESCE(is_banned, 0) FROM users WHERE email = ? AND is_deleted = 0",
         (email,)
-    )
-    row = cursor.fetchone()
-    conn.close()
-
-    if row:
-        return {
-            "id": row[0],
-            "name": row[1],
-            "email": row[2],
-            "password_hash": row[3],
-            "role": row[4],
-            "is_banned": bool(row[5]),
-        }
-    return None
+    ).fetchone()
+    user = _user_from_row(row)
+    _user_cache.put("email", email, user)
+    return user
 
 def get_user_by_id(user_id):
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT id, name, email, password_hash, role, COALESCE(is_banned, 0) FROM users WHERE id = ?",
+    found, user = _user_cache.get("id", user_id)
+    if found:
+        return user
+
+    row = connect().execute(
+        "SELECT id, name, email, password_hash, role, COALESCE(is_banned, 0) FROM users WHERE id = ? AND is_deleted = 0",
         (user_id,)
-    )
-    row = cursor.fetchone()
-    conn.close()
-
-    if row:
-        return {
-            "id": row[0],
-            "name": row[1],
-            "email": row[2],
-            "password_hash": row[3],
-            "role": row[4],
-            "is_banned": bool(row[5]),
-        }
-    return None
+    ).fetchone()
+    user = _user_from_row(row)
+    # Unknown ids aren't cached: nothing but create_user could make them appear
+    if user:
+        _user_cache.put("id", user_id, user)
+    return user
 
 def get_user(user_id):
     return get_user_by_id(user_id)
 
 def get_user_by_username(username):
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT id, name, email, password_hash, role, COALESCE(is_banned, 0) FROM users WHERE name = ?",
+    row = connect().execute(
+        "SELECT id, name, email, password_hash, role, COALESCE(is_banned, 0) FROM users WHERE name = ? AND is_deleted = 0",
         (username,)
-    )
-    row = cursor.fetchone()
-    conn.close()
-
-    if row:
-        return {
-            "id": row[0],
-            "name": row[1],
-            "email": row[2],
-            "password_hash": row[3],
-            "role": row[4],
-            "is_banned": bool(row[5]),
-        }
-    return None
+    ).fetchone()
+    return _user_from_row(row)
 
 def update_user_password(user_id, new_password_hash):
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE users SET password_hash = ? WHERE id = ?",
-        (new_password_hash, user_id)
-    )
-    conn.commit()
-    conn.close()
+    with transaction() as cursor:
+        cursor.execute(
+            "UPDATE users SET password_hash = ? WHERE id = ?",
+            (new_password_hash, user_id)
+        )
+    _user_cache.invalidate(user_id=user_id)
 
 # -----------------------------
 # Admin: user list + ban/delete
 # -----------------------------
-def get_users():
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("""
+def get_users(conn=None):
+    """Live accounts, newest first. `conn` may be a read-only snapshot (see database.backup)."""
+    rows = (conn or connect()).execute("""
         SELECT id, name, email, role, COALESCE(is_banned, 0)
         FROM users
+        WHERE is_deleted = 0
         ORDER BY created_at DESC
-    """)
-    rows = cursor.fetchall()
-    conn.close()
-
-    users = []
-    for r in rows:
-        users.append({
-            "id": r[0],
-            "name": r[1],
-            "email": r[2],
-            "role": r[3],
-            "is_banned": bool(r[4]),
-        })
-    return users
+    """).fetchall()
+
+    return [User(r[0], r[1], r[2], None, r[3], r[4]) for r in rows]
+
+def get_user_data_counts(conn=None):
+    """
+    {user_id: {"tasks": n, "journals": n}} over every shard, queried in
+    parallel. With a snapshot `conn` the counts come from the backup's files.
+    """
+    sql = """
+        SELECT 'tasks', user_id, COUNT(*) FROM tasks GROUP BY user_id
+        UNION ALL
+        SELECT 'journals', user_id, COUNT(*) FROM journals GROUP BY user_id
+    """
+    if conn is None:
+        rows = fan_out(sql)
+    elif hasattr(conn, "fan_out"):
+        rows = conn.fan_out(sql)  # database.backup.SnapshotConnection: shard copies included
+    else:
+        rows = conn.execute(sql).fetchall()
+    counts = {}
+    for kind, user_id, n in rows:
+        counts.setdefault(user_id, {"tasks": 0, "journals": 0})[kind] += n
+    return counts
 
 def ban_user(user_id):
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE users SET is_banned = 1 WHERE id = ?", (user_id,))
-    conn.commit()
-    conn.close()
+    with transaction() as cursor:
+        cursor.execute("UPDATE users SET is_banned = 1 WHERE id = ?", (user_id,))
+    _user_cache.invalidate(user_id=user_id)
 
 def unban_user(user_id):
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE users SET is_banned = 0 WHERE id = ?", (user_id,))
-    conn.commit()
-    conn.close()
+    with transaction() as cursor:
+        cursor.execute("UPDATE users SET is_banned = 0 WHERE id = ?", (user_id,))
+    _user_cache.invalidate(user_id=user_id)
 
-def delete_user(user_id):
-    conn = connect()
-    cursor = conn.cursor()
+def delete_user(user_id, background=False, on_progress=None):
+    """
+    Tombstones the account (it disappears from every lookup at once), then
+    purges its rows in chunks via purge_user(). With background=True the purge
+    runs on a daemon thread, which is returned; otherwise this blocks until done.
+    """
+    with transaction() as cursor:
+        cursor.execute("UPDATE users SET is_deleted = 1 WHERE id = ?", (user_id,))
+    _user_cache.invalidate(user_id=user_id)
 
-    # Remove all related rows before deleting the user
-    cursor.execute("DELETE FROM tasks WHERE user_id = ?", (user_id,))
-    cursor.execute("DELETE FROM journals WHERE user_id = ?", (user_id,))
-    cursor.execute("DELETE FROM app_settings WHERE user_id = ?", (user_id,))
-    cursor.execute("DELETE FROM logs WHERE user_id = ?", (user_id,))
-    cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
+    if background:
+        return start_user_purge(user_id, on_progress)
+    purge_user(user_id, on_progress=on_progress)
+
+# -----------------------------
+# Account purge (chunked, resumable)
+# -----------------------------
+# Child tables cleared before the users row; logs has no foreign key (audit rows may outlive ids)
+PURGE_TABLES = CASCADE_TABLES + ("logs",)
+
+# user_id -> {"done", "total", "finished", "error"}
+_purges = {}
+_purges_lock = threading.Lock()
+
+def _set_purge_progress(user_id, on_progress=None, **fields):
+    with _purges_lock:
+        progress = _purges.setdefault(user_id, {"done": 0, "total": 0, "finished": False, "error": None})
+        progress.update(fields)
+        snapshot = {k: v for k, v in progress.items() if k != "thread"}
+    if on_progress:
+        try:
+            on_progress(snapshot)
+        except Exception:
+            pass
+    return snapshot
+
+def _purge_target(table, user_id):
+    # logs live in the global database; the other tables wherever the user's data is
+    return None if table == "logs" else user_id
+
+def purge_user(user_id, chunk_size=None, pause=0.0, on_progress=None):
+    """
+    Deletes a tombstoned user's rows a chunk at a time, each chunk in its own
+    short transaction, so other sessions only ever wait for one chunk. Safe to
+    re-run after a crash: it picks up whatever is left. on_progress(dict) gets
+    {"done", "total", "finished", "error"} after every chunk.
+    """
+    chunk_size = chunk_size or PURGE_CHUNK_SIZE
 
-    conn.commit()
-    conn.close()
+    # Queued audit rows for this user should land before the purge, not after it
+    flush_logs()
+
+    total = sum(
+        connect(_purge_target(table, user_id)).execute(
+            f"SELECT COUNT(*) FROM {table} WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
+        for table in PURGE_TABLES
+    )
+    done = 0
+    _set_purge_progress(user_id, on_progress, done=0, total=total, finished=False, error=None)
+
+    try:
+        for table in PURGE_TABLES:
+            while True:
+                with transaction(_purge_target(table, user_id)) as cursor:
+                    cursor.execute(
+                        f"DELETE FROM {table} WHERE id IN (SELECT id FROM {table} WHERE user_id = ? LIMIT ?)",
+                        (user_id, chunk_size)
+                    )
+                    deleted = cursor.rowcount
+                done += deleted
+                _set_purge_progress(user_id, on_progress, done=min(done, total))
+                if deleted < chunk_size:
+                    break
+                if pause:
+                    time.sleep(pause)
+
+        # ON DELETE CASCADE catches any row written since the chunks above ran. A shard
+        # has no users row to cascade from, so there the leftovers are cleared explicitly.
+        with transaction() as cursor:
+            with transaction(user_id) as data:
+                if is_sharded():
+                    for table in CASCADE_TABLES:
+                        data.execute(f"DELETE FROM {table} WHERE user_id = ?", (user_id,))
+                data.execute("DELETE FROM untitled_free WHERE user_id = ?", (user_id,))
+            cursor.execute("DELETE FROM users WHERE id = ? AND is_deleted = 1", (user_id,))
+            # After the users row: its cascade leaves tombstones of its own
+            with transaction(user_id) as data:
+                data.execute("DELETE FROM tombstones WHERE user_id = ?", (user_id,))
+                data.execute("DELETE FROM change_seq WHERE user_id = ?", (user_id,))
+    except Exception as ex:
+        _set_purge_progress(user_id, on_progress, error=str(ex))
+        raise
+
+    _user_cache.invalidate(user_id=user_id)
+    return _set_purge_progress(user_id, on_progress, done=total, finished=True)
+
+def start_user_purge(user_id, on_progress=None):
+    """Runs purge_user on a daemon thread (one per user); returns the thread."""
+    with _purges_lock:
+        running = _purges.get(user_id, {}).get("thread")
+        if running is not None and running.is_alive():
+            return running
+
+    def run():
+        try:
+            purge_user(user_id, pause=0.01, on_progress=on_progress)
+        except Exception as ex:
+            print(f"[purge] user_id={user_id} failed: {ex}", file=sys.stderr)
+
+    thread = threading.Thread(target=run, name=f"taskwise-purge-{user_id}", daemon=True)
+    _set_purge_progress(user_id, thread=thread)
+    thread.start()
+    return thread
+
+def resume_pending_purges():
+    """Restart purges that a previous run tombstoned but didn't finish. Returns the user ids."""
+    ids = [r[0] for r in connect().execute("SELECT id FROM users WHERE is_deleted = 1").fetchall()]
+    for user_id in ids:
+        start_user_purge(user_id)
+    return ids
+
+def get_purge_progress(user_id):
+    """{"done", "total", "finished", "error"} for a purge started in this process, else None."""
+    with _purges_lock:
+        progress = _purges.get(user_id)
+        if progress is None:
+            return None
+        return {k: v for k, v in progress.items() if k != "thread"}
 
 def is_user_banned(email):
     u = get_user_by_email(email)
@@ -286,191 +1243,751 @@ def is_user_banned(email):
 # -----------------------------
 # Logs
 # -----------------------------
+# Audit log rows are written in batches by a background thread (see log_writer.py).
+def _write_log_batch(rows):
+    with transaction() as cursor:
+        emails = {}
+        for uid in {r[0] for r in rows if r[0]}:
+            found, user = _user_cache.get("id", uid)
+            if found:
+                emails[uid] = user["email"]
+
+        # One query for the users the cache doesn't have; their rows then warm it
+        missing = [r[0] for r in rows if r[0] and r[0] not in emails]
+        if missing:
+            missing = list(dict.fromkeys(missing))
+            marks = ",".join("?" * len(missing))
+            for row in cursor.execute(f"""
+                SELECT id, name, email, password_hash, role, COALESCE(is_banned, 0), is_deleted
+                FROM users WHERE id IN ({marks})
+            """, missing):
+                user = _user_from_row(row)
+                # Deleted accounts still get their email on the audit row, but stay out of the cache
+                if not row[6]:
+                    _user_cache.put("id", user["id"], user)
+                emails[user["id"]] = user["email"]
+
+        cursor.executemany("""
+            INSERT INTO logs (user_id, email, action, details, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, [
+            (user_id, emails.get(user_id) if user_id else None, action, details, created_at)
+            for user_id, action, details, created_at in rows
+        ])
+
+_log_writer = LogWriter(_write_log_batch)
+
 def add_log(action, details="", user_id=None):
-    conn = connect()
-    cursor = conn.cursor()
+    # Timestamp taken now (UTC, like CURRENT_TIMESTAMP), not when the batch lands
+    created_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    _log_writer.put((user_id, action, details, created_at))
 
-    email = None
-    if user_id:
-        cursor.execute("SELECT email FROM users WHERE id = ?", (user_id,))
-        u = cursor.fetchone()
-        if u:
-            email = u[0]
+def flush_logs(timeout=5.0):
+    """Blocks until every add_log() call made so far is written. Returns False on timeout."""
+    return _log_writer.flush(timeout)
 
-    cursor.execute("""
-        INSERT INTO logs (user_id, email, action, details)
-        VALUES (?, ?, ?, ?)
-    """, (user_id, email, action, details))
-    conn.commit()
-    conn.close()
+def log_writer_stats():
+    """{"written", "retried", "dropped"}: audit rows written, batch retries, rows lost for good."""
+    return _log_writer.stats()
 
-def get_logs():
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("""
+def get_logs(limit=None, conn=None):
+    """
+    Newest first. limit=None returns every row still in the live table.
+    With a snapshot `conn` the rows are as of that snapshot.
+    """
+    if conn is None:
+        flush_logs()
+    rows = (conn or connect()).execute("""
         SELECT id, user_id, email, action, details, created_at
         FROM logs
         ORDER BY created_at DESC
-    """)
-    rows = cursor.fetchall()
-    conn.close()
-
-    logs = []
-    for r in rows:
-        logs.append({
-            "id": r[0],
-            "user_id": r[1],
-            "email": r[2],
-            "action": r[3],
-            "details": r[4],
-            "created_at": r[5],
-        })
-    return logs
+        LIMIT ?
+    """, (-1 if limit is None else limit,)).fetchall()
+    return [LogEntry.from_row(r) for r in rows]
 
 # -----------------------------
-# Helper: auto-title for tasks
+# Logs: retention, monthly archives and daily rollups
 # -----------------------------
-def _generate_untitled_name(user_id):
-    conn = connect()
-    cursor = conn.cursor()
+LOG_ARCHIVE_PREFIX = "logs_archive_"
+_ARCHIVE_SUFFIX_RE = re.compile(r"^\d{4}_\d{2}$")
+
+_maintenance_lock = threading.Lock()
+_maintenance_started = False
+
+def _log_archive_table(created_at):
+    # "2026-03-14 10:00:00" -> logs_archive_2026_03 (validated: the name is built from data)
+    suffix = (created_at or "")[:7].replace("-", "_")
+    if not _ARCHIVE_SUFFIX_RE.match(suffix):
+        suffix = "undated"
+    return LOG_ARCHIVE_PREFIX + suffix
+
+def _archive_log_batch(where, params, batch_size):
+    """Moves up to batch_size of the oldest matching rows in one short transaction."""
+    with transaction() as cursor:
+        rows = cursor.execute(f"""
+            SELECT id, user_id, email, action, details, created_at
+            FROM logs
+            WHERE {where}
+            ORDER BY created_at, id
+            LIMIT ?
+        """, (*params, batch_size)).fetchall()
+        if not rows:
+            return 0
+
+        by_table = {}
+        for r in rows:
+            by_table.setdefault(_log_archive_table(r[5]), []).append(r)
+
+        for table, table_rows in by_table.items():
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    id INTEGER PRIMARY KEY,
+                    user_id INTEGER,
+                    email TEXT,
+                    action TEXT NOT NULL,
+                    details TEXT,
+                    created_at TIMESTAMP
+                )
+            """)
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {table} (id, user_id, email, action, details, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                table_rows,
+            )
 
-    cursor.execute("""
-        SELECT title FROM tasks
-        WHERE user_id=? AND title LIKE 'Untitled%'
-    """, (user_id,))
+        cursor.executemany("DELETE FROM logs WHERE id = ?", [(r[0],) for r in rows])
+        return len(rows)
 
-    existing_titles = [row[0] for row in cursor.fetchall()]
-    conn.close()
+def run_log_maintenance(max_age_days=None, max_rows=None, batch_size=500, max_batches=None, pause=0.01):
+    """
+    Applies log retention incrementally: moves expired rows (older than
+    max_age_days) and then the oldest overflow rows (beyond max_rows) into
+    logs_archive_YYYY_MM tables. Each batch is its own short transaction with
+    a pause in between, so app writes never wait long. Daily rollups are not
+    touched: they keep counting archived events.
+    Returns {"archived": rows moved, "batches": transactions used}.
+    """
+    max_age_days = LOG_RETENTION_DAYS if max_age_days is None else max_age_days
+    max_rows = LOG_MAX_ROWS if max_rows is None else max_rows
+    flush_logs()
+
+    stats = {"archived": 0, "batches": 0}
+
+    def drain(where, params, limit=None):
+        moved = 0
+        while max_batches is None or stats["batches"] < max_batches:
+            size = batch_size if limit is None else min(batch_size, limit - moved)
+            if size <= 0:
+                break
+            n = _archive_log_batch(where, params, size)
+            if not n:
+                break
+            moved += n
+            stats["archived"] += n
+            stats["batches"] += 1
+            if pause:
+                time.sleep(pause)
+
+    if max_age_days is not None and max_age_days >= 0:
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).strftime("%Y-%m-%d %H:%M:%S")
+        drain("created_at < ?", (cutoff,))
+
+    if max_rows is not None and max_rows >= 0:
+        excess = connect().execute("SELECT COUNT(*) FROM logs").fetchone()[0] - max_rows
+        if excess > 0:
+            drain("1", (), limit=excess)
+
+    return stats
+
+def start_log_maintenance():
+    """Runs run_log_maintenance() once per process on a daemon thread."""
+    global _maintenance_started
+    with _maintenance_lock:
+        if _maintenance_started:
+            return
+        _maintenance_started = True
+
+    def work():
+        try:
+            run_log_maintenance()
+            prune_tombstones()
+        except Exception as ex:
+            # Nothing else watches this thread; say why it stopped
+            print(f"[log maintenance] stopped: {ex}", file=sys.stderr)
+
+    threading.Thread(target=work, name="taskwise-log-maintenance", daemon=True).start()
+
+def list_log_archives():
+    """Archive table names, newest month first."""
+    rows = connect().execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ? ORDER BY name DESC",
+        (LOG_ARCHIVE_PREFIX + "%",),
+    ).fetchall()
+    return [r[0] for r in rows]
+
+def get_log_rollups(days=30, conn=None):
+    """Per-day, per-action event counts for the last `days` days (archived rows included)."""
+    if conn is None:
+        flush_logs()
+    since = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d")
+    rows = (conn or connect()).execute("""
+        SELECT day, action, count
+        FROM log_daily
+        WHERE day >= ?
+        ORDER BY day DESC, action
+    """, (since,)).fetchall()
+    return [{"day": r[0], "action": r[1], "count": r[2]} for r in rows]
 
-    used_numbers = set()
+# -----------------------------
+# Helper: auto-title ("Untitled (n)") allocator
+# -----------------------------
+# Tasks and journals store the n of an "Untitled (n)" title in untitled_n
+# ("Untitled" is 0, any other title NULL). untitled_free holds each user's free
+# numbers per table as disjoint [lo, hi] ranges (hi NULL = unbounded), so the
+# lowest free number is one primary-key lookup instead of a scan of all titles.
+# The helpers take the caller's cursor: they must run in the same write
+# transaction as the insert/update/delete they account for.
+def _untitled_number(title):
+    title = (title or "").strip()
+    if title == "Untitled":
+        return 0
+    if title.startswith("Untitled (") and title.endswith(")"):
+        try:
+            n = int(title[len("Untitled ("):-1])
+        except ValueError:
+            return None
+        return n if n >= 0 else None
+    return None
 
-    for t in existing_titles:
-        t = (t or "").strip()
-        if t == "Untitled":
-            used_numbers.add(0)
-        elif t.startswith("Untitled (") and t.endswith(")"):
-            try:
-                num = int(t[len("Untitled ("):-1])
-                used_numbers.add(num)
-            except Exception:
-                pass
+def _untitled_title(n):
+    return "Untitled" if n == 0 else f"Untitled ({n})"
+
+def _untitled_ranges_exist(cursor, kind, user_id):
+    return cursor.execute(
+        "SELECT 1 FROM untitled_free WHERE kind=? AND user_id=? LIMIT 1", (kind, user_id)
+    ).fetchone() is not None
+
+def _untitled_ensure(cursor, kind, user_id):
+    # Built once per user from untitled_n; from then on the last range is always unbounded
+    if _untitled_ranges_exist(cursor, kind, user_id):
+        return
+
+    used = cursor.execute(
+        f"SELECT DISTINCT untitled_n FROM {kind} WHERE user_id=? AND untitled_n IS NOT NULL ORDER BY untitled_n",
+        (user_id,),
+    ).fetchall()
+
+    ranges = []
+    lo = 0
+    for (n,) in used:
+        if n > lo:
+            ranges.append((kind, user_id, lo, n - 1))
+        lo = n + 1
+    ranges.append((kind, user_id, lo, None))
+
+    cursor.executemany("INSERT INTO untitled_free (kind, user_id, lo, hi) VALUES (?, ?, ?, ?)", ranges)
+
+def _untitled_range_at(cursor, kind, user_id, n):
+    # The range starting at or before n (it contains n only if hi is NULL or >= n)
+    return cursor.execute(
+        "SELECT lo, hi FROM untitled_free WHERE kind=? AND user_id=? AND lo <= ? ORDER BY lo DESC LIMIT 1",
+        (kind, user_id, n),
+    ).fetchone()
+
+def _untitled_take(cursor, kind, user_id, n):
+    if n is None:
+        return
+    _untitled_ensure(cursor, kind, user_id)
+
+    row = _untitled_range_at(cursor, kind, user_id, n)
+    if not row or (row[1] is not None and row[1] < n):
+        return  # already in use
+
+    lo, hi = row
+    cursor.execute("DELETE FROM untitled_free WHERE kind=? AND user_id=? AND lo=?", (kind, user_id, lo))
+    parts = []
+    if lo < n:
+        parts.append((kind, user_id, lo, n - 1))
+    if hi is None or hi > n:
+        parts.append((kind, user_id, n + 1, hi))
+    cursor.executemany("INSERT INTO untitled_free (kind, user_id, lo, hi) VALUES (?, ?, ?, ?)", parts)
+
+def _untitled_release(cursor, kind, user_id, n, exclude_id=None):
+    # Frees n once no other row of this user still carries it
+    if n is None or not _untitled_ranges_exist(cursor, kind, user_id):
+        return  # not built yet: _untitled_ensure will read the table when needed
+
+    still_used = cursor.execute(
+        f"SELECT 1 FROM {kind} WHERE user_id=? AND untitled_n=? AND id IS NOT ? LIMIT 1",
+        (user_id, n, exclude_id),
+    ).fetchone()
+    if still_used:
+        return
+
+    left = _untitled_range_at(cursor, kind, user_id, n)
+    if left and (left[1] is None or left[1] >= n):
+        return  # already free
+
+    lo, hi = n, n
+    if left and left[1] == n - 1:
+        cursor.execute("DELETE FROM untitled_free WHERE kind=? AND user_id=? AND lo=?", (kind, user_id, left[0]))
+        lo = left[0]
+
+    right = cursor.execute(
+        "SELECT hi FROM untitled_free WHERE kind=? AND user_id=? AND lo=?", (kind, user_id, n + 1)
+    ).fetchone()
+    if right:
+        cursor.execute("DELETE FROM untitled_free WHERE kind=? AND user_id=? AND lo=?", (kind, user_id, n + 1))
+        hi = right[0]
+
+    cursor.execute("INSERT INTO untitled_free (kind, user_id, lo, hi) VALUES (?, ?, ?, ?)", (kind, user_id, lo, hi))
+
+def _untitled_current(cursor, kind, user_id, row_id):
+    row = cursor.execute(f"SELECT untitled_n FROM {kind} WHERE id=? AND user_id=?", (row_id, user_id)).fetchone()
+    return row[0] if row else None
+
+def _untitled_assign(cursor, kind, user_id, title, row_id=None):
+    """
+    Returns (title, untitled_n) to store for a row being inserted (row_id None)
+    or renamed. A blank title gets the lowest free "Untitled (n)"; a renamed
+    row's old number is released first, so clearing a title can reuse it.
+    """
+    if row_id is not None:
+        current = _untitled_current(cursor, kind, user_id, row_id)
+        if title and _untitled_number(title) == current:
+            return title, current  # number unchanged
+        _untitled_release(cursor, kind, user_id, current, exclude_id=row_id)
 
-    i = 0
-    while i in used_numbers:
-        i += 1
+    if not title:
+        _untitled_ensure(cursor, kind, user_id)
+        lowest = cursor.execute(
+            "SELECT MIN(lo) FROM untitled_free WHERE kind=? AND user_id=?", (kind, user_id)
+        ).fetchone()[0]
+        title = _untitled_title(lowest)
 
-    return "Untitled" if i == 0 else f"Untitled ({i})"
+    n = _untitled_number(title)
+    _untitled_take(cursor, kind, user_id, n)
+    return title, n
 
 # -----------------------------
 # Tasks (per user)
 # -----------------------------
+@queued_write()
 def add_task(user_id, title, description="", category="", due_date=""):
     title = (title or "").strip()
     description = (description or "").strip()
     category = (category or "").strip()
 
-    if not title:
-        title = _generate_untitled_name(user_id)
-
     if not category:
         category = "Others"
 
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO tasks (user_id, title, description, category, due_date) VALUES (?, ?, ?, ?, ?)",
-        (user_id, title, description, category, due_date),
-    )
-    conn.commit()
-    conn.close()
+    with transaction(user_id) as cursor:
+        # Inside the write transaction so two blank inserts can't pick the same number
+        title, untitled_n = _untitled_assign(cursor, "tasks", user_id, title)
+
+        cursor.execute(
+            "INSERT INTO tasks (user_id, title, description, category, due_date, due_ts, untitled_n) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (user_id, title, description, category, due_date, parse_due_ts(due_date), untitled_n),
+        )
+
+# Columns every task reader selects, in models.Task field order
+TASK_COLUMNS = "id, title, description, category, due_date, status, created_at, updated_at, due_ts"
 
 def get_tasks_by_user(user_id):
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, title, description, category, due_date, status, created_at, updated_at
+    rows = connect(user_id).execute(f"""
+        SELECT {TASK_COLUMNS}
         FROM tasks
         WHERE user_id = ?
         ORDER BY created_at DESC
-    """, (user_id,))
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    """, (user_id,)).fetchall()
+    return [Task.from_row(r) for r in rows]
+
+# Sort label (as shown on the task page) -> (SQL sort key, direction).
+# Ties are broken by id in the same direction so keyset cursors are stable.
+TASK_SORTS = {
+    "Title (A-Z)": ("lower(trim(title))", "ASC"),
+    "Title (Z-A)": ("lower(trim(title))", "DESC"),
+    "Due Date": (DUE_TS_KEY, "ASC"),
+    "Date Created": ("created_at", "DESC"),
+}
+DEFAULT_TASK_SORT = "Date Created"
+
+# The same keys computed in Python, for merging change-feed rows into a loaded
+# page. SQLite's lower() and trim() only touch ASCII letters and spaces.
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+_TASK_SORT_VALUES = {
+    "lower(trim(title))": lambda t: (t.title or "").strip(" ").translate(_ASCII_LOWER),
+    DUE_TS_KEY: lambda t: NO_DUE_TS if t.due_ts is None else t.due_ts,
+    "created_at": lambda t: t.created_at or "",
+}
+
+def task_sort_key(task, sort=DEFAULT_TASK_SORT):
+    """(sort key, id) of a Task as query_tasks orders it; comparable with its cursors."""
+    key, _direction = TASK_SORTS.get(sort, TASK_SORTS[DEFAULT_TASK_SORT])
+    return _TASK_SORT_VALUES[key](task), task.id
+
+
+def query_tasks(user_id, category=None, text=None, sort=DEFAULT_TASK_SORT, after=None, limit=50):
+    """
+    Returns (tasks, next_cursor): one page of a user's tasks as models.Task,
+    filtered and ordered in SQL. Pass next_cursor
+    back as `after` to fetch the following page; it is None on the last page.
+    Unknown sort labels (e.g. "Custom") fall back to newest first.
+    """
+    key, direction = TASK_SORTS.get(sort, TASK_SORTS[DEFAULT_TASK_SORT])
+
+    where = ["user_id = ?"]
+    params = [user_id]
+
+    category = (category or "").strip().lower()
+    if category:
+        where.append("lower(trim(category)) = ?")
+        params.append(category)
+
+    match = _fts_query(text)
+    if match:
+        where.append("id IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?)")
+        params.append(match)
+
+    if after is not None:
+        op = ">" if direction == "ASC" else "<"
+        where.append(f"({key}, id) {op} (?, ?)")
+        params.extend(after)
+
+    # One extra row tells us whether another page exists
+    params.append(limit + 1)
+    rows = connect(user_id).execute(f"""
+        SELECT {TASK_COLUMNS}, {key} AS sort_key
+        FROM tasks
+        WHERE {" AND ".join(where)}
+        ORDER BY sort_key {direction}, id {direction}
+        LIMIT ?
+    """, params).fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = (rows[-1][9], rows[-1][0])
+
+    return [Task.from_row(r[:9]) for r in rows], next_cursor
 
+def search_tasks(user_id, text, category=None, after=None, limit=50):
+    """
+    Full-text search over a user's task titles and descriptions, best match first.
+    Every word is a prefix ("rep" finds "report"). Returns (tasks, next_cursor) like
+    query_tasks; each Task carries a match snippet.
+    """
+    match = _fts_query(text)
+    if not match:
+        return [], None
+
+    where = ["tasks_fts MATCH ?", "t.user_id = ?"]
+    params = [match, user_id]
+
+    category = (category or "").strip().lower()
+    if category:
+        where.append("lower(trim(t.category)) = ?")
+        params.append(category)
+
+    outer = ""
+    if after is not None:
+        outer = "WHERE (score, id) > (?, ?)"
+        params.extend(after)
+
+    params.append(limit + 1)
+    rows = connect(user_id).execute(f"""
+        SELECT * FROM (
+            SELECT t.id, t.title, t.description, t.category, t.due_date, t.status,
+                   t.created_at, t.updated_at, t.due_ts,
+                   snippet(tasks_fts, -1, ?, ?, '…', 12) AS snip,
+                   bm25(tasks_fts, 10.0, 1.0) AS score
+            FROM tasks_fts
+            JOIN tasks t ON t.id = tasks_fts.rowid
+            WHERE {" AND ".join(where)}
+        )
+        {outer}
+        ORDER BY score, id
+        LIMIT ?
+    """, [SNIPPET_OPEN, SNIPPET_CLOSE] + params).fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = (rows[-1][10], rows[-1][0])
+
+    return [Task.from_row(r[:10]) for r in rows], next_cursor
+
+def get_due_soon_tasks(user_id, horizon_ts):
+    """Pending tasks due at or before horizon_ts (overdue ones included), soonest first."""
+    rows = connect(user_id).execute(f"""
+        SELECT {TASK_COLUMNS}
+        FROM tasks
+        WHERE user_id = ? AND {DUE_TS_KEY} <= ? AND lower(trim(status)) = 'pending'
+        ORDER BY {DUE_TS_KEY}, id
+    """, (user_id, horizon_ts)).fetchall()
+    return [Task.from_row(r) for r in rows]
+
+def get_tasks_due_between(user_id, start_ts, end_ts):
+    """Tasks due in [start_ts, end_ts), earliest first (calendar day/month views)."""
+    rows = connect(user_id).execute(f"""
+        SELECT {TASK_COLUMNS}
+        FROM tasks
+        WHERE user_id = ? AND {DUE_TS_KEY} >= ? AND {DUE_TS_KEY} < ?
+        ORDER BY {DUE_TS_KEY}, id
+    """, (user_id, start_ts, end_ts)).fetchall()
+    return [Task.from_row(r) for r in rows]
+
+def count_overdue_tasks(user_id, now_ts):
+    # One range scan of the partial index idx_tasks_user_pending_due
+    return connect(user_id).execute(f"""
+        SELECT COUNT(*)
+        FROM tasks
+        WHERE user_id = ? AND {DUE_TS_KEY} < ? AND status = 'pending'
+    """, (user_id, now_ts)).fetchone()[0]
+
+def get_task_stats(user_id):
+    """
+    Task counts from the trigger-maintained task_stats table: one row per
+    category the user has, so the cost doesn't grow with the number of tasks.
+    Returns {"total", "completed", "pending", "categories": {category: count}}
+    with categories as stored (trimmed, '' for none).
+    """
+    rows = connect(user_id).execute(
+        "SELECT category, total, completed FROM task_stats WHERE user_id = ?",
+        (user_id,)
+    ).fetchall()
+
+    total = sum(r[1] for r in rows)
+    completed = sum(r[2] for r in rows)
+    return {
+        "total": total,
+        "completed": completed,
+        "pending": total - completed,
+        "categories": {r[0]: r[1] for r in rows},
+    }
+
+@queued_write(coalesce=lambda user_id, task_id, *_, **__: ("task", user_id, task_id))
 def update_task(user_id, task_id, title, description, category, due_date, status):
     title = (title or "").strip()
     category = (category or "").strip()
 
-    if not title:
-        title = _generate_untitled_name(user_id)
-
     if not category:
         category = "Others"
 
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE tasks
-        SET title=?, description=?, category=?, due_date=?, status=?,
-            updated_at=CURRENT_TIMESTAMP
-        WHERE id=? AND user_id=?
-    """, (title, description, category, due_date, status, task_id, user_id))
-    conn.commit()
-    conn.close()
+    with transaction(user_id) as cursor:
+        title, untitled_n = _untitled_assign(cursor, "tasks", user_id, title, row_id=task_id)
+
+        cursor.execute("""
+            UPDATE tasks
+            SET title=?, untitled_n=?, description=?, category=?, due_date=?, due_ts=?, status=?,
+                updated_at=CURRENT_TIMESTAMP
+            WHERE id=? AND user_id=?
+        """, (title, untitled_n, description, category, due_date, parse_due_ts(due_date), status, task_id, user_id))
 
+@queued_write(coalesce=lambda user_id, task_id, *_, **__: ("task_status", user_id, task_id))
 def update_task_status(user_id, task_id, status):
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE tasks
-        SET status=?, updated_at=CURRENT_TIMESTAMP
-        WHERE id=? AND user_id=?
-    """, (status, task_id, user_id))
-    conn.commit()
-    conn.close()
+    with transaction(user_id) as cursor:
+        cursor.execute("""
+            UPDATE tasks
+            SET status=?, updated_at=CURRENT_TIMESTAMP
+            WHERE id=? AND user_id=?
+        """, (status, task_id, user_id))
 
+@queued_write()
 def delete_task(user_id, task_id):
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM tasks WHERE id=? AND user_id=?", (task_id, user_id))
-    conn.commit()
-    conn.close()
+    with transaction(user_id) as cursor:
+        untitled_n = _untitled_current(cursor, "tasks", user_id, task_id)
+        cursor.execute("DELETE FROM tasks WHERE id=? AND user_id=?", (task_id, user_id))
+        _untitled_release(cursor, "tasks", user_id, untitled_n)
+
+# -----------------------------
+# Tasks: bulk operations (one transaction, one commit)
+# -----------------------------
+# Stays under SQLITE_MAX_VARIABLE_NUMBER on older SQLite builds (999)
+_IN_CHUNK = 500
+
+def _chunks(items, size=_IN_CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+@queued_write()
+def add_tasks_bulk(user_id, tasks):
+    """
+    Inserts many tasks in one transaction. Each item is a tuple in add_task's
+    argument order: (title, description="", category="", due_date="").
+    Blank titles get "Untitled (n)" numbers as in add_task. Returns the row count.
+    """
+    rows = []
+    with transaction(user_id) as cursor:
+        for item in tasks:
+            title, description, category, due_date = (tuple(item) + ("", "", "", ""))[:4]
+            title = (title or "").strip()
+            description = (description or "").strip()
+            category = (category or "").strip() or "Others"
+            due_date = due_date or ""
+
+            title, untitled_n = _untitled_assign(cursor, "tasks", user_id, title)
+            rows.append((user_id, title, description, category, due_date, parse_due_ts(due_date), untitled_n))
+
+        cursor.executemany(
+            "INSERT INTO tasks (user_id, title, description, category, due_date, due_ts, untitled_n) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+    return len(rows)
+
+@queued_write()
+def restore_tasks(user_id, tasks):
+    """
+    Inserts exported tasks (mappings with title, description, category,
+    due_date, status, created_at, updated_at) in one transaction, keeping
+    their status and timestamps. Missing timestamps become "now". Returns the row count.
+    """
+    rows = []
+    with transaction(user_id) as cursor:
+        for t in tasks:
+            title, untitled_n = _untitled_assign(cursor, "tasks", user_id, (t.get("title") or "").strip())
+            due_date = t.get("due_date") or ""
+            rows.append((
+                user_id, title, (t.get("description") or "").strip(), (t.get("category") or "").strip() or "Others",
+                due_date, parse_due_ts(due_date), untitled_n, str(TaskStatus.parse(t.get("status") or "pending")),
+                t.get("created_at") or None, t.get("updated_at") or None,
+            ))
+
+        cursor.executemany(
+            "INSERT INTO tasks (user_id, title, description, category, due_date, due_ts, untitled_n, status, "
+            "created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), COALESCE(?, CURRENT_TIMESTAMP))",
+            rows,
+        )
+    return len(rows)
+
+@queued_write()
+def set_status_bulk(user_id, ids, status):
+    """Sets status on the given task ids owned by user_id. Returns rows changed."""
+    ids = list(dict.fromkeys(ids))
+    with transaction(user_id) as cursor:
+        cursor.executemany("""
+            UPDATE tasks
+            SET status=?, updated_at=CURRENT_TIMESTAMP
+            WHERE id=? AND user_id=?
+        """, [(status, task_id, user_id) for task_id in ids])
+        return cursor.rowcount
+
+@queued_write()
+def delete_tasks_bulk(user_id, ids):
+    """Deletes the given task ids owned by user_id. Returns rows deleted."""
+    ids = list(dict.fromkeys(ids))
+    with transaction(user_id) as cursor:
+        # Collect auto-title numbers first so they can be freed after the delete
+        numbers = set()
+        for chunk in _chunks(ids):
+            marks = ",".join("?" * len(chunk))
+            numbers.update(
+                r[0] for r in cursor.execute(
+                    f"SELECT untitled_n FROM tasks WHERE user_id=? AND id IN ({marks}) AND untitled_n IS NOT NULL",
+                    [user_id, *chunk],
+                )
+            )
+
+        cursor.executemany(
+            "DELETE FROM tasks WHERE id=? AND user_id=?",
+            [(task_id, user_id) for task_id in ids],
+        )
+        deleted = cursor.rowcount
+
+        for n in sorted(numbers):
+            _untitled_release(cursor, "tasks", user_id, n)
+    return deleted
 
 # -----------------------------
 # Journals (per user)
 # -----------------------------
+@queued_write()
 def add_journal(user_id, title="", content="", mood=""):
     title = (title or "").strip()
     content = (content or "").strip()
     mood = (mood or "").strip()
 
-    if not title:
-        title = _generate_untitled_journal_name(user_id)
+    with transaction(user_id) as cursor:
+        title, untitled_n = _untitled_assign(cursor, "journals", user_id, title)
 
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO journals (user_id, title, content, mood) VALUES (?, ?, ?, ?)",
-        (user_id, title, content, mood),
-    )
-    conn.commit()
-    conn.close()
+        cursor.execute(
+            "INSERT INTO journals (user_id, title, content, mood, untitled_n) VALUES (?, ?, ?, ?, ?)",
+            (user_id, title, content, mood, untitled_n),
+        )
+        return cursor.lastrowid
 
-def get_journals_by_user(user_id):
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, title, content, mood, created_at, updated_at,
+@queued_write()
+def restore_journals(user_id, journals):
+    """
+    Inserts exported journal entries (mappings with title, content, mood,
+    ai_reflection, ai_mood, created_at, updated_at) in one transaction,
+    keeping their timestamps. Returns the row count.
+    """
+    rows = []
+    with transaction(user_id) as cursor:
+        for j in journals:
+            title, untitled_n = _untitled_assign(cursor, "journals", user_id, (j.get("title") or "").strip())
+            rows.append((
+                user_id, title, (j.get("content") or "").strip(), (j.get("mood") or "").strip(),
+                j.get("ai_reflection") or "", j.get("ai_mood") or "", untitled_n,
+                j.get("created_at") or None, j.get("updated_at") or None,
+            ))
+
+        cursor.executemany(
+            "INSERT INTO journals (user_id, title, content, mood, ai_reflection, ai_mood, untitled_n, "
+            "created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), COALESCE(?, CURRENT_TIMESTAMP))",
+            rows,
+        )
+    return len(rows)
+
+# Columns every journal reader selects, in models.Journal field order
+JOURNAL_COLUMNS = """id, title, content, mood, created_at, updated_at,
                COALESCE(ai_reflection, '') as ai_reflection,
-               COALESCE(ai_mood, '') as ai_mood
+               COALESCE(ai_mood, '') as ai_mood"""
+
+def get_journals_by_user(user_id):
+    rows = connect(user_id).execute(f"""
+        SELECT {JOURNAL_COLUMNS}
         FROM journals
         WHERE user_id = ?
         ORDER BY updated_at DESC
-    """, (user_id,))
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    """, (user_id,)).fetchall()
+    return [Journal.from_row(r) for r in rows]
+
+def get_journal(user_id, journal_id):
+    row = connect(user_id).execute(f"""
+        SELECT {JOURNAL_COLUMNS}
+        FROM journals
+        WHERE id = ? AND user_id = ?
+    """, (journal_id, user_id)).fetchone()
+    return Journal.from_row(row) if row else None
 
+def search_journals(user_id, text, limit=50):
+    """
+    Full-text search over a user's journal titles, content and AI reflections,
+    best match first. Each Journal carries a match snippet.
+    """
+    match = _fts_query(text)
+    if not match:
+        return []
+
+    rows = connect(user_id).execute("""
+        SELECT j.id, j.title, j.content, j.mood, j.created_at, j.updated_at,
+               COALESCE(j.ai_reflection, '') as ai_reflection,
+               COALESCE(j.ai_mood, '') as ai_mood,
+               snippet(journals_fts, -1, ?, ?, '…', 12) AS snip
+        FROM journals_fts
+        JOIN journals j ON j.id = journals_fts.rowid
+        WHERE journals_fts MATCH ? AND j.user_id = ?
+        ORDER BY bm25(journals_fts, 10.0, 1.0, 1.0), j.id
+        LIMIT ?
+    """, (SNIPPET_OPEN, SNIPPET_CLOSE, match, user_id, limit)).fetchall()
+    return [Journal.from_row(r) for r in rows]
+
+@queued_write(coalesce=lambda user_id, journal_id, *_, **__: ("journal", user_id, journal_id))
 def update_journal(user_id, journal_id, title, content, mood="", ai_reflection="", ai_mood=""):
     title = (title or "").strip()
     content = (content or "").strip()
@@ -478,100 +1995,107 @@ def update_journal(user_id, journal_id, title, content, mood="", ai_reflection="
     ai_reflection = (ai_reflection or "").strip()
     ai_mood = (ai_mood or "").strip()
 
-    if not title:
-        title = _generate_untitled_journal_name(user_id, exclude_id=journal_id)
+    with transaction(user_id) as cursor:
+        title, untitled_n = _untitled_assign(cursor, "journals", user_id, title, row_id=journal_id)
 
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE journals
-        SET title=?, content=?, mood=?, ai_reflection=?, ai_mood=?,
-            updated_at=CURRENT_TIMESTAMP
-        WHERE id=? AND user_id=?
-    """, (title, content, mood, ai_reflection, ai_mood, journal_id, user_id))
-    conn.commit()
-    conn.close()
+        cursor.execute("""
+            UPDATE journals
+            SET title=?, untitled_n=?, content=?, mood=?, ai_reflection=?, ai_mood=?,
+                updated_at=CURRENT_TIMESTAMP
+            WHERE id=? AND user_id=?
+        """, (title, untitled_n, content, mood, ai_reflection, ai_mood, journal_id, user_id))
 
+@queued_write()
 def delete_journal(user_id, journal_id):
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM journals WHERE id=? AND user_id=?", (journal_id, user_id))
-    conn.commit()
-    conn.close()
+    with transaction(user_id) as cursor:
+        untitled_n = _untitled_current(cursor, "journals", user_id, journal_id)
+        cursor.execute("DELETE FROM journals WHERE id=? AND user_id=?", (journal_id, user_id))
+        _untitled_release(cursor, "journals", user_id, untitled_n)
 
-def _generate_untitled_journal_name(user_id, exclude_id=None):
+# -----------------------------
+# Change feed (incremental refresh)
+# -----------------------------
+# A page remembers the version it last loaded and later asks only for what
+# changed since; see CHANGE_FEED_COLUMNS for how rows are stamped.
+#
+#     version = db.get_change_version(user_id)   # before the full load
+#     ...
+#     delta = db.changes_since(user_id, version)
+#     if delta["reset"]: reload everything
+#     version = delta["version"]
+def get_change_version(user_id):
+    """The user's latest change number (0 before their first write)."""
+    row = connect(user_id).execute("SELECT version FROM change_seq WHERE user_id = ?", (user_id,)).fetchone()
+    return row[0] if row else 0
+
+def changes_since(user_id, version, kinds=("tasks", "journals")):
     """
-    Returns the next available journal title following the same
-    gap-reuse pattern as tasks:
-      Untitled → Untitled (1) → Untitled (2) → ...
-    exclude_id: skip this journal row (used when editing so it
-    doesn't count the entry being renamed against itself).
+    Rows of `kinds` written after `version` and the ids deleted since:
+    {"version", "reset", "tasks", "journals", "deleted_tasks", "deleted_journals"}.
+    reset is True when tombstones the caller needed were pruned; it must then
+    reload in full. Pass the returned version to the next call.
     """
-    conn = connect()
-    cursor = conn.cursor()
-
-    if exclude_id is not None:
-        cursor.execute("""
-            SELECT title FROM journals
-            WHERE user_id=? AND title LIKE 'Untitled%' AND id != ?
-        """, (user_id, exclude_id))
-    else:
-        cursor.execute("""
-            SELECT title FROM journals
-            WHERE user_id=? AND title LIKE 'Untitled%'
-        """, (user_id,))
-
-    existing_titles = [row[0] for row in cursor.fetchall()]
-    conn.close()
-
-    used_numbers = set()
-    for t in existing_titles:
-        t = (t or "").strip()
-        if t == "Untitled":
-            used_numbers.add(0)
-        elif t.startswith("Untitled (") and t.endswith(")"):
-            try:
-                num = int(t[len("Untitled ("):-1])
-                used_numbers.add(num)
-            except Exception:
-                pass
-
-    i = 0
-    while i in used_numbers:
-        i += 1
-
-    return "Untitled" if i == 0 else f"Untitled ({i})"
+    conn = connect(user_id)
+    row = conn.execute("SELECT version, floor FROM change_seq WHERE user_id = ?", (user_id,)).fetchone()
+    current, floor = row if row else (0, 0)
+    delta = {"version": current, "reset": version < floor,
+             "tasks": [], "journals": [], "deleted_tasks": [], "deleted_journals": []}
+    if delta["reset"] or current <= version:
+        return delta
+
+    # Bounded by `current`: anything written after the read above is picked up next time
+    span = (user_id, version, current)
+    readers = {"tasks": (TASK_COLUMNS, Task), "journals": (JOURNAL_COLUMNS, Journal)}
+    for kind in kinds:
+        columns, model = readers[kind]
+        rows = conn.execute(f"""
+            SELECT {columns}
+            FROM {kind}
+            WHERE user_id = ? AND row_version > ? AND row_version <= ?
+            ORDER BY row_version
+        """, span).fetchall()
+        delta[kind] = [model.from_row(r) for r in rows]
+        delta["deleted_" + kind] = [r[0] for r in conn.execute("""
+            SELECT row_id FROM tombstones
+            WHERE user_id = ? AND row_version > ? AND row_version <= ? AND kind = ?
+        """, (*span, kind)).fetchall()]
+    return delta
+
+def prune_tombstones(max_age_days=None):
+    """
+    Drops tombstones older than max_age_days (TOMBSTONE_RETENTION_DAYS) and
+    raises each affected user's floor, so changes_since() tells clients that
+    were behind them to reload. Returns the number of tombstones removed.
+    """
+    max_age_days = TOMBSTONE_RETENTION_DAYS if max_age_days is None else max_age_days
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).strftime("%Y-%m-%d %H:%M:%S")
+
+    removed = 0
+    for path in (shard_paths() if is_sharded() else [get_db_path()]):
+        with _transaction(_connect_path(path)) as cursor:
+            cursor.execute("""
+                UPDATE change_seq
+                SET floor = max(floor, (SELECT MAX(row_version) FROM tombstones t
+                                        WHERE t.user_id = change_seq.user_id AND t.deleted_at < ?))
+                WHERE user_id IN (SELECT user_id FROM tombstones WHERE deleted_at < ?)
+            """, (cutoff, cutoff))
+            cursor.execute("DELETE FROM tombstones WHERE deleted_at < ?", (cutoff,))
+            removed += cursor.rowcount
+    return removed
 
 # -----------------------------
 # Per-user settings
 # -----------------------------
-def set_setting(user_id, key, value):
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO app_settings (user_id, key, value)
-        VALUES (?, ?, ?)
-        ON CONFLICT(user_id, key)
-        DO UPDATE SET value=excluded.value
-    """, (user_id, key, value))
-    conn.commit()
-    conn.close()
-
-def get_setting(user_id, key, default=None):
-    conn = connect()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT value FROM app_settings WHERE user_id=? AND key=?",
-        (user_id, key)
-    )
-    row = cursor.fetchone()
-    conn.close()
-
-    if not row:
-        return default
-
-    val = row[0]
-
+def setting_text(value):
+    """The string app_settings hands back for `value` (its column is TEXT)."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return str(value)
+
+def coerce_setting(val, default=None):
+    """Turn a stored setting back into the type of `default` (booleans for switches)."""
     # Convert stored strings into real booleans for switches
     if isinstance(default, bool):
         s = str(val).strip().lower()
@@ -581,4 +2105,37 @@ def get_setting(user_id, key, default=None):
             return False
         return default
 
-    return val
\ No newline at end of file
+    return val
+
+def set_setting(user_id, key, value):
+    set_settings(user_id, {key: value})
+
+@queued_write()
+def set_settings(user_id, values):
+    """Upsert several settings in one transaction."""
+    if not values:
+        return
+    with transaction(user_id) as cursor:
+        cursor.executemany("""
+            INSERT INTO app_settings (user_id, key, value)
+            VALUES (?, ?, ?)
+            ON CONFLICT(user_id, key)
+            DO UPDATE SET value=excluded.value
+        """, [(user_id, k, setting_text(v)) for k, v in values.items()])
+
+def get_settings(user_id):
+    """All of a user's settings as {key: stored string}, in one query."""
+    return dict(connect(user_id).execute(
+        "SELECT key, value FROM app_settings WHERE user_id=?",
+        (user_id,)
+    ).fetchall())
+
+def get_setting(user_id, key, default=None):
+    row = connect(user_id).execute(
+        "SELECT value FROM app_settings WHERE user_id=? AND key=?",
+        (user_id, key)
+    ).fetchone()
+
+    if not row:
+        return default
+    return coerce_setting(row[0], default)
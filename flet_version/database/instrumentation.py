@@ -0,0 +1,296 @@
+import atexit
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from app.vault import get_secret
+
+
+# -----------------------------
+# Opt-in query instrumentation
+# -----------------------------
+# With DB_INSTRUMENT=1, db.connect() opens InstrumentedConnection instead of a
+# plain sqlite3.Connection. Every execute()/executemany() is timed and counted
+# per statement and per calling database.db function; statements slower than
+# SLOW_QUERY_MS are logged with their EXPLAIN QUERY PLAN. When off, connections
+# are plain sqlite3 ones, so there is no per-statement cost at all.
+#
+#     from database import instrumentation
+#     instrumentation.snapshot()          # dict the admin page renders
+#     instrumentation.dump_json("q.json") # or set DB_INSTRUMENT_DUMP to dump at exit
+
+DB_INSTRUMENT = get_secret("DB_INSTRUMENT", "0") == "1"
+SLOW_QUERY_MS = float(get_secret("SLOW_QUERY_MS", "100"))
+DB_INSTRUMENT_DUMP = get_secret("DB_INSTRUMENT_DUMP", "")
+
+# Latency samples kept per statement/function for percentiles (newest win)
+SAMPLE_SIZE = 1000
+SLOW_LOG_SIZE = 100
+
+# BEGIN/COMMIT issued by transaction() are charged to the function that opened it
+_PLUMBING = {"transaction", "_transaction"}
+_EXPLAINABLE = ("select", "insert", "update", "delete", "replace", "with")
+_WS_RE = re.compile(r"\s+")
+
+_enabled = DB_INSTRUMENT
+_threshold_ms = SLOW_QUERY_MS
+_lock = threading.Lock()
+_statements = {}
+_functions = {}
+_slow = deque(maxlen=SLOW_LOG_SIZE)
+
+
+class _Stat:
+    __slots__ = ("calls", "total_ms", "max_ms", "fetch_ms", "samples", "callers")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.fetch_ms = 0.0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+        self.callers = set()
+
+    def add(self, ms):
+        self.calls += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.samples.append(ms)
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        return {
+            "calls": self.calls,
+            "total_ms": round(self.total_ms + self.fetch_ms, 3),
+            "fetch_ms": round(self.fetch_ms, 3),
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": _percentile(ordered, 50),
+            "p95_ms": _percentile(ordered, 95),
+            "p99_ms": _percentile(ordered, 99),
+        }
+
+
+def _percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    # nearest-rank
+    k = max(0, min(len(ordered) - 1, -(-pct * len(ordered) // 100) - 1))
+    return round(ordered[k], 3)
+
+
+# -----------------------------
+# Public API
+# -----------------------------
+def is_enabled():
+    return _enabled
+
+
+def slow_threshold_ms():
+    return _threshold_ms
+
+
+def enable(threshold_ms=None):
+    """
+    Turns recording on. Only connections opened afterwards are instrumented;
+    call db.close_connections() at a quiet moment to re-open the pool.
+    """
+    global _enabled, _threshold_ms
+    _enabled = True
+    if threshold_ms is not None:
+        _threshold_ms = float(threshold_ms)
+
+
+def disable():
+    """Stops recording. Already-open instrumented connections fall back to a single flag check."""
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    with _lock:
+        _statements.clear()
+        _functions.clear()
+        _slow.clear()
+
+
+def connection_factory():
+    """sqlite3.connect(factory=...) for a new pooled connection."""
+    return InstrumentedConnection if _enabled else sqlite3.Connection
+
+
+def snapshot(top=None):
+    """
+    Counters so far: statements and functions sorted by total time (slowest
+    first, at most `top` of each), plus the slow-query log, newest first.
+    """
+    with _lock:
+        statements = [dict(sql=sql, functions=sorted(s.callers), **s.summary()) for sql, s in _statements.items()]
+        functions = [dict(function=name, **s.summary()) for name, s in _functions.items()]
+        slow = list(reversed(_slow))
+
+    statements.sort(key=lambda r: r["total_ms"], reverse=True)
+    functions.sort(key=lambda r: r["total_ms"], reverse=True)
+    return {
+        "enabled": _enabled,
+        "threshold_ms": _threshold_ms,
+        "taken_at": datetime.now().isoformat(timespec="seconds"),
+        "statements": statements[:top],
+        "functions": functions[:top],
+        "slow_queries": slow,
+    }
+
+
+def dump_json(path=None, top=None):
+    """Writes snapshot() to `path` (or DB_INSTRUMENT_DUMP); returns the JSON text."""
+    text = json.dumps(snapshot(top), indent=2)
+    path = path or DB_INSTRUMENT_DUMP
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return text
+
+
+def _dump_at_exit():
+    if DB_INSTRUMENT_DUMP and (_statements or _functions):
+        try:
+            dump_json()
+        except OSError as ex:
+            print(f"[instrumentation] could not write {DB_INSTRUMENT_DUMP}: {ex}", file=sys.stderr)
+
+
+atexit.register(_dump_at_exit)
+
+
+# -----------------------------
+# Recording
+# -----------------------------
+def _caller():
+    """Name of the database.db function that issued the statement."""
+    frame = sys._getframe(1)
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__")
+        if module == "database.db" and frame.f_code.co_name not in _PLUMBING:
+            return frame.f_code.co_name
+        if fallback is None and module != __name__ and module != "database.db":
+            fallback = f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return fallback or "?"
+
+
+def _record(conn, sql, params, ms, function):
+    key = _WS_RE.sub(" ", sql).strip()
+    with _lock:
+        stat = _statements.get(key)
+        if stat is None:
+            stat = _statements[key] = _Stat()
+        stat.add(ms)
+        stat.callers.add(function)
+        fn_stat = _functions.get(function)
+        if fn_stat is None:
+            fn_stat = _functions[function] = _Stat()
+        fn_stat.add(ms)
+
+    if ms >= _threshold_ms:
+        _log_slow(conn, key, params, ms, function)
+    return stat, fn_stat
+
+
+def _record_fetch(stats, ms):
+    with _lock:
+        for stat in stats:
+            stat.fetch_ms += ms
+
+
+def _log_slow(conn, sql, params, ms, function):
+    plan = []
+    if params is None:
+        plan = ["(no plan: parameters not available)"]
+    elif sql.lower().startswith(_EXPLAINABLE):
+        try:
+            rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params)
+            plan = [row[3] for row in rows]
+        except sqlite3.Error as ex:
+            plan = [f"(no plan: {ex})"]
+
+    entry = {
+        "at": datetime.now().isoformat(timespec="seconds"),
+        "function": function,
+        "ms": round(ms, 3),
+        "sql": sql,
+        "plan": plan,
+    }
+    with _lock:
+        _slow.append(entry)
+    print(f"[db] slow query {ms:.1f} ms in {function}: {sql}" + "".join(f"\n    {p}" for p in plan),
+          file=sys.stderr)
+
+
+def _first_params(seq_of_params):
+    # executemany() may get a generator; only a list/tuple can be peeked safely
+    if isinstance(seq_of_params, (list, tuple)) and seq_of_params:
+        return seq_of_params[0]
+    return None
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Times execute()/executemany() and the fetches that follow them."""
+
+    _stats = ()
+
+    def execute(self, sql, parameters=()):
+        if not _enabled:
+            return super().execute(sql, parameters)
+        function = _caller()
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._stats = _record(self.connection, sql, parameters, (time.perf_counter() - start) * 1000, function)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not _enabled:
+            return super().executemany(sql, seq_of_parameters)
+        function = _caller()
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            self._stats = _record(self.connection, sql, _first_params(seq_of_parameters), ms, function)
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed_fetch(super().fetchmany, size if size is not None else self.arraysize)
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+    def _timed_fetch(self, fetch, *args):
+        if not (_enabled and self._stats):
+            return fetch(*args)
+        start = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            _record_fetch(self._stats, (time.perf_counter() - start) * 1000)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3.Connection whose shortcut execute() methods go through InstrumentedCursor."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
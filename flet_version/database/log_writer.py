@@ -0,0 +1,150 @@
+import atexit
+import queue
+import sys
+import threading
+import time
+
+
+# Queue items that are not log rows
+_STOP = object()
+
+
+class LogWriter:
+    """
+    Batches audit-log rows off the caller's thread.
+
+    put() only enqueues. A daemon worker drains the queue and hands batches to
+    write_batch(rows) every `interval` seconds or `batch_size` rows, whichever
+    comes first, so a login never waits on a commit. flush() blocks until all
+    rows queued before it are written; close() (also run at exit) flushes and
+    stops the worker.
+
+    A failed batch is retried `retries` times with a growing pause (e.g. the
+    database was locked), then written row by row, so only rows that fail on
+    their own are dropped. stats() counts the drops.
+    """
+
+    def __init__(self, write_batch, batch_size=200, interval=0.25, maxsize=10000, retries=3, retry_delay=0.05):
+        self._write_batch = write_batch
+        self.batch_size = batch_size
+        self.interval = interval
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {"written": 0, "retried": 0, "dropped": 0}
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def put(self, row):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            # Backpressure instead of dropping audit rows: write on the caller's thread
+            self._write([row])
+
+    def stats(self):
+        """{"written", "retried", "dropped"} row/batch counts since start."""
+        with self._lock:
+            return dict(self._stats)
+
+    def flush(self, timeout=5.0):
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return  # worker is stuck; it is a daemon thread, so don't hang shutdown
+        thread.join(timeout)
+
+    # -----------------------------
+    # Worker
+    # -----------------------------
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="taskwise-log-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            rows, waiters, stop = [], [], False
+
+            item = self._queue.get()
+            deadline = time.monotonic() + self.interval
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    rows.append(item)
+
+                # A flush or stop request writes what we have right away
+                if stop or waiters or len(rows) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            # FIFO: every row put before a flush marker is in `rows` by now
+            if rows:
+                self._write(rows)
+            for w in waiters:
+                w.set()
+            if stop:
+                return
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+
+    def _write(self, rows):
+        for attempt in range(self.retries + 1):
+            try:
+                self._write_batch(rows)
+                self._count("written", len(rows))
+                return
+            except Exception as ex:
+                error = ex
+            if attempt < self.retries:
+                self._count("retried")
+                time.sleep(self.retry_delay * 2 ** attempt)
+
+        # Still failing: write row by row so one bad row doesn't take the batch with it
+        dropped = len(rows)
+        if len(rows) > 1:
+            dropped = 0
+            for row in rows:
+                try:
+                    self._write_batch([row])
+                    self._count("written")
+                except Exception as ex:
+                    error = ex
+                    dropped += 1
+        if dropped:
+            self._count("dropped", dropped)
+            print(f"[log_writer] dropped {dropped} log row(s): {error}", file=sys.stderr)
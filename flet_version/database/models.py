@@ -0,0 +1,201 @@
+from collections.abc import Mapping, Sequence
+from datetime import datetime, timedelta
+from enum import Enum
+
+
+# -----------------------------
+# Typed rows returned by database.db readers
+# -----------------------------
+# Records use __slots__ (no per-row __dict__) and are parsed once when the row
+# is read, so pages use attributes (task.due, task.status) instead of unpacking
+# tuples and re-parsing strings on every render.
+#
+# Task and Journal still index and unpack like the tuples they replace, over
+# the columns their query selected; User and LogEntry read like the dicts they
+# replace (user["id"], user.get("email")).
+
+
+def due_ts_to_datetime(ts):
+    """tasks.due_ts (wall-clock epoch seconds read as UTC) -> naive datetime."""
+    return datetime(1970, 1, 1) + timedelta(seconds=ts)
+
+
+def parse_timestamp(s):
+    """created_at/updated_at text ("YYYY-MM-DD HH:MM:SS" or ISO) -> datetime, or None."""
+    s = (s or "").strip()
+    if not s:
+        return None
+    try:
+        return datetime.fromisoformat(s.replace("Z", ""))
+    except ValueError:
+        return None
+
+
+class TaskStatus(str, Enum):
+    PENDING = "pending"
+    COMPLETED = "completed"
+
+    # Render as the stored value ("pending"), not "TaskStatus.PENDING"
+    __str__ = str.__str__
+    __format__ = str.__format__
+
+    @classmethod
+    def parse(cls, value):
+        """Member for a stored status; unknown values are returned unchanged."""
+        try:
+            return cls((value or "").strip().lower())
+        except ValueError:
+            return value
+
+
+class _Row(Sequence):
+    """Positional access over the first `_width` of `_fields`, like the old tuple rows."""
+
+    __slots__ = ("_width",)
+    _fields = ()
+
+    def __len__(self):
+        return self._width
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return tuple(self[j] for j in range(*i.indices(self._width)))
+        if i < 0:
+            i += self._width
+        if not 0 <= i < self._width:
+            raise IndexError(i)
+        return getattr(self, self._fields[i])
+
+    def __iter__(self):
+        for name in self._fields[:self._width]:
+            yield getattr(self, name)
+
+    def __eq__(self, other):
+        if isinstance(other, (tuple, _Row)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields[:self._width])
+        return f"{type(self).__name__}({fields})"
+
+
+class Task(_Row):
+    __slots__ = (
+        "id", "title", "description", "category", "due_date", "status",
+        "created_at", "updated_at", "due_ts", "snippet", "due", "created",
+    )
+    # Column order of TASK_COLUMNS, then the search snippet
+    _fields = __slots__[:10]
+
+    def __init__(self, id, title, description="", category="", due_date="", status="pending",
+                 created_at=None, updated_at=None, due_ts=None, snippet="", _width=None):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.category = category
+        self.due_date = due_date
+        self.status = TaskStatus.parse(status)
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.due_ts = due_ts
+        self.snippet = snippet
+        self.due = due_ts_to_datetime(due_ts) if due_ts is not None else None
+        self.created = parse_timestamp(created_at)
+        self._width = _width or 10
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row, _width=len(row))
+
+    @property
+    def is_completed(self):
+        return self.status == TaskStatus.COMPLETED
+
+
+class Journal(_Row):
+    __slots__ = (
+        "id", "title", "content", "mood", "created_at", "updated_at",
+        "ai_reflection", "ai_mood", "snippet", "created", "updated",
+    )
+    # Column order of get_journals_by_user, then the search snippet
+    _fields = __slots__[:9]
+
+    def __init__(self, id, title, content="", mood="", created_at=None, updated_at=None,
+                 ai_reflection="", ai_mood="", snippet="", _width=None):
+        self.id = id
+        self.title = title
+        self.content = content
+        self.mood = mood
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.ai_reflection = ai_reflection or ""
+        self.ai_mood = ai_mood or ""
+        self.snippet = snippet
+        self.created = parse_timestamp(created_at)
+        self.updated = parse_timestamp(updated_at)
+        self._width = _width or 9
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row, _width=len(row))
+
+
+class _Record(Mapping):
+    """Read-only dict-style access (record["id"], .get(), dict(record)) over the slots."""
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+class User(_Record):
+    __slots__ = ("id", "name", "email", "password_hash", "role", "is_banned")
+
+    def __init__(self, id, name, email, password_hash=None, role="user", is_banned=False):
+        self.id = id
+        self.name = name
+        self.email = email
+        self.password_hash = password_hash
+        self.role = role
+        self.is_banned = bool(is_banned)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row[:6]) if row else None
+
+    @property
+    def is_admin(self):
+        return (self.role or "").lower() == "admin"
+
+
+class LogEntry(_Record):
+    __slots__ = ("id", "user_id", "email", "action", "details", "created_at", "created")
+
+    def __init__(self, id, user_id, email, action, details, created_at):
+        self.id = id
+        self.user_id = user_id
+        self.email = email
+        self.action = action
+        self.details = details
+        self.created_at = created_at
+        self.created = parse_timestamp(created_at)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row)
@@ -0,0 +1,130 @@
+"""
+Moves the tasks, journals and settings of an existing single-file database
+into shard files (see DB_SHARDS in database/db.py). Users and logs stay in
+the global database. Stop the app first.
+
+Run from flet_version/:
+    python -m database.shard_migrate --shards 8
+    python -m database.shard_migrate --shards user --db taskwise.db
+
+Then set DB_SHARDS to the same value in .env. Rows already present in a shard
+are skipped, so an interrupted run can simply be repeated. The global copies
+are deleted only after every shard has been filled and its counts checked
+(--keep-source leaves them in place).
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from database import db  # noqa: E402
+
+# Per-user tables that move; task_stats and the FTS indexes are rebuilt by the shard's triggers
+USER_TABLES = ("tasks", "journals", "app_settings", "untitled_free")
+
+# Users copied per shard transaction
+USERS_PER_BATCH = 100
+
+
+def _copy_users(user_ids, source, moved):
+    """Copies user_ids' rows from the attached global database into their (shared) shard."""
+    shard = db.connect(user_ids[0])
+    shard.execute("ATTACH DATABASE ? AS src", (source,))
+    try:
+        with db.transaction(user_ids[0]) as cursor:
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS move_ids (id INTEGER PRIMARY KEY)")
+            cursor.execute("DELETE FROM temp.move_ids")
+            cursor.executemany("INSERT INTO temp.move_ids (id) VALUES (?)", [(uid,) for uid in user_ids])
+
+            for table in USER_TABLES:
+                cols = ", ".join(r[1] for r in cursor.execute(f"PRAGMA main.table_info({table})").fetchall())
+                where = "user_id IN (SELECT id FROM temp.move_ids)"
+                cursor.execute(f"INSERT OR IGNORE INTO main.{table} ({cols}) SELECT {cols} FROM src.{table} WHERE {where}")
+                moved[table] += cursor.rowcount
+
+                copied = cursor.execute(f"SELECT COUNT(*) FROM main.{table} WHERE {where}").fetchone()[0]
+                expected = cursor.execute(f"SELECT COUNT(*) FROM src.{table} WHERE {where}").fetchone()[0]
+                if copied != expected:
+                    raise RuntimeError(f"{table}: shard has {copied} rows for these users, source {expected}")
+    finally:
+        shard.execute("DETACH DATABASE src")
+
+
+def migrate_to_shards(shards=None, keep_source=False, on_progress=None):
+    """
+    Splits the current db.DB_NAME into shards. `shards` ("8", 8 or "user")
+    overrides DB_SHARDS. on_progress(done, total) is called per batch.
+    Returns {"users", "shards", <table>: rows moved, ...}.
+    """
+    if shards is not None:
+        db.DB_SHARDS = str(shards)
+    mode = db.DB_SHARDS.strip().lower()
+    if mode != "user" and not (mode.isdigit() and int(mode) > 0):
+        raise ValueError("DB_SHARDS must be a shard count or 'user'")
+
+    db.close_connections()
+    db.migrate()
+    source = os.path.abspath(db.get_db_path())
+    user_ids = [r[0] for r in db.connect().execute(
+        " UNION ".join(f"SELECT user_id FROM {table}" for table in USER_TABLES)
+    ).fetchall()]
+
+    by_shard = {}
+    for user_id in user_ids:
+        by_shard.setdefault(db.user_db_path(user_id), []).append(user_id)
+    batches = [
+        ids[i:i + USERS_PER_BATCH]
+        for _path, ids in sorted(by_shard.items())
+        for i in range(0, len(ids), USERS_PER_BATCH)
+    ]
+
+    moved = {table: 0 for table in USER_TABLES}
+    for n, batch in enumerate(batches, 1):
+        _copy_users(batch, source, moved)
+        if on_progress:
+            on_progress(n, len(batches))
+
+    if not keep_source:
+        # Every shard is complete: only now drop the global copies
+        with db.transaction() as cursor:
+            for table in USER_TABLES:
+                cursor.execute(f"DELETE FROM {table}")
+            # The shards keep their own change feed; these are the deletes above
+            cursor.execute("DELETE FROM tombstones")
+            cursor.execute("DELETE FROM change_seq")
+
+    return dict(users=len(user_ids), shards=len(by_shard), **moved)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", default=db.DB_SHARDS, help="shard count, or 'user' for a file per user")
+    parser.add_argument("--db", help="global database (default: DB_NAME)")
+    parser.add_argument("--shard-dir", help="where shard files go (default: DB_SHARD_DIR or <db>_shards)")
+    parser.add_argument("--keep-source", action="store_true", help="leave the rows in the global database too")
+    args = parser.parse_args()
+
+    if args.db:
+        db.DB_NAME = args.db
+    if args.shard_dir:
+        db.DB_SHARD_DIR = args.shard_dir
+
+    def progress(done, total):
+        print(f"  batch {done}/{total}", file=sys.stderr)
+
+    try:
+        result = migrate_to_shards(args.shards, keep_source=args.keep_source, on_progress=progress)
+    except ValueError as ex:
+        parser.error(str(ex))
+
+    print(f"Moved {result['users']} users into {result['shards']} shard files under {db.shard_dir()}:")
+    for table in USER_TABLES:
+        print(f"  {table:<14} {result[table]}")
+    print(f"Set DB_SHARDS={db.DB_SHARDS} in .env before starting the app.")
+    db.close_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+import csv
+import io
+import itertools
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+
+from app.vault import get_secret
+from database import db
+
+# zstandard is optional — only needed for .zst exports/imports
+try:
+    import zstandard
+    _ZSTD_AVAILABLE = True
+except ImportError:
+    _ZSTD_AVAILABLE = False
+
+
+# -----------------------------
+# Streaming export / import of one user's data
+# -----------------------------
+# Export reads tasks, journals and settings through fetchmany() cursors and
+# writes them one record at a time; import parses the stream lazily and
+# inserts in batched transactions. Memory stays flat however big the account.
+#
+# JSONL: one object per line, {"type": "meta"|"task"|"journal"|"setting", ...}
+# CSV:   one row per record, with a "type" column and the union of the fields
+# Either can be zstd-compressed (".zst" suffix, or compress=True).
+
+EXPORT_FORMAT = "taskwise-export"
+EXPORT_VERSION = 1
+
+# Rows per fetchmany() on export and per transaction on import
+TRANSFER_BATCH_SIZE = int(get_secret("TRANSFER_BATCH_SIZE", "1000"))
+
+TASK_FIELDS = ("title", "description", "category", "due_date", "status", "created_at", "updated_at")
+JOURNAL_FIELDS = ("title", "content", "mood", "ai_reflection", "ai_mood", "created_at", "updated_at")
+SETTING_FIELDS = ("key", "value")
+
+CSV_FIELDS = ("type",) + tuple(dict.fromkeys(TASK_FIELDS + JOURNAL_FIELDS + SETTING_FIELDS))
+
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+_EXPORT_QUERIES = (
+    ("task", TASK_FIELDS, f"SELECT {', '.join(TASK_FIELDS)} FROM tasks WHERE user_id = ? ORDER BY id"),
+    ("journal", JOURNAL_FIELDS, f"SELECT {', '.join(JOURNAL_FIELDS)} FROM journals WHERE user_id = ? ORDER BY id"),
+    ("setting", SETTING_FIELDS, "SELECT key, value FROM app_settings WHERE user_id = ? ORDER BY key"),
+)
+
+
+class TransferError(ValueError):
+    """The stream is not a TaskWise export this version can read."""
+
+
+# -----------------------------
+# Export
+# -----------------------------
+def iter_user_records(user_id, batch_size=None):
+    """Yields the meta record, then every task, journal and setting of the user as dicts."""
+    batch_size = batch_size or TRANSFER_BATCH_SIZE
+    user = db.get_user_by_id(user_id)
+    yield {
+        "type": "meta",
+        "format": EXPORT_FORMAT,
+        "version": EXPORT_VERSION,
+        "exported_at": datetime.now().isoformat(timespec="seconds"),
+        "user": {"name": user.name, "email": user.email} if user else None,
+    }
+
+    for kind, fields, sql in _EXPORT_QUERIES:
+        cursor = db.connect(user_id).execute(sql, (user_id,))
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    record = dict(zip(fields, row))
+                    record["type"] = kind
+                    yield record
+        finally:
+            cursor.close()
+
+
+def jsonl_lines(records):
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def csv_lines(records):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=CSV_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for record in records:
+        if record["type"] == "meta":
+            continue  # CSV carries data rows only
+        writer.writerow({k: ("" if v is None else v) for k, v in record.items()})
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    yield buf.getvalue()  # the header, if there were no rows
+
+
+_WRITERS = {"jsonl": jsonl_lines, "csv": csv_lines}
+
+
+def export_user(user_id, dest, fmt=None, compress=None, batch_size=None, on_progress=None):
+    """
+    Streams the user's data to `dest` (a path or a binary file object).
+    fmt/compress default from the path ("data.csv.zst"), else JSONL uncompressed.
+    on_progress(count) is called every batch. Returns {"task": n, "journal": n, "setting": n}.
+    """
+    fmt, compress = _resolve_format(dest, fmt, compress)
+    fmt = fmt or "jsonl"
+    batch_size = batch_size or TRANSFER_BATCH_SIZE
+    counts = {"task": 0, "journal": 0, "setting": 0}
+
+    def counted(records):
+        written = 0
+        for record in records:
+            if record["type"] in counts:
+                counts[record["type"]] += 1
+                written += 1
+                if on_progress and written % batch_size == 0:
+                    on_progress(written)
+            yield record
+
+    with _text_writer(dest, compress) as out:
+        for chunk in _WRITERS[fmt](counted(iter_user_records(user_id, batch_size))):
+            out.write(chunk)
+
+    if on_progress:
+        on_progress(sum(counts.values()))
+    return counts
+
+
+# -----------------------------
+# Import
+# -----------------------------
+def iter_records(src, fmt=None):
+    """Lazily parses an export (path or binary file object), transparently decompressing zstd."""
+    fmt, _ = _resolve_format(src, fmt, None)
+    with _text_reader(src) as text:
+        first = text.readline()
+        lines = itertools.chain([first], text)
+        if fmt is None:
+            fmt = "jsonl" if first.lstrip().startswith("{") else "csv"
+
+        if fmt == "jsonl":
+            for n, line in enumerate(lines, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as ex:
+                    raise TransferError(f"line {n}: {ex}") from None
+                if record.get("type") == "meta" and record.get("format") != EXPORT_FORMAT:
+                    raise TransferError("not a TaskWise export")
+                if record.get("type") == "meta" and record.get("version", 0) > EXPORT_VERSION:
+                    raise TransferError(f"export version {record['version']} is newer than this app")
+                yield record
+        else:
+            reader = csv.DictReader(lines)
+            if not reader.fieldnames or "type" not in reader.fieldnames:
+                raise TransferError("CSV export needs a 'type' column")
+            for row in reader:
+                yield row
+
+
+def import_user(user_id, src, fmt=None, batch_size=None, on_progress=None):
+    """
+    Adds the records of an export to `user_id`'s account: tasks and journals
+    are inserted, settings upserted, each kind in transactions of batch_size
+    rows. on_progress(count) is called after every batch. Returns the counts.
+    """
+    batch_size = batch_size or TRANSFER_BATCH_SIZE
+    writers = {
+        "task": lambda rows: db.restore_tasks(user_id, rows),
+        "journal": lambda rows: db.restore_journals(user_id, rows),
+        "setting": lambda rows: db.set_settings(user_id, {r["key"]: r.get("value") for r in rows if r.get("key")}),
+    }
+    batches = {kind: [] for kind in writers}
+    counts = {kind: 0 for kind in writers}
+
+    def flush(kind):
+        rows = batches[kind]
+        if rows:
+            writers[kind](rows)
+            counts[kind] += len(rows)
+            batches[kind] = []
+            if on_progress:
+                on_progress(sum(counts.values()))
+
+    for record in iter_records(src, fmt):
+        kind = record.get("type")
+        if kind not in batches:
+            continue  # meta, or a record type from a newer export
+        batches[kind].append(record)
+        if len(batches[kind]) >= batch_size:
+            flush(kind)
+
+    for kind in batches:
+        flush(kind)
+    return counts
+
+
+# -----------------------------
+# Stream plumbing
+# -----------------------------
+def _resolve_format(target, fmt, compress):
+    """(fmt, compress) with blanks filled from a path's suffixes; fmt stays None if unknown."""
+    name = os.fspath(target).lower() if isinstance(target, (str, os.PathLike)) else ""
+    if isinstance(name, bytes):
+        name = name.decode(errors="ignore")
+    if compress is None:
+        compress = name.endswith(".zst")
+    base = name[:-len(".zst")] if name.endswith(".zst") else name
+    if fmt is None and base.endswith(".csv"):
+        fmt = "csv"
+    elif fmt is None and base.endswith((".jsonl", ".json")):
+        fmt = "jsonl"
+    if fmt not in (None, "jsonl", "csv"):
+        raise ValueError(f"unknown export format {fmt!r}")
+    return fmt, compress
+
+
+def _require_zstd():
+    if not _ZSTD_AVAILABLE:
+        raise RuntimeError("zstandard is not installed (pip install zstandard)")
+
+
+@contextmanager
+def _open_binary(target, mode):
+    # Paths are opened and closed here; caller-owned file objects are left open
+    if isinstance(target, (str, bytes, os.PathLike)):
+        with open(target, mode + "b") as f:
+            yield f
+    else:
+        yield target
+
+
+def _head(raw, n):
+    if hasattr(raw, "peek"):
+        return raw.peek(n)[:n]
+    if raw.seekable():
+        pos = raw.tell()
+        head = raw.read(n)
+        raw.seek(pos)
+        return head
+    return b""
+
+
+@contextmanager
+def _text_writer(dest, compress):
+    with _open_binary(dest, "w") as raw:
+        if compress:
+            _require_zstd()
+            with zstandard.ZstdCompressor().stream_writer(raw, closefd=False) as zw:
+                text = io.TextIOWrapper(zw, encoding="utf-8", newline="")
+                yield text
+                text.detach()  # flushes into the frame; leaving the with ends it
+        else:
+            text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+            yield text
+            text.detach()
+
+
+@contextmanager
+def _text_reader(src):
+    with _open_binary(src, "r") as raw:
+        if _head(raw, 4) == _ZSTD_MAGIC:
+            _require_zstd()
+            with zstandard.ZstdDecompressor().stream_reader(raw, closefd=False) as zr:
+                text = io.TextIOWrapper(zr, encoding="utf-8", newline="")
+                yield text
+                text.detach()
+        else:
+            text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+            yield text
+            text.detach()
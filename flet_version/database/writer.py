@@ -0,0 +1,190 @@
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+# Queue items that are not writes
+_STOP = object()
+
+
+class _Write:
+    __slots__ = ("target", "fn", "args", "kwargs", "key", "future")
+
+    def __init__(self, target, fn, args, kwargs, key):
+        self.target = target
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.key = key
+        self.future = Future()
+
+
+class WriteQueue:
+    """
+    Runs write functions on a single worker thread, one transaction per tick.
+
+    submit() enqueues a write and returns a concurrent.futures.Future. The
+    worker takes everything queued (up to batch_size, waiting at most `linger`
+    seconds for more), groups the writes by target and runs each group inside
+    begin(target), a transaction context manager. Every write gets its own
+    savepoint, so one that raises is rolled back alone and only its future
+    fails. Of several writes with the same coalesce key in one tick only the
+    last runs; the earlier futures get its result. Futures resolve once the
+    transaction has committed.
+    """
+
+    def __init__(self, begin, batch_size=500, linger=0.0, maxsize=10000, name="taskwise-writer"):
+        self._begin = begin
+        self.batch_size = batch_size
+        self.linger = linger
+        self.name = name
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {"writes": 0, "transactions": 0, "coalesced": 0, "failed": 0}
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def submit(self, target, fn, args=(), kwargs=None, key=None):
+        """Queues fn(*args, **kwargs) for `target`; blocks only while the queue is full."""
+        write = _Write(target, fn, tuple(args), kwargs or {}, None if key is None else (target, key))
+        self._ensure_started()
+        self._queue.put(write)
+        return write.future
+
+    def in_worker(self):
+        return threading.current_thread() is self._thread
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        with self._lock:
+            for k in self._stats:
+                self._stats[k] = 0
+
+    def flush(self, timeout=5.0):
+        """Blocks until every write queued before the call has been committed (or failed)."""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return  # worker is stuck; it is a daemon thread, so don't hang shutdown
+        thread.join(timeout)
+
+    # -----------------------------
+    # Worker
+    # -----------------------------
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            writes, waiters, stop = [], [], False
+
+            item = self._queue.get()
+            deadline = time.monotonic() + self.linger
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    writes.append(item)
+
+                if stop or waiters or len(writes) >= self.batch_size:
+                    break
+                # Take what's already queued at once; only the linger waits for more
+                try:
+                    item = self._queue.get_nowait()
+                    continue
+                except queue.Empty:
+                    pass
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if writes:
+                self._run_tick(writes)
+            for w in waiters:
+                w.set()
+            if stop:
+                return
+
+    def _run_tick(self, writes):
+        # A caller may have cancelled its future while the write was queued
+        writes = [w for w in writes if w.future.set_running_or_notify_cancel()]
+
+        # The last write per key runs, in its own queue position
+        last = {w.key: i for i, w in enumerate(writes) if w.key is not None}
+        superseded = {}
+        groups = {}
+        for i, w in enumerate(writes):
+            if w.key is not None and last[w.key] != i:
+                superseded.setdefault(last[w.key], []).append(w.future)
+                continue
+            groups.setdefault(w.target, []).append((i, w))
+
+        for target, group in groups.items():
+            for i, w, result, error in self._run_group(target, group):
+                for future in [w.future] + superseded.get(i, []):
+                    if error is None:
+                        future.set_result(result)
+                    else:
+                        future.set_exception(error)
+
+        with self._lock:
+            self._stats["writes"] += len(writes)
+            self._stats["coalesced"] += sum(len(f) for f in superseded.values())
+
+    def _run_group(self, target, group):
+        outcomes = []
+        try:
+            with self._begin(target) as cursor:
+                for i, w in group:
+                    cursor.execute("SAVEPOINT queued_write")
+                    try:
+                        result = w.fn(*w.args, **w.kwargs)
+                    except Exception as ex:
+                        cursor.execute("ROLLBACK TO queued_write")
+                        cursor.execute("RELEASE queued_write")
+                        outcomes.append((i, w, None, ex))
+                    else:
+                        cursor.execute("RELEASE queued_write")
+                        outcomes.append((i, w, result, None))
+        except Exception as ex:
+            # Nothing in the group was committed
+            outcomes = [(i, w, None, ex) for i, w in group]
+
+        with self._lock:
+            self._stats["transactions"] += 1
+            self._stats["failed"] += sum(1 for o in outcomes if o[3] is not None)
+        return outcomes
@@ -0,0 +1,192 @@
+"""
+Creates many accounts at once from a CSV or JSONL file (one user per row or
+line, with name, email, password and an optional role of "user" or "admin").
+The file is streamed in batches. Each batch's passwords are hashed across a
+process pool (app/passwords.py), and its rows are inserted in one transaction.
+Addresses that are already registered, or that repeat within the file, are
+reported rather than aborting the run.
+
+Run from flet_version/:
+    python provision_users.py users.csv
+    python provision_users.py users.jsonl --rounds 10 --report rejected.csv
+
+--rounds sets the bcrypt cost for this import (default: the cost the app
+calibrated for this machine). A lower cost makes big imports much faster; each
+account is re-hashed at the full cost the first time its user logs in.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from app import passwords  # noqa: E402
+from database import db  # noqa: E402
+
+# Rows hashed and inserted per transaction
+BATCH_SIZE = 1000
+MIN_PASSWORD_LENGTH = 8  # same rule as the signup page
+ROLES = ("user", "admin")
+
+
+# -----------------------------
+# Reading
+# -----------------------------
+def _read_rows(path, fmt):
+    """Yields (line number, dict or None) for every data row; None marks a line that didn't parse."""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, {(k or "").strip().lower(): v for k, v in row.items()}
+        else:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield line_no, row if isinstance(row, dict) else None
+
+
+def _validate(row):
+    """(name, email, password, role) for a usable row, else the reason it was rejected."""
+    if row is None:
+        return "not a JSON object"
+    name = str(row.get("name") or "").strip()
+    email = str(row.get("email") or "").strip().lower()
+    pw = str(row.get("password") or "")
+    role = str(row.get("role") or "user").strip().lower()
+    if not name or not email or not pw:
+        return "missing name, email or password"
+    if len(pw) < MIN_PASSWORD_LENGTH:
+        return f"password shorter than {MIN_PASSWORD_LENGTH} characters"
+    if role not in ROLES:
+        return f"unknown role {role!r}"
+    return name, email, pw, role
+
+
+def _batches(rows, size):
+    batch = []
+    for item in rows:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# -----------------------------
+# Provisioning
+# -----------------------------
+def _provision_batch(batch, rounds, rejected):
+    valid = []
+    for line_no, row in batch:
+        user = _validate(row)
+        if isinstance(user, str):
+            rejected.append((line_no, (row or {}).get("email", ""), user))
+        else:
+            valid.append((line_no, user))
+
+    # Addresses we know will fail aren't worth a bcrypt hash; the insert still
+    # relies on email UNIQUE for anything that slips past this (e.g. a concurrent signup)
+    taken = db.get_taken_emails(user[1] for _, user in valid)
+    todo, seen = [], set()
+    for line_no, user in valid:
+        email = user[1]
+        if email in taken or email in seen:
+            rejected.append((line_no, email, "email already registered"))
+            continue
+        seen.add(email)
+        todo.append((line_no, user))
+    if not todo:
+        return 0
+
+    hashes = passwords.hash_many([user[2] for _, user in todo], rounds=rounds)
+    created = db.create_users_bulk(
+        [(name, email, pw_hash, role) for (_, (name, email, _pw, role)), pw_hash in zip(todo, hashes)]
+    )
+    for (line_no, user), ok in zip(todo, created):
+        if not ok:
+            rejected.append((line_no, user[1], "email already registered"))
+    return sum(created)
+
+
+def provision(path, fmt=None, batch_size=BATCH_SIZE, rounds=None, on_progress=None):
+    """
+    Creates the accounts in `path` (fmt "csv" or "jsonl"; default from the
+    extension). Returns {"created", "rejected": [(line, email, reason)], "seconds"}.
+    """
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"unknown format {fmt!r} (expected csv or jsonl)")
+    rounds = rounds or passwords.current_rounds()
+
+    created, rejected = 0, []
+    start = time.perf_counter()
+    for batch in _batches(_read_rows(path, fmt), batch_size):
+        created += _provision_batch(batch, rounds, rejected)
+        if on_progress:
+            on_progress(created, len(rejected))
+
+    if created:
+        db.add_log("Provision", f"{created} users created from {os.path.basename(path)}", None)
+    return {"created": created, "rejected": rejected, "seconds": time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV with a header row, or JSONL")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per transaction")
+    parser.add_argument("--rounds", type=int, help="bcrypt cost for these accounts")
+    parser.add_argument("--workers", type=int, help="hashing processes (default: PASSWORD_WORKERS)")
+    parser.add_argument("--report", help="write rejected rows (line, email, reason) to this CSV")
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.rounds is not None and not 4 <= args.rounds <= 31:
+        parser.error("--rounds must be between 4 and 31 (bcrypt's range)")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if not os.path.exists(args.path):
+        parser.error(f"no such file: {args.path}")
+
+    if args.workers is not None:
+        passwords.PASSWORD_WORKERS = args.workers
+    db.init_db()
+
+    def progress(created, rejected):
+        print(f"  {created} created, {rejected} rejected", file=sys.stderr)
+
+    try:
+        result = provision(args.path, args.format, args.batch_size, args.rounds, on_progress=progress)
+    finally:
+        passwords.shutdown()
+        db.flush_logs()
+        db.close_connections()
+
+    rejected = result["rejected"]
+    print(f"Created {result['created']} users in {result['seconds']:.1f}s; {len(rejected)} rows rejected.")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("line", "email", "reason"))
+            writer.writerows(sorted(rejected))
+        print(f"Rejected rows written to {args.report}.")
+    else:
+        for line_no, email, reason in sorted(rejected)[:20]:
+            print(f"  line {line_no}: {email or '-'}: {reason}")
+        if len(rejected) > 20:
+            print(f"  ... and {len(rejected) - 20} more (use --report to save them all)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
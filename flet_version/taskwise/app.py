@@ -1,6 +1,7 @@
 import flet as ft
-from datetime import datetime, timedelta
 
+from database import async_db as adb
+from database.models import TaskStatus
 from taskwise.app_state import AppState
 from taskwise.pages.task_page import TaskPage
 from taskwise.pages.calendar_page import CalendarPage
@@ -9,6 +10,10 @@ from taskwise.pages.settings_page import SettingsPage
 
 
 class TaskWiseApp:
+    # The cached due-soon list reaches this far past the 24h horizon, so the
+    # moving horizon only forces a fresh query about once an hour
+    DUE_SOON_SLACK = 3600
+
     def __init__(self, page: ft.Page, on_logout, user=None):
         self.page = page
         self.on_logout = on_logout
@@ -22,6 +27,9 @@ class TaskWiseApp:
         self._bell_badge_dot:  ft.Container = None
         self._bell_badge_text: ft.Text      = None
 
+        # (user_id, change version, covers due_ts up to, pending tasks) for the badge
+        self._due_soon = None
+
         # Shared state
         self.state = AppState()
         self.state.set_update_callback(self.update_ui)
@@ -111,62 +119,60 @@ class TaskWiseApp:
     # ----------------------------------------------------------
     # Notification logic
     # ----------------------------------------------------------
-    @staticmethod
-    def _parse_due_datetime(due_str: str):
-        s = (due_str or "").strip()
-        if not s:
-            return None
-        s = s.replace("T", " ")
-        for fmt in ("%Y-%m-%d %I:%M %p", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
-            try:
-                dt = datetime.strptime(s, fmt)
-                if fmt == "%Y-%m-%d":
-                    return datetime(dt.year, dt.month, dt.day, 23, 59)
-                return dt
-            except Exception:
-                continue
-        try:
-            return datetime.fromisoformat(s)
-        except Exception:
-            return None
-
     def _get_due_soon_tasks(self):
         S  = self.state
         db = getattr(S, "db", None)
         if not S.user or not db:
             return 0, []
         try:
-            tasks = db.get_tasks_by_user(S.user["id"])
+            # Pending tasks due within 24h (overdue included), soonest first
+            horizon = db.now_due_ts() + 24 * 3600
+            tasks = self._due_soon_tasks(db, S.user["id"], horizon)
         except Exception:
             return 0, []
 
-        now      = datetime.now()
-        horizon  = now + timedelta(hours=24)
-        due_soon = []
-        for t in tasks:
-            try:
-                task_id, title, desc, category, due_date, status, created_at, updated_at = t
-            except Exception:
-                continue
-            if (status or "").strip().lower() != "pending":
-                continue
-            dt = self._parse_due_datetime(due_date or "")
-            if dt and dt <= horizon:
-                due_soon.append((t, dt))
-
-        due_soon.sort(key=lambda x: x[1])
+        due_soon = [(t, t.due) for t in tasks]
         return len(due_soon), due_soon
 
+    def _due_soon_tasks(self, db, user_id, horizon):
+        """Pending tasks due by horizon; after the first query only db.changes_since() is read."""
+        cached = self._due_soon
+        if cached and cached[0] == user_id and horizon <= cached[2]:
+            _, version, until, tasks = cached
+            delta = db.changes_since(user_id, version, ("tasks",))
+            if not delta["reset"]:
+                gone = set(delta["deleted_tasks"]) | {t.id for t in delta["tasks"]}
+                tasks = [t for t in tasks if t.id not in gone] + [
+                    t for t in delta["tasks"]
+                    if t.status == TaskStatus.PENDING and t.due_ts is not None and t.due_ts <= until
+                ]
+                tasks.sort(key=lambda t: (t.due_ts, t.id))
+                self._due_soon = (user_id, delta["version"], until, tasks)
+                return [t for t in tasks if t.due_ts <= horizon]
+
+        until = horizon + self.DUE_SOON_SLACK
+        version = db.get_change_version(user_id)
+        tasks = db.get_due_soon_tasks(user_id, until)
+        self._due_soon = (user_id, version, until, tasks)
+        return [t for t in tasks if t.due_ts <= horizon]
+
     def _refresh_badge(self):
-        """Update the bell badge count in-place — no full redraw."""
-        count, _ = self._get_due_soon_tasks()
+        """Recount the bell badge off the UI thread, then update it in-place — no full redraw."""
+        self.state.requests.start(self.page, "badge", self._refresh_badge_async)
+
+    async def _refresh_badge_async(self):
+        count, _ = await adb.run(self._get_due_soon_tasks)
         if self._bell_badge_dot and self._bell_badge_text:
             self._bell_badge_dot.visible = count > 0
             self._bell_badge_text.value  = str(min(count, 99))
             if self._mounted(self._bell_badge_dot):
                 self._bell_badge_dot.update()
 
-    def _show_notifications_dialog(self):
+    async def _open_notifications(self):
+        due_soon = await adb.run(self._get_due_soon_tasks)
+        self._show_notifications_dialog(due_soon)
+
+    def _show_notifications_dialog(self, due_soon):
         C  = self.state.colors
         db = getattr(self.state, "db", None)
 
@@ -180,7 +186,7 @@ class TaskWiseApp:
         if not self.state.user or not db:
             content = ft.Text("Please login first.", color=color("TEXT_SECONDARY", "#666666"))
         else:
-            count, items = self._get_due_soon_tasks()
+            count, items = due_soon
             if count == 0:
                 content = ft.Column(
                     tight=True, spacing=8,
@@ -192,7 +198,7 @@ class TaskWiseApp:
             else:
                 rows = []
                 for (t, dt) in items[:15]:
-                    task_id, title, desc, category, due_date, status, created_at, updated_at = t
+                    title, category = t.title, t.category
                     when = dt.strftime("%b %d, %Y %I:%M %p")
                     cat  = (category or "").strip() or "No Category"
                     rows.append(
@@ -279,7 +285,7 @@ class TaskWiseApp:
                         icon=ft.Icons.NOTIFICATIONS_NONE,
                         icon_color=color("TEXT_PRIMARY", "#111111"),
                         tooltip="Notifications",
-                        on_click=lambda e: self._show_notifications_dialog(),
+                        on_click=lambda e: self.page.run_task(self._open_notifications),
                     ),
                 ),
                 self._bell_badge_dot,
@@ -347,6 +353,7 @@ class TaskWiseApp:
 
     def _navigate(self, view_name: str):
         """Switch view without tearing down the shell."""
+        self.state.requests.cancel()  # reads for the old view are stale now
         self.state.current_view = view_name
         self._refresh_nav()
         self._swap_body()
@@ -1,5 +1,7 @@
 # taskwise/app_state.py
 from database import db
+from database.async_db import RequestScope
+from database.db import coerce_setting, setting_text
 from datetime import datetime
 from taskwise.theme import get_theme, THEMES
 
@@ -16,10 +18,16 @@ class AppState:
         # Auth
         self.user = None  # dict: {"id","username","role"}
 
+        # Signed-in user's app_settings rows, loaded once at login
+        self.settings = {}
+
         # UI navigation
         self.current_view = "tasks"
         self.current_filter = "All Tasks"
 
+        # In-flight page reads; dropped when the user leaves the screen
+        self.requests = RequestScope()
+
         # Calendar
         today = datetime.now().date()
         self.selected_date = today
@@ -54,6 +62,7 @@ class AppState:
             self._badge_refresh_callback()
 
     def go(self, view_name: str):
+        self.requests.cancel()
         self.current_view = view_name
         self.update()
 
@@ -64,9 +73,11 @@ class AppState:
         self.user = user
 
         try:
-            saved_theme = self.db.get_setting(self.user["id"], "theme_name", "Light Mode")
+            self.settings = dict(self.db.get_settings(self.user["id"]))
         except Exception:
-            saved_theme = "Light Mode"
+            self.settings = {}
+
+        saved_theme = self.get_setting("theme_name", "Light Mode")
 
         if saved_theme not in THEMES:
             saved_theme = "Light Mode"
@@ -77,14 +88,18 @@ class AppState:
         self.update()
 
     def on_user_logout(self):
+        self.requests.cancel()
         self.user = None
+        self.settings = {}
         self.theme_name = "Light Mode"
         self.colors = get_theme("Light Mode")
         self.update()
 
     def on_account_deleted(self):
         """Clears user state then fires the delete/logout callback to return to homepage."""
+        self.requests.cancel()
         self.user = None
+        self.settings = {}
         self.theme_name = "Light Mode"
         self.colors = get_theme("Light Mode")
 
@@ -94,6 +109,29 @@ class AppState:
     # -----------------------
     # theme/settings helpers
     # -----------------------
+    def get_setting(self, key: str, default=None):
+        """Read a setting from the in-memory map; never touches the database."""
+        if key not in self.settings:
+            return default
+        return coerce_setting(self.settings[key], default)
+
+    def set_setting(self, key: str, value):
+        """Write one setting through to the database, then to the map."""
+        if self.user:
+            self.db.set_setting(self.user["id"], key, value)
+        self.settings[key] = setting_text(value)
+
+    def set_settings(self, values: dict):
+        """Write several settings in one transaction, then to the map."""
+        if self.user:
+            self.db.set_settings(self.user["id"], values)
+        self.settings.update({k: setting_text(v) for k, v in values.items()})
+
+    def reload_settings(self):
+        """Re-read the map after something wrote app_settings directly (e.g. a data import)."""
+        if self.user:
+            self.settings = dict(self.db.get_settings(self.user["id"]))
+
     def set_theme(self, theme_name: str):
         if theme_name not in THEMES:
             theme_name = "Light Mode"
@@ -103,7 +141,7 @@ class AppState:
 
         if self.user:
             try:
-                self.db.set_setting(self.user["id"], "theme_name", theme_name)
+                self.set_setting("theme_name", theme_name)
             except Exception:
                 pass
 
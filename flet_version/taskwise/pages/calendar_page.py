@@ -1,11 +1,19 @@
 import flet as ft
-from datetime import date, datetime
-from typing import Optional, Tuple
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Optional
 from zoneinfo import ZoneInfo
 import json
 import urllib.request
 import urllib.error
 
+from database import async_db as adb
+from database.db import due_ts_from_datetime
+
+# Cached due ranges kept at once: the month on screen, its neighbours and a
+# few selected days; older ones are dropped and re-queried if viewed again
+DUE_CACHE_RANGES = 6
+
 
 class CalendarPage:
     def __init__(self, state):
@@ -17,6 +25,38 @@ class CalendarPage:
         self._left_host: Optional[ft.Container] = None
         self._right_host: Optional[ft.Container] = None
 
+        # Tasks per [start_ts, end_ts) range (LRU, DUE_CACHE_RANGES at most),
+        # kept across visits and caught up through db.changes_since() instead
+        # of being re-queried
+        self._due_cache: OrderedDict[tuple[int, int], list] = OrderedDict()
+        self._due_user: Optional[int] = None
+        self._due_version: Optional[int] = None
+
+    def _apply_task_changes(self, delta: dict):
+        """Merges a changes_since() delta into every cached range."""
+        if delta["reset"]:
+            self._due_cache.clear()
+            self._due_version = None
+            return
+        gone = set(delta["deleted_tasks"]) | {t.id for t in delta["tasks"]}
+        for (start_ts, end_ts), rows in self._due_cache.items():
+            kept = [t for t in rows if t.id not in gone]
+            kept.extend(t for t in delta["tasks"] if t.due_ts is not None and start_ts <= t.due_ts < end_ts)
+            self._due_cache[(start_ts, end_ts)] = sorted(kept, key=lambda t: (t.due_ts, t.id))
+        self._due_version = delta["version"]
+
+    def _get_due_range(self, key: tuple[int, int]) -> Optional[list]:
+        rows = self._due_cache.get(key)
+        if rows is not None:
+            self._due_cache.move_to_end(key)
+        return rows
+
+    def _put_due_range(self, key: tuple[int, int], rows: list):
+        self._due_cache[key] = rows
+        self._due_cache.move_to_end(key)
+        while len(self._due_cache) > DUE_CACHE_RANGES:
+            self._due_cache.popitem(last=False)
+
     def view(self, page: ft.Page):
         S = self.S
         db = S.db
@@ -51,47 +91,6 @@ class CalendarPage:
             except Exception:
                 return None
 
-        def safe_parse_time(s: str) -> Optional[Tuple[int, int]]:
-            """
-            Your tasks may be stored as:
-              - "YYYY-MM-DD"
-              - "YYYY-MM-DD HH:MM"
-              - "YYYY-MM-DD h:MM AM/PM"
-            This supports both 24h and 12h times.
-            """
-            try:
-                s = (s or "").strip()
-                if not s:
-                    return None
-
-                parts = s.split()
-                if len(parts) < 2:
-                    return None
-
-                # time part could be "13:30" or "1:30"
-                time_part = parts[1]
-                ampm = parts[2].upper() if len(parts) >= 3 else ""
-
-                hh, mm = time_part.split(":")
-                hour = int(hh)
-                minute = int(mm)
-
-                if ampm in ("AM", "PM"):
-                    if hour == 12:
-                        hour = 0
-                    if ampm == "PM":
-                        hour += 12
-
-                if 0 <= hour <= 23 and 0 <= minute <= 59:
-                    return hour, minute
-            except Exception:
-                pass
-            return None
-
-        def due_date_only(due_str: str) -> str:
-            d = safe_parse_date(due_str)
-            return fmt_date(d) if d else ""
-
         # -----------------------------
         # Calendar calculations
         # -----------------------------
@@ -162,43 +161,60 @@ class CalendarPage:
         # -----------------------------
         # Tasks (per-user)
         # -----------------------------
-        def all_tasks():
+        def day_ts(d: date) -> int:
+            return due_ts_from_datetime(datetime(d.year, d.month, d.day))
+
+        # Ranges are read off the UI thread: a render uses what's cached and
+        # notes what's missing; load_missing() fetches it, then re-renders.
+        user_id = S.user["id"] if S.user else None
+        if self._due_user != user_id:
+            self._due_cache.clear()
+            self._due_user, self._due_version = user_id, None
+        due_cache = self._due_cache
+        missing: set[tuple[int, int]] = set()
+
+        def tasks_due_between(start: date, end: date):
+            # Range query on tasks.due_ts, already ordered by due time
             if not S.user:
                 return []
-            return db.get_tasks_by_user(S.user["id"])
-
-        def build_due_set(y: int, m: int) -> set[str]:
-            out = set()
-            for t in all_tasks():
-                d = safe_parse_date((t[4] or "").strip())
-                if d and d.year == y and d.month == m:
-                    out.add(fmt_date(d))
-            return out
+            key = (day_ts(start), day_ts(end))
+            rows = self._get_due_range(key)
+            if rows is None:
+                missing.add(key)
+                return []
+            return rows
+
+        def request_missing():
+            if missing and S.user:
+                # A newer month/day selection cancels the fetch for the previous one
+                S.requests.start(page, "calendar", load_missing, S.user["id"], sorted(missing))
+
+        async def load_missing(user_id: int, keys: list):
+            if self._due_version is None:
+                # Before the ranges: a write racing them is replayed by the next sync
+                due_cache.clear()
+                self._due_version = await adb.run(db.get_change_version, user_id)
+            for start_ts, end_ts in keys:
+                self._put_due_range((start_ts, end_ts), await adb.run(db.get_tasks_due_between, user_id, start_ts, end_ts))
+            refresh_ui()
 
-        def tasks_for_date(d: date):
-            ds = fmt_date(d)
-            out = []
+        async def sync_cached(user_id: int, version: int):
+            # Tasks may have changed on another page since the last visit
+            self._apply_task_changes(await adb.run(db.changes_since, user_id, version, ("tasks",)))
+            refresh_ui()
 
-            for t in all_tasks():
-                due = (t[4] or "").strip()
-                if due_date_only(due) == ds:
-                    out.append(t)
+        def month_tasks(y: int, m: int):
+            start = date(y, m, 1)
+            return tasks_due_between(start, start + timedelta(days=days_in_month(y, m)))
 
-            # Sort tasks by time if the due string has a time part
-            def sort_key(trow):
-                tm = safe_parse_time((trow[4] or "").strip())
-                return tm if tm else (99, 99)
+        def build_due_set(y: int, m: int) -> set[str]:
+            return {fmt_date(t.due.date()) for t in month_tasks(y, m)}
 
-            out.sort(key=sort_key)
-            return out
+        def tasks_for_date(d: date):
+            return tasks_due_between(d, d + timedelta(days=1))
 
         def num_tasks_for_month(y: int, m: int) -> int:
-            cnt = 0
-            for t in all_tasks():
-                d = safe_parse_date((t[4] or "").strip())
-                if d and d.year == y and d.month == m:
-                    cnt += 1
-            return cnt
+            return len(month_tasks(y, m))
 
         def num_holidays_for_month(y: int, m: int) -> int:
             cnt = 0
@@ -228,13 +244,17 @@ class CalendarPage:
             holidays.update(ph_holidays_for_year(S.cal_year))
 
             # update only left/right content to avoid full redraw
-            if self._left_host is not None and getattr(self._left_host, "page", None) is not None:
+            missing.clear()
+            if self._left_host is not None:
                 self._left_host.content = build_left_panel()
-                self._left_host.update()
+                if getattr(self._left_host, "page", None) is not None:
+                    self._left_host.update()
 
-            if self._right_host is not None and getattr(self._right_host, "page", None) is not None:
+            if self._right_host is not None:
                 self._right_host.content = build_right_panel()
-                self._right_host.update()
+                if getattr(self._right_host, "page", None) is not None:
+                    self._right_host.update()
+            request_missing()
 
         # -----------------------------
         # Month navigation
@@ -498,7 +518,7 @@ class CalendarPage:
             else:
                 cards = []
                 for t in items:
-                    (tid, title, desc, cat, due, status, created_at, updated_at) = t
+                    title, desc, cat, due, status = t.title, t.description, t.category, t.due_date, t.status
                     cards.append(
                         ft.Container(
                             padding=14,
@@ -660,6 +680,10 @@ class CalendarPage:
         # -----------------------------
         self._left_host = ft.Container(content=build_left_panel(), expand=5)
         self._right_host = ft.Container(content=build_right_panel(), expand=6)
+        if due_cache and self._due_version is not None:
+            S.requests.start(page, "calendar", sync_cached, user_id, self._due_version)
+        else:
+            request_missing()
 
         board = ft.Container(
             expand=True,
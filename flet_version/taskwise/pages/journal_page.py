@@ -1,8 +1,11 @@
+import asyncio
 import flet as ft
 from datetime import datetime
 from typing import Optional, List
 
 from app.vault import get_secret
+from database import async_db as adb
+from database.models import Journal
 
 # Groq client — imported lazily so missing install doesn't crash the whole app
 try:
@@ -28,16 +31,25 @@ MOOD_COLOR  = {m[0]: m[2] for m in MOODS}
 # ---------------------------------------------------------------------------
 # Groq helpers
 # ---------------------------------------------------------------------------
+# One client per API key (a rotated or reloaded key gets a fresh one)
+_groq_clients = {}
+
+
 def _get_groq_client():
     if not _GROQ_AVAILABLE:
         return None
-    key = get_secret("GROQ_API_KEY", "")
+    key = get_secret("GROQ_API_KEY", "")  # memoized by the vault; no decrypt per request
     if not key:
         return None
-    try:
-        return Groq(api_key=key)
-    except Exception:
-        return None
+    client = _groq_clients.get(key)
+    if client is None:
+        try:
+            client = Groq(api_key=key)
+        except Exception:
+            return None
+        _groq_clients.clear()
+        _groq_clients[key] = client
+    return client
 
 
 def _call_groq(prompt: str, system: str, model: str = "llama-3.3-70b-versatile") -> str:
@@ -114,6 +126,9 @@ class JournalPage:
       - Mood suggestion pre-selects the pill; user can still override manually
       - Response + AI mood persisted to DB (ai_reflection, ai_mood columns)
       - Reloaded automatically when the entry is reopened
+
+    After a save/add/delete only the entries changed since the last load are
+    fetched (db.changes_since) and merged into the list.
     """
 
     def __init__(self, state):
@@ -121,6 +136,10 @@ class JournalPage:
 
         self._search_query: str = ""
         self._selected_id: Optional[int] = None
+        self._entries: Optional[List[Journal]] = None  # last loaded list; None until the first load
+        # Change-feed version _entries was loaded at, and for which (user, search)
+        self._version: Optional[int] = None
+        self._window = None
 
         self._list_host:   Optional[ft.Container] = None
         self._editor_host: Optional[ft.Container] = None
@@ -148,43 +167,100 @@ class JournalPage:
         page.update()
 
     @staticmethod
-    def _fmt_dt(s: str) -> str:
-        try:
-            dt = datetime.fromisoformat((s or "").strip().replace("Z", ""))
-            return dt.strftime("%b %d, %Y  %I:%M %p")
-        except Exception:
-            return (s or "").strip()
+    def _fmt_dt(dt: Optional[datetime], raw: str = "") -> str:
+        # Journal records arrive with created/updated already parsed; raw is shown if that failed
+        if dt is None:
+            return (raw or "").strip()
+        return dt.strftime("%b %d, %Y  %I:%M %p")
 
-    def _get_entries(self) -> List[tuple]:
+    def _get_entries(self) -> List[Journal]:
         S = self.state
         if not S.user:
             return []
-        entries = S.db.get_journals_by_user(S.user["id"])
-        q = self._search_query.strip().lower()
+        q = self._search_query.strip()
         if q:
-            entries = [
-                e for e in entries
-                if q in (e[1] or "").lower() or q in (e[2] or "").lower()
-            ]
-        return entries
+            return S.db.search_journals(S.user["id"], q)
+        return S.db.get_journals_by_user(S.user["id"])
+
+    def _window_key(self):
+        S = self.state
+        return (S.user["id"] if S.user else None, self._search_query.strip())
+
+    def _load_entries(self):
+        # Search results are ranked by relevance, so only the plain list is kept in sync
+        S = self.state
+        synced = bool(S.user) and not self._search_query.strip()
+        version = S.db.get_change_version(S.user["id"]) if synced else None
+        return version, self._get_entries()
+
+    def _merge_changes(self, delta: dict) -> bool:
+        """Applies a changes_since() delta to _entries; False when a reload is needed."""
+        if delta["reset"] or self._entries is None:
+            return False
+        gone = set(delta["deleted_journals"]) | {j.id for j in delta["journals"]}
+        entries = [j for j in self._entries if j.id not in gone] + delta["journals"]
+        # get_journals_by_user order: last updated first
+        self._entries = sorted(entries, key=lambda j: (j.updated_at or "", j.id), reverse=True)
+        self._version = delta["version"]
+        return True
 
     # ------------------------------------------------------------------
     # Refresh helpers
     # ------------------------------------------------------------------
-    def _refresh_list(self, page: ft.Page):
-        if self._list_host and self._build_list:
+    def _refresh_list(self, page: ft.Page, reload: bool = True):
+        """Re-renders the list; with reload, fetches entries off the UI thread first."""
+        if not (self._list_host and self._build_list):
+            return
+        if reload:
+            self.state.requests.start(page, "journal_list", self._reload_list, page)
+        else:
             self._list_host.content = self._build_list(page)
             self._safe_update(self._list_host)
 
+    async def _reload_list(self, page: ft.Page):
+        window = self._window_key()
+        self._version, self._entries = await adb.run(self._load_entries)
+        self._window = window
+        self._list_host.content = self._build_list(page)
+        self._safe_update(self._list_host)
+
+    def _sync_list(self, page: ft.Page):
+        """Like _refresh_list, but fetches only the entries written since the last load."""
+        if self._list_host and self._build_list:
+            self.state.requests.start(page, "journal_list", self._sync_list_async, page)
+
+    async def _sync_list_async(self, page: ft.Page):
+        S = self.state
+        if self._version is None or self._window != self._window_key():
+            return await self._reload_list(page)
+        delta = await adb.run(S.db.changes_since, S.user["id"], self._version, ("journals",))
+        if not self._merge_changes(delta):
+            return await self._reload_list(page)
+        self._list_host.content = self._build_list(page)
+        self._safe_update(self._list_host)
+
     def _refresh_editor(self, page: ft.Page):
+        """Re-renders the editor; the selected entry is fetched off the UI thread first."""
         if self._editor_host and self._build_editor:
-            self._editor_host.content = self._build_editor(page)
-            self._safe_update(self._editor_host)
+            self.state.requests.start(page, "journal_editor", self._reload_editor, page)
+
+    async def _reload_editor(self, page: ft.Page):
+        S = self.state
+        selected = self._selected_id
+        entry = None
+        if selected is not None and S.user:
+            entry = await adb.run(S.db.get_journal, S.user["id"], selected)
+        self._editor_host.content = self._build_editor(page, entry)
+        self._safe_update(self._editor_host)
 
     def _refresh_all(self, page: ft.Page):
         self._refresh_list(page)
         self._refresh_editor(page)
 
+    def _sync_all(self, page: ft.Page):
+        self._sync_list(page)
+        self._refresh_editor(page)
+
     # ------------------------------------------------------------------
     # View
     # ------------------------------------------------------------------
@@ -224,16 +300,21 @@ class JournalPage:
                 dlg.open = False
                 page.update()
 
-            def do_delete(e):
+            async def do_delete(e):
                 if not S.user:
                     return
-                db.delete_journal(S.user["id"], journal_id)
+                try:
+                    await adb.run(db.delete_journal, S.user["id"], journal_id)
+                except Exception as ex:
+                    dlg.open = False
+                    self._snack(page, f"Delete failed: {ex}", C("ERROR_COLOR"))
+                    return
                 dlg.open = False
                 page.update()
                 if self._selected_id == journal_id:
                     self._selected_id = None
                 self._snack(page, "Entry deleted.", C("SUCCESS_COLOR"))
-                self._refresh_all(page)
+                self._sync_all(page)
 
             dlg = ft.AlertDialog(
                 modal=True,
@@ -242,7 +323,7 @@ class JournalPage:
                 content=ft.Text("Are you sure you want to delete this journal entry?", color=C("TEXT_SECONDARY")),
                 actions=[
                     ft.TextButton("Cancel", on_click=close),
-                    ft.ElevatedButton("Delete", on_click=do_delete, bgcolor=C("ERROR_COLOR"), color="white"),
+                    ft.ElevatedButton("Delete", on_click=lambda e: page.run_task(do_delete, e), bgcolor=C("ERROR_COLOR"), color="white"),
                 ],
                 actions_alignment=ft.MainAxisAlignment.END,
                 shape=ft.RoundedRectangleBorder(radius=16),
@@ -255,7 +336,13 @@ class JournalPage:
         # Entry list (left panel)
         # ------------------------------------------------------------------
         def build_entry_list(_page: ft.Page) -> ft.Control:
-            entries = self._get_entries()
+            entries = self._entries
+            if entries is None:
+                return ft.Container(
+                    alignment=ft.alignment.center,
+                    padding=20,
+                    content=ft.ProgressRing(width=28, height=28, stroke_width=3, color=C("BUTTON_COLOR")),
+                )
 
             if not entries:
                 return ft.Container(
@@ -274,24 +361,17 @@ class JournalPage:
 
             cards = []
             for e in entries:
-                # (id, title, content, mood, created_at, updated_at, ai_reflection, ai_mood)
-                eid        = e[0]
-                title      = e[1]
-                content    = e[2]
-                mood       = e[3]
-                created_at = e[4]
-                updated_at = e[5]
-                ai_mood    = e[7] if len(e) > 7 else ""
-
+                eid          = e.id
                 is_selected  = (eid == self._selected_id)
-                display_mood = mood or ai_mood  # prefer manual, fall back to AI
+                display_mood = e.mood or e.ai_mood  # prefer manual, fall back to AI
 
-                preview = (content or "").strip().replace("\n", " ")
+                # Search results carry a match snippet
+                preview = (e.snippet or e.content or "").strip().replace("\n", " ")
                 preview = preview[:80] + "…" if len(preview) > 80 else preview
 
                 def on_select(ev, _id=eid):
                     self._selected_id = _id
-                    self._refresh_list(page)
+                    self._refresh_list(page, reload=False)  # only the highlight changed
                     self._refresh_editor(page)
 
                 def on_delete(ev, _id=eid):
@@ -318,7 +398,7 @@ class JournalPage:
                                     spacing=4,
                                     controls=[
                                         ft.Text(
-                                            title or "Untitled",
+                                            e.title or "Untitled",
                                             size=13,
                                             weight=ft.FontWeight.BOLD,
                                             color="white" if is_selected else C("TEXT_PRIMARY"),
@@ -337,7 +417,7 @@ class JournalPage:
                                             controls=[
                                                 mood_badge(display_mood) if not is_selected else ft.Container(),
                                                 ft.Text(
-                                                    self._fmt_dt(updated_at or created_at),
+                                                    self._fmt_dt(e.updated or e.created, e.updated_at or e.created_at),
                                                     size=10,
                                                     color="white" if is_selected else C("TEXT_SECONDARY"),
                                                 ),
@@ -365,7 +445,8 @@ class JournalPage:
         # ------------------------------------------------------------------
         # Editor (right panel)
         # ------------------------------------------------------------------
-        def build_editor(_page: ft.Page) -> ft.Control:
+        def build_editor(_page: ft.Page, entry: Optional[Journal] = None) -> ft.Control:
+            """entry is the selected journal, already fetched by _reload_editor (None if it's gone)."""
             if self._selected_id is None:
                 return ft.Container(
                     expand=True,
@@ -384,9 +465,6 @@ class JournalPage:
             if not S.user:
                 return ft.Text("Not logged in.", color=C("ERROR_COLOR"))
 
-            entries = db.get_journals_by_user(S.user["id"])
-            entry = next((e for e in entries if e[0] == self._selected_id), None)
-
             if not entry:
                 self._selected_id = None
                 return ft.Container(
@@ -395,14 +473,12 @@ class JournalPage:
                     content=ft.Text("Entry not found.", color=C("TEXT_SECONDARY")),
                 )
 
-            eid          = entry[0]
-            e_title      = entry[1]
-            e_content    = entry[2]
-            e_mood       = entry[3]
-            e_created    = entry[4]
-            e_updated    = entry[5]
-            e_ai_reflect = entry[6] if len(entry) > 6 else ""
-            e_ai_mood    = entry[7] if len(entry) > 7 else ""
+            eid          = entry.id
+            e_title      = entry.title
+            e_content    = entry.content
+            e_mood       = entry.mood
+            e_ai_reflect = entry.ai_reflection
+            e_ai_mood    = entry.ai_mood
 
             # First name for AI prompt
             username = (
@@ -527,7 +603,7 @@ class JournalPage:
                 style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=12)),
             )
 
-            def do_reflect(e):
+            async def do_reflect(e):
                 if self._is_loading:
                     return
                 text = (content_tf.value or "").strip()
@@ -541,8 +617,9 @@ class JournalPage:
                 self._safe_update(reflect_btn)
 
                 try:
-                    reflection     = get_ai_reflection(username, text)
-                    suggested_mood = get_ai_mood(text)
+                    # Network calls: keep them off the event loop (and off the db executor)
+                    reflection     = await asyncio.to_thread(get_ai_reflection, username, text)
+                    suggested_mood = await asyncio.to_thread(get_ai_mood, text)
 
                     # Apply AI mood only if user hasn't manually set one
                     if suggested_mood and not e_mood:
@@ -562,7 +639,8 @@ class JournalPage:
                     self._safe_update(reflect_card)
 
                     # Persist to DB immediately
-                    db.update_journal(
+                    await adb.run(
+                        db.update_journal,
                         S.user["id"],
                         eid,
                         title_tf.value or "",
@@ -571,7 +649,7 @@ class JournalPage:
                         ai_reflection=reflection,
                         ai_mood=suggested_mood,
                     )
-                    self._refresh_list(page)
+                    self._sync_list(page)
 
                 except Exception as ex:
                     self._snack(page, f"Reflection failed: {ex}", C("ERROR_COLOR"))
@@ -581,18 +659,18 @@ class JournalPage:
                     reflect_spinner.visible = False
                     self._safe_update(reflect_btn)
 
-            reflect_btn.on_click = do_reflect
+            reflect_btn.on_click = lambda e: page.run_task(do_reflect, e)
 
             # ----------------------------------------
             # Timestamps
             # ----------------------------------------
             created_label = ft.Text(
-                f"Created  {self._fmt_dt(e_created)}",
+                f"Created  {self._fmt_dt(entry.created, entry.created_at)}",
                 size=11,
                 color=C("TEXT_SECONDARY"),
             )
             updated_label = ft.Text(
-                f"Last saved  {self._fmt_dt(e_updated)}",
+                f"Last saved  {self._fmt_dt(entry.updated, entry.updated_at)}",
                 size=11,
                 color=C("TEXT_SECONDARY"),
             )
@@ -600,12 +678,13 @@ class JournalPage:
             # ----------------------------------------
             # Save
             # ----------------------------------------
-            def save(e):
+            async def save(e):
                 if not S.user or self._is_loading:
                     return
                 self._is_loading = True
                 try:
-                    db.update_journal(
+                    await adb.run(
+                        db.update_journal,
                         S.user["id"],
                         eid,
                         title_tf.value or "",
@@ -615,7 +694,7 @@ class JournalPage:
                         ai_mood=e_ai_mood or "",
                     )
                     self._snack(page, "Entry saved!", C("SUCCESS_COLOR"))
-                    self._refresh_list(page)
+                    self._sync_list(page)
                     now_str = datetime.now().strftime("%b %d, %Y  %I:%M %p")
                     updated_label.value = f"Last saved  {now_str}"
                     self._safe_update(updated_label)
@@ -688,7 +767,7 @@ class JournalPage:
                                     ft.ElevatedButton(
                                         "Save",
                                         icon=ft.Icons.SAVE_OUTLINED,
-                                        on_click=save,
+                                        on_click=lambda e: page.run_task(save, e),
                                         bgcolor=C("BUTTON_COLOR"),
                                         color="white",
                                     ),
@@ -704,20 +783,17 @@ class JournalPage:
         # ------------------------------------------------------------------
         # New entry
         # ------------------------------------------------------------------
-        def new_entry(e):
+        async def new_entry(e):
             if not S.user or self._is_loading:
                 return
             self._is_loading = True
             try:
-                db.add_journal(S.user["id"], title="", content="", mood="")
-                entries = db.get_journals_by_user(S.user["id"])
-                if entries:
-                    self._selected_id = entries[0][0]
+                self._selected_id = await adb.run(db.add_journal, S.user["id"], title="", content="", mood="")
             except Exception as ex:
                 self._snack(page, f"Could not create entry: {ex}", S.colors.get("ERROR_COLOR", "#EF4444"))
             finally:
                 self._is_loading = False
-            self._refresh_all(page)
+            self._sync_all(page)
 
         # ------------------------------------------------------------------
         # Search
@@ -750,14 +826,21 @@ class JournalPage:
             )
         else:
             self._list_host.content = self._build_list(page)
+        # Coming back to the page: catch up on entries changed since the last visit
+        self._sync_list(page)
 
+        # With an entry selected, show a spinner until _reload_editor has fetched it
+        editor = self._build_editor(page) if self._selected_id is None else ft.Container(
+            alignment=ft.alignment.center,
+            padding=20,
+            content=ft.ProgressRing(width=28, height=28, stroke_width=3, color=C("BUTTON_COLOR")),
+        )
         if not self._editor_host:
-            self._editor_host = ft.Container(
-                expand=True,
-                content=self._build_editor(page),
-            )
+            self._editor_host = ft.Container(expand=True, content=editor)
         else:
-            self._editor_host.content = self._build_editor(page)
+            self._editor_host.content = editor
+        if self._selected_id is not None:
+            self._refresh_editor(page)
 
         # ------------------------------------------------------------------
         # Panels
@@ -778,7 +861,7 @@ class JournalPage:
                             ft.Text("Journal", size=20, weight=ft.FontWeight.BOLD, color=C("TEXT_PRIMARY")),
                             ft.ElevatedButton(
                                 "✦  New Entry",
-                                on_click=new_entry,
+                                on_click=lambda e: page.run_task(new_entry, e),
                                 bgcolor=C("BUTTON_COLOR"),
                                 color="white",
                             ),
@@ -1,6 +1,9 @@
+from collections.abc import Mapping
 import flet as ft
+from database import async_db as adb
+from database import transfer
 from taskwise.theme import THEMES
-from passlib.hash import bcrypt
+from app import passwords
 
 
 class SettingsPage:
@@ -10,6 +13,9 @@ class SettingsPage:
 
     def __init__(self, state):
         self.S = state
+        # Added to page.overlay on first use, then reused across re-renders
+        self._export_picker = None
+        self._import_picker = None
 
     def view(self, page: ft.Page):
         S = self.S
@@ -39,7 +45,7 @@ class SettingsPage:
                 return profile
 
             # Pull what we can from the session user object first
-            if isinstance(S.user, dict):
+            if isinstance(S.user, Mapping):
                 profile["id"] = S.user.get("id")
                 profile["role"] = S.user.get("role", "")
                 profile["username"] = S.user.get("username") or profile["username"]
@@ -71,7 +77,7 @@ class SettingsPage:
 
                 # Normalize whatever format the DB returns (dict or tuple)
                 if user_row:
-                    if isinstance(user_row, dict):
+                    if isinstance(user_row, Mapping):
                         profile["id"] = user_row.get("id", profile["id"])
                         profile["email"] = user_row.get("email") or profile["email"]
                         profile["name"] = user_row.get("name") or user_row.get("username") or profile["name"]
@@ -155,11 +161,54 @@ class SettingsPage:
                 width=400,
             )
 
+            progress_bar = ft.ProgressBar(value=0, color=C("ERROR_COLOR"), visible=False)
+            progress_text = ft.Text("", size=12, color=C("TEXT_SECONDARY"), visible=False)
+
             def close_dlg(e):
                 dlg.open = False
                 page.update()
 
-            def do_delete(e):
+            def finish_delete():
+                # Close dialog and show success message first
+                dlg.open = False
+                page.snack_bar = ft.SnackBar(
+                    content=ft.Text("Account deleted successfully."),
+                    bgcolor=C("SUCCESS_COLOR"),
+                )
+                page.snack_bar.open = True
+                page.update()
+
+                # Clear state and redirect to homepage (same path as logout)
+                try:
+                    S.on_account_deleted()
+                except Exception:
+                    # Fallback: manually clear and call logout if on_account_deleted isn't available
+                    try:
+                        S.user = None
+                        if hasattr(S, "_on_delete_account_callback") and S._on_delete_account_callback:
+                            S._on_delete_account_callback()
+                    except Exception:
+                        pass
+
+            def on_purge_progress(prog):
+                # Called from the purge thread after every chunk
+                total = prog.get("total") or 0
+                progress_bar.value = 1 if not total else prog.get("done", 0) / total
+                progress_text.value = f"Removing your data... {prog.get('done', 0)} of {total}"
+
+                if prog.get("error"):
+                    dlg.open = False
+                    page.snack_bar = ft.SnackBar(
+                        content=ft.Text(f"Delete failed: {prog['error']}"), bgcolor=C("ERROR_COLOR")
+                    )
+                    page.snack_bar.open = True
+                    page.update()
+                elif prog.get("finished"):
+                    finish_delete()
+                else:
+                    page.update()
+
+            async def do_delete(e):
                 # Require password input
                 if not password_field.value or not password_field.value.strip():
                     page.snack_bar = ft.SnackBar(content=ft.Text("Please enter your password."), bgcolor=C("ERROR_COLOR"))
@@ -185,7 +234,7 @@ class SettingsPage:
 
                 # Extract password hash (supports dict or tuple returns)
                 password_hash = None
-                if isinstance(user, dict):
+                if isinstance(user, Mapping):
                     password_hash = user.get("password_hash") or user.get("password")
                 else:
                     password_hash = user[3] if len(user) > 3 else None
@@ -196,48 +245,33 @@ class SettingsPage:
                                 break
 
                 # Validate password
-                if not password_hash or not bcrypt.verify(password_field.value, password_hash):
+                if not password_hash or not await passwords.verify_password(password_field.value, password_hash):
                     page.snack_bar = ft.SnackBar(content=ft.Text("Incorrect password."), bgcolor=C("ERROR_COLOR"))
                     page.snack_bar.open = True
                     page.update()
                     return
 
-                # Delete the user and their related data
+                # Hide the account now; its data is purged in the background with progress
                 try:
                     if hasattr(db, "delete_user"):
-                        db.delete_user(p["id"])
+                        password_field.disabled = True
+                        progress_bar.visible = True
+                        progress_text.visible = True
+                        dlg.actions = []
+                        page.update()
+                        db.delete_user(p["id"], background=True, on_progress=on_purge_progress)
                     else:
                         page.snack_bar = ft.SnackBar(content=ft.Text("Delete function not available."), bgcolor=C("ERROR_COLOR"))
                         page.snack_bar.open = True
                         page.update()
                         return
                 except Exception as ex:
+                    dlg.open = False
                     page.snack_bar = ft.SnackBar(content=ft.Text(f"Delete failed: {str(ex)}"), bgcolor=C("ERROR_COLOR"))
                     page.snack_bar.open = True
                     page.update()
                     return
 
-                # Close dialog and show success message first
-                dlg.open = False
-                page.snack_bar = ft.SnackBar(
-                    content=ft.Text("Account deleted successfully."),
-                    bgcolor=C("SUCCESS_COLOR"),
-                )
-                page.snack_bar.open = True
-                page.update()
-
-                # Clear state and redirect to homepage (same path as logout)
-                try:
-                    S.on_account_deleted()
-                except Exception:
-                    # Fallback: manually clear and call logout if on_account_deleted isn't available
-                    try:
-                        S.user = None
-                        if hasattr(S, "_on_delete_account_callback") and S._on_delete_account_callback:
-                            S._on_delete_account_callback()
-                    except Exception:
-                        pass
-
             dlg = ft.AlertDialog(
                 modal=True,
                 bgcolor=C("FORM_BG"),
@@ -245,7 +279,7 @@ class SettingsPage:
                 content=ft.Container(
                     width=450,
                     padding=8,
-                    height=180,
+                    height=210,
                     content=ft.Column(
                         spacing=12,
                         controls=[
@@ -262,12 +296,14 @@ class SettingsPage:
                             ),
                             ft.Divider(height=1, color=C("BORDER_COLOR")),
                             password_field,
+                            progress_bar,
+                            progress_text,
                         ],
                     ),
                 ),
                 actions=[
                     ft.TextButton("Cancel", on_click=close_dlg),
-                    ft.ElevatedButton("Delete My Account", on_click=do_delete, bgcolor=C("ERROR_COLOR"), color="white"),
+                    ft.ElevatedButton("Delete My Account", on_click=lambda e: page.run_task(do_delete, e), bgcolor=C("ERROR_COLOR"), color="white"),
                 ],
                 shape=ft.RoundedRectangleBorder(radius=16),
             )
@@ -275,6 +311,71 @@ class SettingsPage:
             dlg.open = True
             page.update()
 
+        # -----------------------------
+        # Export / import data (streamed to/from disk off the UI thread)
+        # -----------------------------
+        def transfer_snack(text: str, color_key: str):
+            page.snack_bar = ft.SnackBar(content=ft.Text(text), bgcolor=C(color_key))
+            page.snack_bar.open = True
+            page.update()
+
+        async def run_transfer(label: str, fn, path: str):
+            user_id = get_user_profile().get("id")
+            transfer_snack(f"{label}...", "BUTTON_COLOR")
+            try:
+                counts = await adb.run(fn, user_id, path)
+                if fn is transfer.import_user:
+                    await adb.run(S.reload_settings)
+                    S.refresh_badge()
+            except Exception as ex:
+                transfer_snack(f"{label} failed: {ex}", "ERROR_COLOR")
+                return
+            transfer_snack(
+                f"{label} done: {counts['task']} tasks, {counts['journal']} journal entries, "
+                f"{counts['setting']} settings.",
+                "SUCCESS_COLOR",
+            )
+
+        def on_export_result(e: ft.FilePickerResultEvent):
+            if e.path:
+                page.run_task(run_transfer, "Export", transfer.export_user, e.path)
+
+        def on_import_result(e: ft.FilePickerResultEvent):
+            if e.files:
+                page.run_task(run_transfer, "Import", transfer.import_user, e.files[0].path)
+
+        def ensure_pickers():
+            if self._export_picker is None:
+                self._export_picker = ft.FilePicker()
+                self._import_picker = ft.FilePicker()
+                page.overlay.extend([self._export_picker, self._import_picker])
+                page.update()
+            # Re-bound on every render so the handlers see this render's closures
+            self._export_picker.on_result = on_export_result
+            self._import_picker.on_result = on_import_result
+
+        def start_export():
+            if not get_user_profile().get("id"):
+                transfer_snack("Please login first.", "ERROR_COLOR")
+                return
+            ensure_pickers()
+            self._export_picker.save_file(
+                dialog_title="Export your TaskWise data",
+                file_name="taskwise-export.jsonl",
+                allowed_extensions=["jsonl", "csv", "zst"],
+            )
+
+        def start_import():
+            if not get_user_profile().get("id"):
+                transfer_snack("Please login first.", "ERROR_COLOR")
+                return
+            ensure_pickers()
+            self._import_picker.pick_files(
+                dialog_title="Import TaskWise data",
+                allowed_extensions=["jsonl", "csv", "zst"],
+                allow_multiple=False,
+            )
+
         # -----------------------------
         # Change password dialog
         # -----------------------------
@@ -305,7 +406,7 @@ class SettingsPage:
 
             def _extract_user_id_and_hash(user_obj, fallback_id):
                 # dict format
-                if isinstance(user_obj, dict):
+                if isinstance(user_obj, Mapping):
                     uid = user_obj.get("id", fallback_id)
                     ph = user_obj.get("password_hash") or user_obj.get("password")
                     return uid, ph
@@ -346,7 +447,7 @@ class SettingsPage:
 
                 return False
 
-            def save(e):
+            async def save(e):
                 p = get_user_profile()
                 if not S.user or not p.get("id"):
                     toast("Please login first.")
@@ -398,7 +499,7 @@ class SettingsPage:
 
                 # Verify current password
                 try:
-                    ok = bcrypt.verify(cur, password_hash)
+                    ok = await passwords.verify_password(cur, password_hash)
                 except Exception:
                     ok = False
 
@@ -408,7 +509,7 @@ class SettingsPage:
 
                 # Hash and save new password
                 try:
-                    new_hash = bcrypt.hash(newp)
+                    new_hash = await passwords.hash_password(newp)
                 except Exception:
                     toast("Failed to hash password.")
                     return
@@ -437,7 +538,7 @@ class SettingsPage:
                 ),
                 actions=[
                     ft.TextButton("Cancel", on_click=lambda e: close_dialog(dlg)),
-                    ft.ElevatedButton("Save", on_click=save, bgcolor=C("BUTTON_COLOR"), color="white"),
+                    ft.ElevatedButton("Save", on_click=lambda e: page.run_task(save, e), bgcolor=C("BUTTON_COLOR"), color="white"),
                 ],
                 shape=ft.RoundedRectangleBorder(radius=16),
             )
@@ -558,6 +659,10 @@ class SettingsPage:
                 tile(ft.Icons.PERSON, "Account", "View profile information", on_click=lambda e: show_account_dialog()),
                 tile(ft.Icons.LOCK, "Change Password", "Update your password", on_click=lambda e: show_change_password_dialog()),
                 tile(ft.Icons.DELETE_FOREVER, "Delete Account", "Remove this account permanently", on_click=lambda e: confirm_delete_account()),
+
+                ft.Text("Data", size=13, weight=ft.FontWeight.BOLD, color=C("TEXT_PRIMARY")),
+                tile(ft.Icons.DOWNLOAD, "Export Data", "Save tasks, journals and settings (.jsonl, .csv, .zst)", on_click=lambda e: start_export()),
+                tile(ft.Icons.UPLOAD, "Import Data", "Add entries from an earlier export", on_click=lambda e: start_import()),
             ],
         )
 
@@ -2,6 +2,9 @@ import flet as ft
 from datetime import datetime, date
 from typing import Optional, List
 
+from database import async_db as adb
+from database.db import DEFAULT_TASK_SORT, TASK_SORTS, now_due_ts, parse_due_datetime, task_sort_key
+from database.models import Task, TaskStatus
 from taskwise.theme import CATEGORIES  # ["Personal","Work","Study","Others","Bills"]
 
 
@@ -14,14 +17,28 @@ class TaskPage:
     - Safe snackbars on failures.
     - Keeps: pie empty state, search without flicker, edit/delete, confirm delete,
       sorting menu, drag-to-reorder for Custom, DatePicker + TimePicker.
+    - Multi-select: complete / delete the selected tasks in one DB transaction.
     - Blank title → auto-assigns "Untitled (N)" with gap reuse.
     - Blank category → falls back to "Others".
+    - Filtering, search and sorting run in SQL; the list loads one page at a time.
+    - DB calls run on the async_db executor, so the UI keeps painting while they work.
+    - After an edit only the changed rows are fetched (db.changes_since) and merged in.
     """
 
+    PAGE_SIZE = 50
+
     def __init__(self, state):
         self.state = state
         self.search_query = ""
 
+        # Paging: rows currently shown + keyset cursor for the next page
+        self._loaded_tasks: List[Task] = []
+        self._next_cursor = None
+
+        # Change-feed version the window was loaded at, and what it was loaded for
+        self._version: Optional[int] = None
+        self._window = None
+
         # Stateful controls (avoid rebuild flicker)
         self._search_tf: Optional[ft.TextField] = None
         self._task_list_host: Optional[ft.Container] = None
@@ -38,6 +55,11 @@ class TaskPage:
         # Custom ordering (drag-to-reorder)
         self._custom_order_ids: List[int] = []
 
+        # Multi-select (bulk complete / delete)
+        self._select_mode: bool = False
+        self._selected_ids: set = set()
+        self._selection_bar: Optional[ft.Container] = None
+
         # Loading overlay
         self._loading_overlay: Optional[ft.Container] = None
         self._is_loading: bool = False
@@ -46,6 +68,7 @@ class TaskPage:
         self._build_task_list = None
         self._build_analytics_panel = None
         self._build_filter_bar = None
+        self._build_selection_bar = None
 
     # ---------------------------
     # Utilities
@@ -105,28 +128,7 @@ class TaskPage:
 
     @staticmethod
     def _safe_parse_datetime(s: Optional[str]) -> Optional[datetime]:
-        try:
-            s = (s or "").strip()
-            if not s:
-                return None
-
-            s = s.replace("T", " ")
-
-            for fmt in ("%Y-%m-%d %I:%M %p", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
-                try:
-                    dt = datetime.strptime(s, fmt)
-                    if fmt == "%Y-%m-%d":
-                        return datetime(dt.year, dt.month, dt.day, 23, 59)
-                    return dt
-                except Exception:
-                    continue
-
-            try:
-                return datetime.fromisoformat(s)
-            except Exception:
-                return None
-        except Exception:
-            return None
+        return parse_due_datetime(s)
 
     @staticmethod
     def _mounted(control: Optional[ft.Control]) -> bool:
@@ -136,33 +138,6 @@ class TaskPage:
         if self._mounted(control):
             control.update()
 
-    # ---------------------------
-    # Auto-title helper
-    # ---------------------------
-    def _next_untitled(self, existing_tasks: List[tuple]) -> str:
-        """
-        Returns the next available Untitled title with gap reuse:
-          first gap → "Untitled"
-          second    → "Untitled (1)"
-          third     → "Untitled (2)"  ...and so on.
-        Uses 0 internally to represent the bare "Untitled" slot.
-        """
-        used_nums = set()
-        for t in existing_tasks:
-            t_title = (t[1] or "").strip()
-            if t_title == "Untitled":
-                used_nums.add(0)
-            elif t_title.startswith("Untitled (") and t_title.endswith(")"):
-                try:
-                    n = int(t_title[len("Untitled ("):-1])
-                    used_nums.add(n)
-                except ValueError:
-                    pass
-        n = 0
-        while n in used_nums:
-            n += 1
-        return "Untitled" if n == 0 else f"Untitled ({n})"
-
     # ---------------------------
     # Loading helpers
     # ---------------------------
@@ -214,8 +189,12 @@ class TaskPage:
         if self._is_loading:
             return
         self._set_loading(page, True)
+        # Writes aren't tracked in state.requests: they must finish even if the user navigates away
+        page.run_task(self._run_with_loading_async, page, fn, on_error_message, error_color, success_fn)
+
+    async def _run_with_loading_async(self, page: ft.Page, fn, on_error_message: str, error_color: str, success_fn=None):
         try:
-            fn()
+            await adb.run(fn)
             if success_fn:
                 success_fn()
         except Exception:
@@ -232,77 +211,137 @@ class TaskPage:
     def _set_sort_mode(self, mode: str):
         self.state.current_sort = mode
 
-    def _ensure_custom_order(self, tasks: List[tuple]):
-        ids = [t[0] for t in tasks]
+    def _ensure_custom_order(self, tasks: List[Task]):
+        ids = [t.id for t in tasks]
         current = [i for i in self._custom_order_ids if i in ids]
         missing = [i for i in ids if i not in current]
         self._custom_order_ids = current + missing
 
-    def _sort_tasks(self, tasks: List[tuple]) -> List[tuple]:
+    def _sort_tasks(self, tasks: List[Task]) -> List[Task]:
         mode = self._get_sort_mode()
 
         if mode == "Title (A-Z)":
-            return sorted(tasks, key=lambda t: (t[1] or "").strip().lower())
+            return sorted(tasks, key=lambda t: (t.title or "").strip().lower())
         if mode == "Title (Z-A)":
-            return sorted(tasks, key=lambda t: (t[1] or "").strip().lower(), reverse=True)
+            return sorted(tasks, key=lambda t: (t.title or "").strip().lower(), reverse=True)
 
         if mode == "Due Date":
-
-            def due_key(t):
-                dt = self._safe_parse_datetime(t[4])
-                return (dt is None, dt or datetime.max)
-
-            return sorted(tasks, key=due_key)
+            return sorted(tasks, key=lambda t: (t.due_ts is None, t.due_ts or 0))
 
         if mode == "Date Created":
-
-            def created_key(t):
-                s = (t[6] or "").strip()
-                try:
-                    return datetime.fromisoformat(s.replace("Z", "+00:00"))
-                except Exception:
-                    return datetime.min
-
-            return sorted(tasks, key=created_key, reverse=True)
+            return sorted(tasks, key=lambda t: t.created or datetime.min, reverse=True)
 
         self._ensure_custom_order(tasks)
         order_index = {tid: idx for idx, tid in enumerate(self._custom_order_ids)}
-        return sorted(tasks, key=lambda t: order_index.get(t[0], 10**9))
+        return sorted(tasks, key=lambda t: order_index.get(t.id, 10**9))
 
     # ---------------------------
     # Data helpers
     # ---------------------------
-    def _get_filtered_tasks(self) -> List[tuple]:
-        S = self.state
-        db = S.db
+    def _ranked_search(self) -> bool:
+        # A search with no explicit sort shows best matches first
+        return bool((self.search_query or "").strip()) and self._get_sort_mode() == "Custom"
 
+    def _query_page(self, after=None, limit: Optional[int] = None):
+        S = self.state
         if not S.user:
-            return []
-
-        tasks = db.get_tasks_by_user(S.user["id"])
+            return [], None
 
         current_filter = getattr(S, "current_filter", "All Tasks")
-        if current_filter != "All Tasks":
-            wanted = current_filter.lower().strip()
-            tasks = [t for t in tasks if (t[3] or "").strip().lower() == wanted]
+        if self._ranked_search():
+            return S.db.search_tasks(
+                S.user["id"],
+                self.search_query,
+                category=None if current_filter == "All Tasks" else current_filter,
+                after=after,
+                limit=limit or self.PAGE_SIZE,
+            )
+
+        return S.db.query_tasks(
+            S.user["id"],
+            category=None if current_filter == "All Tasks" else current_filter,
+            text=self.search_query,
+            sort=self._get_sort_mode(),
+            after=after,
+            limit=limit or self.PAGE_SIZE,
+        )
 
-        q = (self.search_query or "").strip().lower()
-        if q:
+    def _ordered_loaded(self) -> List[Task]:
+        # SQL already ordered the rows; only Custom order is applied client-side
+        if self._get_sort_mode() == "Custom" and not self._ranked_search():
+            return self._sort_tasks(self._loaded_tasks)
+        return list(self._loaded_tasks)
 
-            def ok(t):
-                title = (t[1] or "").lower()
-                desc = (t[2] or "").lower()
-                return q in title or q in desc
+    def _reset_paging(self):
+        self._loaded_tasks = []
+        self._next_cursor = None
+        self._version = None
 
-            tasks = [t for t in tasks if ok(t)]
+    def _window_key(self):
+        S = self.state
+        return (
+            S.user["id"] if S.user else None,
+            getattr(S, "current_filter", "All Tasks"),
+            self._get_sort_mode(),
+            (self.search_query or "").strip(),
+        )
+
+    def _load_window(self, limit: int):
+        # The version is read first: a write racing the query is replayed by the next sync
+        S = self.state
+        version = S.db.get_change_version(S.user["id"]) if S.user else None
+        return (version,) + tuple(self._query_page(limit=limit))
 
-        return self._sort_tasks(tasks)
+    def _merge_task_changes(self, delta: dict) -> bool:
+        """
+        Applies a changes_since() delta to the loaded window in place. Returns
+        False when the window has to be reloaded instead (pruned history, or a
+        full-text search the rows can't be matched against here).
+        """
+        if delta["reset"] or self._window_key()[3]:
+            return False
 
-    def _is_overdue(self, due_date_str: Optional[str], status: str) -> bool:
-        if not due_date_str or (status or "").strip().lower() != "pending":
+        current_filter = getattr(self.state, "current_filter", "All Tasks")
+        category = None if current_filter == "All Tasks" else current_filter.strip().lower()
+        sort = self._get_sort_mode()
+        descending = TASK_SORTS.get(sort, TASK_SORTS[DEFAULT_TASK_SORT])[1] == "DESC"
+
+        def in_window(t: Task) -> bool:
+            if category and (t.category or "").strip().lower() != category:
+                return False
+            if self._next_cursor is None:
+                return True
+            # Rows past the cursor arrive with "Load more"
+            key = task_sort_key(t, sort)
+            return key >= tuple(self._next_cursor) if descending else key <= tuple(self._next_cursor)
+
+        gone = set(delta["deleted_tasks"]) | {t.id for t in delta["tasks"]}
+        rows = [t for t in self._loaded_tasks if t.id not in gone]
+        rows.extend(t for t in delta["tasks"] if in_window(t))
+        self._loaded_tasks = sorted(rows, key=lambda t: task_sort_key(t, sort), reverse=descending)
+        self._version = delta["version"]
+        return True
+
+    def _get_filtered_tasks(self) -> List[Task]:
+        """
+        Reloads the visible window from the DB. Keeps as many rows as were
+        already loaded (so edits don't collapse "Load more"), at least one page.
+        """
+        limit = max(self.PAGE_SIZE, len(self._loaded_tasks))
+        self._loaded_tasks, self._next_cursor = self._query_page(limit=limit)
+        return self._ordered_loaded()
+
+    def _load_more_tasks(self) -> List[Task]:
+        if self._next_cursor is None:
+            return self._ordered_loaded()
+        rows, self._next_cursor = self._query_page(after=self._next_cursor)
+        self._loaded_tasks = self._loaded_tasks + rows
+        return self._ordered_loaded()
+
+    def _is_overdue(self, due_ts: Optional[int], status: str) -> bool:
+        if due_ts is None or TaskStatus.parse(status) != TaskStatus.PENDING:
             return False
-        dt = self._safe_parse_datetime(due_date_str)
-        return bool(dt and dt < datetime.now())
+        return due_ts < now_due_ts()
 
     # ---------------------------
     # Refresh helpers (NO rebuild of hosts)
@@ -310,13 +349,52 @@ class TaskPage:
     def _refresh_task_list(self, page: ft.Page):
         if not (self._task_list_host and self._build_task_list):
             return
-        self._task_list_host.content = self._build_task_list(page)
+        # A newer refresh (e.g. the next search keystroke) cancels the one in flight
+        self.state.requests.start(page, "task_list", self._reload_task_list, page)
+
+    async def _reload_task_list(self, page: ft.Page):
+        limit = max(self.PAGE_SIZE, len(self._loaded_tasks))
+        window = self._window_key()
+        self._version, self._loaded_tasks, self._next_cursor = await adb.run(self._load_window, limit)
+        self._window = window
+        self._render_task_list(page)
+
+    def _render_task_list(self, page: ft.Page):
+        """Re-renders the loaded rows as they are (selection, drag order); no query."""
+        if not (self._task_list_host and self._build_task_list):
+            return
+        self._task_list_host.content = self._build_task_list(page, self._ordered_loaded())
         self._safe_update(self._task_list_host)
 
+    def _sync_task_list(self, page: ft.Page):
+        """Like _refresh_task_list, but fetches only the rows written since the last load."""
+        if not (self._task_list_host and self._build_task_list):
+            return
+        self.state.requests.start(page, "task_list", self._sync_task_list_async, page)
+
+    async def _sync_task_list_async(self, page: ft.Page):
+        S = self.state
+        if self._version is None or not S.user or self._window != self._window_key():
+            return await self._reload_task_list(page)
+
+        delta = await adb.run(S.db.changes_since, S.user["id"], self._version, ("tasks",))
+        if not self._merge_task_changes(delta):
+            return await self._reload_task_list(page)
+        self._render_task_list(page)
+
     def _refresh_analytics(self, page: ft.Page):
         if not (self._analytics_host and self._build_analytics_panel):
             return
-        self._analytics_host.content = self._build_analytics_panel(page)
+        self.state.requests.start(page, "analytics", self._reload_analytics, page)
+
+    async def _reload_analytics(self, page: ft.Page):
+        S = self.state
+        if not S.user:
+            self._analytics_host.content = self._build_analytics_panel(page, None, 0)
+        else:
+            stats = await adb.run(S.db.get_task_stats, S.user["id"])
+            overdue = await adb.run(S.db.count_overdue_tasks, S.user["id"], now_due_ts())
+            self._analytics_host.content = self._build_analytics_panel(page, stats, overdue)
         self._safe_update(self._analytics_host)
 
     def _refresh_filter_ui(self, page: ft.Page, C):
@@ -335,13 +413,40 @@ class TaskPage:
         self._refresh_task_list(page)
         self._refresh_analytics(page)
 
+    def _sync_all(self, page: ft.Page, C):
+        # After this page's own writes: same window, so only the delta is needed
+        self._refresh_filter_ui(page, C)
+        self._sync_task_list(page)
+        self._refresh_analytics(page)
+
     # ---------------------------
     # Search handler
     # ---------------------------
     def _on_search_change(self, e, page: ft.Page, C):
         self.search_query = e.control.value or ""
+        self._reset_paging()
         self._refresh_task_list(page)
 
+    # ---------------------------
+    # Multi-select helpers
+    # ---------------------------
+    def _set_select_mode(self, value: bool):
+        self._select_mode = value
+        self._selected_ids = set()
+
+    def _toggle_selected(self, task_id: int, selected: bool):
+        if selected:
+            self._selected_ids.add(task_id)
+        else:
+            self._selected_ids.discard(task_id)
+
+    def _refresh_selection_bar(self, page: ft.Page):
+        if not (self._selection_bar and self._build_selection_bar):
+            return
+        self._selection_bar.visible = self._select_mode
+        self._selection_bar.content = self._build_selection_bar(page)
+        self._safe_update(self._selection_bar)
+
     # ---------------------------
     # View
     # ---------------------------
@@ -435,9 +540,7 @@ class TaskPage:
                     if self._is_loading:
                         return
                     self._set_sort_mode(mode)
-                    if mode == "Custom":
-                        current_tasks = self._get_filtered_tasks()
-                        self._ensure_custom_order(current_tasks)
+                    self._reset_paging()
                     self._refresh_task_list(page)
 
                 return _h
@@ -459,6 +562,15 @@ class TaskPage:
         # Delete confirm dialog
         # ---------------------------
         def confirm_delete(task_id: int):
+            open_delete_dialog([task_id], "Are you sure you want to delete this?", "Task deleted!")
+
+        def confirm_delete_selected():
+            ids = list(self._selected_ids)
+            if not ids:
+                return
+            open_delete_dialog(ids, f"Delete {len(ids)} selected task(s)?", f"{len(ids)} task(s) deleted!")
+
+        def open_delete_dialog(task_ids: List[int], message: str, done_text: str):
             def close_dlg(e):
                 dlg.open = False
                 page.update()
@@ -469,15 +581,21 @@ class TaskPage:
                     return
 
                 def work():
-                    db.delete_task(S.user["id"], task_id)
-                    self._custom_order_ids = [i for i in self._custom_order_ids if i != task_id]
+                    if len(task_ids) == 1:
+                        db.delete_task(S.user["id"], task_ids[0])
+                    else:
+                        db.delete_tasks_bulk(S.user["id"], task_ids)
+                    gone = set(task_ids)
+                    self._custom_order_ids = [i for i in self._custom_order_ids if i not in gone]
+                    self._selected_ids -= gone
 
                 def after():
                     dlg.open = False
                     page.update()
-                    self._snack(page, "Task deleted!", C("SUCCESS_COLOR"))
+                    self._snack(page, done_text, C("SUCCESS_COLOR"))
                     S.refresh_badge()
-                    self._refresh_all(page, C)
+                    self._sync_all(page, C)
+                    self._refresh_selection_bar(page)
 
                 self._run_with_loading(
                     page=page,
@@ -491,7 +609,7 @@ class TaskPage:
                 modal=True,
                 bgcolor=C("FORM_BG"),
                 title=ft.Text("Delete Task", size=18, weight=ft.FontWeight.BOLD, color=C("TEXT_PRIMARY")),
-                content=ft.Text("Are you sure you want to delete this?", color=C("TEXT_SECONDARY")),
+                content=ft.Text(message, color=C("TEXT_SECONDARY")),
                 actions=[
                     ft.TextButton("Cancel", on_click=close_dlg),
                     ft.ElevatedButton("Delete", on_click=do_delete, bgcolor=C("ERROR_COLOR"), color=ft.Colors.WHITE),
@@ -589,13 +707,10 @@ class TaskPage:
                     self._snack(page, "No user logged in.", C("ERROR_COLOR"))
                     return
 
+                # Blank title: db assigns the lowest free "Untitled (N)" inside the insert
                 title = (title_tf.value or "").strip()
-                # Auto-assign "Untitled (N)" with gap reuse if title is blank
-                if not title:
-                    existing = db.get_tasks_by_user(S.user["id"])
-                    title = self._next_untitled(existing)
 
-                # Length guards (only after auto-title is resolved)
+                # Length guards
                 if len(title) > 80:
                     self._snack(page, "Task name is too long. Please keep it under 80 characters.", C("ERROR_COLOR"))
                     return
@@ -628,12 +743,7 @@ class TaskPage:
                     page.update()
                     self._snack(page, "Task added!", C("SUCCESS_COLOR"))
                     S.refresh_badge()
-
-                    if self._get_sort_mode() == "Custom":
-                        current_tasks = self._get_filtered_tasks()
-                        self._ensure_custom_order(current_tasks)
-
-                    self._refresh_all(page, C)
+                    self._sync_all(page, C)
 
                 self._run_with_loading(
                     page=page,
@@ -697,17 +807,13 @@ class TaskPage:
             dialog.open = True
             page.update()
 
-        def show_edit_task_dialog(task_row: tuple):
-            (
-                task_id,
-                old_title,
-                old_desc,
-                old_category,
-                old_due,
-                old_status,
-                old_created_at,
-                old_updated_at,
-            ) = task_row
+        def show_edit_task_dialog(task: Task):
+            task_id = task.id
+            old_title = task.title
+            old_desc = task.description
+            old_category = task.category
+            old_due = task.due_date
+            old_status = task.status
 
             old_due_str = (old_due or "").strip()
             old_date_part = old_due_str
@@ -807,15 +913,10 @@ class TaskPage:
                     self._snack(page, "No user logged in.", C("ERROR_COLOR"))
                     return
 
+                # Cleared title: db assigns the lowest free "Untitled (N)" (this task's own included)
                 title = (title_tf.value or "").strip()
-                # Auto-assign "Untitled (N)" with gap reuse if title is cleared
-                if not title:
-                    existing = db.get_tasks_by_user(S.user["id"])
-                    # Exclude the task being edited so it doesn't count itself
-                    existing = [t for t in existing if t[0] != task_id]
-                    title = self._next_untitled(existing)
-
-                # Length guards (only after auto-title is resolved)
+
+                # Length guards
                 if len(title) > 80:
                     self._snack(page, "Task name is too long. Please keep it under 80 characters.", C("ERROR_COLOR"))
                     return
@@ -849,7 +950,7 @@ class TaskPage:
                     page.update()
                     self._snack(page, "Task updated!", C("SUCCESS_COLOR"))
                     S.refresh_badge()
-                    self._refresh_all(page, C)
+                    self._sync_all(page, C)
 
                 self._run_with_loading(
                     page=page,
@@ -917,12 +1018,13 @@ class TaskPage:
         # Drag + drop reorder support
         # ---------------------------
         def _reorder_task(drag_task_id: int, target_task_id: int):
-            if drag_task_id == target_task_id:
+            if drag_task_id == target_task_id or self._ranked_search():
                 return
+            was_custom = self._get_sort_mode() == "Custom"
             self._set_sort_mode("Custom")
 
-            current_tasks = self._get_filtered_tasks()
-            self._ensure_custom_order(current_tasks)
+            # Reorder what's on screen; no need to re-query for a drag
+            self._ensure_custom_order(self._loaded_tasks)
 
             ids = self._custom_order_ids[:]
             if drag_task_id not in ids or target_task_id not in ids:
@@ -933,14 +1035,19 @@ class TaskPage:
             ids.insert(target_index, drag_task_id)
 
             self._custom_order_ids = ids
-            self._refresh_task_list(page)
+            if was_custom:
+                self._render_task_list(page)
+            else:
+                self._sync_task_list(page)  # the sort changed, so the loaded window did too
 
         # ---------------------------
         # Task card
         # ---------------------------
-        def build_task_card(t: tuple) -> ft.Control:
-            task_id, title, desc, category, due_date, status, created_at, updated_at = t
-            overdue = self._is_overdue(due_date, status)
+        def build_task_card(t: Task) -> ft.Control:
+            task_id, title, desc, category, due_date, status = t.id, t.title, t.description, t.category, t.due_date, t.status
+            # Search results carry a match snippet; show it in place of the description
+            snippet = t.snippet
+            overdue = self._is_overdue(t.due_ts, status)
 
             due_label = f"Due {due_date}" if (due_date or "").strip() else "No Due Date"
             cat_label = (category or "").strip() or "No Category"
@@ -951,12 +1058,12 @@ class TaskPage:
                     return
 
                 def work():
-                    new_status = "completed" if status == "pending" else "pending"
+                    new_status = TaskStatus.COMPLETED if status == TaskStatus.PENDING else TaskStatus.PENDING
                     db.update_task_status(S.user["id"], task_id, new_status)
 
                 def after():
                     S.refresh_badge()
-                    self._refresh_all(page, C)
+                    self._sync_all(page, C)
 
                 self._run_with_loading(
                     page=page,
@@ -966,6 +1073,10 @@ class TaskPage:
                     success_fn=after,
                 )
 
+            def select(e):
+                self._toggle_selected(task_id, bool(e.control.value))
+                self._refresh_selection_bar(page)
+
             title_style = ft.TextStyle(
                 size=14,
                 weight=ft.FontWeight.BOLD,
@@ -1014,7 +1125,9 @@ class TaskPage:
                 content=ft.Row(
                     vertical_alignment=ft.CrossAxisAlignment.CENTER,
                     controls=[
-                        ft.Checkbox(value=(status == "completed"), on_change=toggle),
+                        ft.Checkbox(value=(task_id in self._selected_ids), on_change=select, fill_color=C("BUTTON_COLOR"))
+                        if self._select_mode
+                        else ft.Checkbox(value=(status == "completed"), on_change=toggle),
                         ft.Container(
                             expand=True,
                             content=ft.Column(
@@ -1022,7 +1135,7 @@ class TaskPage:
                                 controls=[
                                     ft.Text(title, style=title_style),
                                     ft.Text(
-                                        (desc or "No description").strip() or "No description",
+                                        snippet or (desc or "No description").strip() or "No description",
                                         size=11,
                                         color=C("TEXT_SECONDARY"),
                                         max_lines=1,
@@ -1095,14 +1208,48 @@ class TaskPage:
                 ),
             )
 
-        def build_task_list_view(tasks: List[tuple]):
+        def load_more(e):
+            if self._is_loading or self._next_cursor is None:
+                return
+            S.requests.start(page, "task_list", load_more_async, self._next_cursor)
+
+        async def load_more_async(cursor):
+            rows, self._next_cursor = await adb.run(self._query_page, after=cursor)
+            loaded = {t.id for t in self._loaded_tasks}
+            self._loaded_tasks = self._loaded_tasks + [t for t in rows if t.id not in loaded]
+            if self._task_list_host:
+                self._task_list_host.content = build_task_list_view(self._ordered_loaded())
+                self._safe_update(self._task_list_host)
+
+        def build_loading_placeholder():
+            return ft.Container(
+                alignment=ft.alignment.center,
+                padding=20,
+                content=ft.ProgressRing(width=28, height=28, stroke_width=3, color=C("BUTTON_COLOR")),
+            )
+
+        def build_task_list_view(tasks: List[Task]):
             if self._get_sort_mode() == "Custom":
                 self._ensure_custom_order(tasks)
             controls = [build_task_card(t) for t in tasks]
+            if self._next_cursor is not None:
+                controls.append(
+                    ft.Container(
+                        alignment=ft.alignment.center,
+                        content=ft.TextButton(
+                            "Load more",
+                            icon=ft.Icons.EXPAND_MORE,
+                            style=ft.ButtonStyle(color=C("TEXT_PRIMARY")),
+                            on_click=load_more,
+                        ),
+                    )
+                )
             return ft.ListView(expand=True, spacing=10, controls=controls)
 
-        def build_task_list(_page: ft.Page):
-            tasks = self._get_filtered_tasks()
+        def build_task_list(_page: ft.Page, tasks: Optional[List[Task]] = None):
+            # None = still loading (see _reload_task_list)
+            if tasks is None:
+                return build_loading_placeholder()
             return build_empty_tasks() if not tasks else build_task_list_view(tasks)
 
         self._build_task_list = build_task_list
@@ -1110,7 +1257,7 @@ class TaskPage:
         # ---------------------------
         # Analytics panel
         # ---------------------------
-        def build_analytics_panel(_page: ft.Page):
+        def build_analytics_panel(_page: ft.Page, stats: Optional[dict] = None, overdue: int = 0):
             if not S.user:
                 return ft.Container(
                     expand=True,
@@ -1121,27 +1268,21 @@ class TaskPage:
                     content=ft.Text("No user logged in.", color=C("TEXT_SECONDARY")),
                 )
 
-            tasks = db.get_tasks_by_user(S.user["id"])
-            total = len(tasks)
+            if stats is None:
+                return build_loading_placeholder()  # _reload_analytics fills it in
 
-            completed = sum(1 for t in tasks if t[5] == "completed")
-            now = datetime.now()
-            overdue = sum(
-                1
-                for t in tasks
-                if (t[5] == "pending" and self._safe_parse_datetime(t[4]) and self._safe_parse_datetime(t[4]) < now)
-            )
-            pending = total - completed
+            total = stats["total"]
+            completed = stats["completed"]
+            pending = stats["pending"]
             progress = 0 if total == 0 else completed / total
 
             cat_counts = {c: 0 for c in CATEGORIES}
-            for t in tasks:
-                c = (t[3] or "").strip()
+            for c, n in stats["categories"].items():
                 # Tasks with no category are bucketed into "Others"
                 if not c or c not in cat_counts:
-                    cat_counts["Others"] += 1
+                    cat_counts["Others"] += n
                 else:
-                    cat_counts[c] += 1
+                    cat_counts[c] += n
 
             if total == 0:
                 donut_content = ft.Container(
@@ -1321,6 +1462,7 @@ class TaskPage:
                 if self._is_loading:
                     return
                 S.current_filter = label
+                self._reset_paging()
                 self._refresh_all(page, C)
 
             return f
@@ -1341,6 +1483,74 @@ class TaskPage:
 
         self._build_filter_bar = build_filter_bar
 
+        # ---------------------------
+        # Multi-select bar
+        # ---------------------------
+        def toggle_select_mode(e):
+            if self._is_loading:
+                return
+            self._set_select_mode(not self._select_mode)
+            self._refresh_selection_bar(page)
+            self._render_task_list(page)
+
+        def select_all_loaded(e):
+            self._selected_ids = {t.id for t in self._loaded_tasks}
+            self._refresh_selection_bar(page)
+            self._render_task_list(page)
+
+        def complete_selected(e):
+            ids = list(self._selected_ids)
+            if self._is_loading or not ids or not S.user:
+                return
+
+            def work():
+                db.set_status_bulk(S.user["id"], ids, "completed")
+
+            def after():
+                self._selected_ids = set()
+                self._snack(page, f"{len(ids)} task(s) completed!", C("SUCCESS_COLOR"))
+                S.refresh_badge()
+                self._sync_all(page, C)
+                self._refresh_selection_bar(page)
+
+            self._run_with_loading(
+                page=page,
+                fn=work,
+                on_error_message="Update failed. Please try again.",
+                error_color=C("ERROR_COLOR"),
+                success_fn=after,
+            )
+
+        def build_selection_bar(_page: ft.Page):
+            count = len(self._selected_ids)
+            return ft.Row(
+                spacing=8,
+                vertical_alignment=ft.CrossAxisAlignment.CENTER,
+                controls=[
+                    ft.Text(f"{count} selected", size=12, weight=ft.FontWeight.W_600, color=C("TEXT_PRIMARY"), expand=True),
+                    ft.TextButton("Select all", on_click=select_all_loaded),
+                    ft.ElevatedButton(
+                        "Complete selected",
+                        icon=ft.Icons.DONE_ALL,
+                        disabled=count == 0,
+                        bgcolor=C("SUCCESS_COLOR"),
+                        color=ft.Colors.WHITE,
+                        on_click=complete_selected,
+                    ),
+                    ft.ElevatedButton(
+                        "Delete selected",
+                        icon=ft.Icons.DELETE_OUTLINE,
+                        disabled=count == 0,
+                        bgcolor=C("ERROR_COLOR"),
+                        color=ft.Colors.WHITE,
+                        on_click=lambda e: (None if self._is_loading else confirm_delete_selected()),
+                    ),
+                    ft.TextButton("Cancel", on_click=toggle_select_mode),
+                ],
+            )
+
+        self._build_selection_bar = build_selection_bar
+
         # ---------------------------
         # Search TextField (create ONCE)
         # ---------------------------
@@ -1375,16 +1585,28 @@ class TaskPage:
         else:
             self._filter_chip_row.content = self._build_filter_bar(page)
 
+        if not self._selection_bar:
+            self._selection_bar = ft.Container(visible=self._select_mode, content=self._build_selection_bar(page))
+        else:
+            self._selection_bar.visible = self._select_mode
+            self._selection_bar.content = self._build_selection_bar(page)
+
+        # Show what we already have (or a spinner), then reload both off the UI thread
+        shown = self._ordered_loaded() if self._loaded_tasks else None
         if not self._task_list_host:
-            self._task_list_host = ft.Container(expand=True, padding=ft.padding.only(top=6), content=self._build_task_list(page))
+            self._task_list_host = ft.Container(expand=True, padding=ft.padding.only(top=6), content=self._build_task_list(page, shown))
         else:
-            self._task_list_host.content = self._build_task_list(page)
+            self._task_list_host.content = self._build_task_list(page, shown)
 
         if not self._analytics_host:
             self._analytics_host = ft.Container(expand=True, content=self._build_analytics_panel(page))
         else:
             self._analytics_host.content = self._build_analytics_panel(page)
 
+        # Coming back to the page: the window is still valid, so only catch up on changes
+        self._sync_task_list(page)
+        self._refresh_analytics(page)
+
         # ---------------------------
         # Panels
         # ---------------------------
@@ -1409,6 +1631,12 @@ class TaskPage:
                         spacing=10,
                         controls=[
                             ft.Container(expand=True, content=self._search_tf),
+                            ft.IconButton(
+                                icon=ft.Icons.CHECKLIST,
+                                icon_color=C("TEXT_PRIMARY"),
+                                tooltip="Select tasks",
+                                on_click=toggle_select_mode,
+                            ),
                             ft.IconButton(
                                 icon=ft.Icons.CALENDAR_MONTH,
                                 icon_color=C("TEXT_PRIMARY"),
@@ -1424,6 +1652,7 @@ class TaskPage:
                         ],
                     ),
                     self._filter_chip_row,
+                    self._selection_bar,
                     self._task_list_host,
                     ft.Row(
                         alignment=ft.MainAxisAlignment.CENTER,
@@ -44,7 +44,7 @@ def test_navigation_go():
 @patch("taskwise.app_state.db")
 def test_user_login_loads_theme(mock_db, mock_get_theme):
 
-    mock_db.get_setting.return_value = "Dark Mode"
+    mock_db.get_settings.return_value = {"theme_name": "Dark Mode"}
     mock_get_theme.return_value = {"bg": "black"}
 
     state = AppState()
@@ -60,6 +60,7 @@ def test_user_login_loads_theme(mock_db, mock_get_theme):
     assert state.theme_name == "Dark Mode"
     assert state.colors == {"bg": "black"}
 
+    mock_db.get_settings.assert_called_once_with(1)
     update_mock.assert_called_once()
 
 
@@ -71,7 +72,7 @@ def test_user_login_loads_theme(mock_db, mock_get_theme):
 @patch("taskwise.app_state.THEMES", {"Light Mode": {}, "Dark Mode": {}})
 def test_login_invalid_theme_fallback(mock_db, mock_get_theme):
 
-    mock_db.get_setting.return_value = "Unknown Theme"
+    mock_db.get_settings.return_value = {"theme_name": "Unknown Theme"}
     mock_get_theme.return_value = {"bg": "white"}
 
     state = AppState()
@@ -145,3 +146,33 @@ def test_set_theme_invalid(mock_get_theme):
     state.set_theme("Invalid Theme")
 
     assert state.theme_name == "Light Mode"
+
+
+# -----------------------------
+# Test: settings are read from memory after login
+# -----------------------------
+@patch("taskwise.app_state.db")
+def test_settings_read_from_memory(mock_db):
+
+    mock_db.get_settings.return_value = {"theme_name": "Light Mode", "notify": "0"}
+
+    state = AppState()
+    state.on_user_login({"id": 1})
+
+    assert state.get_setting("notify", True) is False
+    assert state.get_setting("missing", "x") == "x"
+
+    state.set_setting("notify", True)
+    state.set_settings({"font": "Large", "sound": False})
+
+    mock_db.set_setting.assert_called_once_with(1, "notify", True)
+    mock_db.set_settings.assert_called_once_with(1, {"font": "Large", "sound": False})
+    assert state.get_setting("notify", False) is True
+    assert state.get_setting("sound", True) is False
+    assert state.get_setting("font") == "Large"
+
+    mock_db.get_settings.assert_called_once_with(1)
+    mock_db.get_setting.assert_not_called()
+
+    state.on_user_logout()
+    assert state.settings == {}
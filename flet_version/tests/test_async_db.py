@@ -0,0 +1,107 @@
+import asyncio
+import threading
+
+import pytest
+
+from database import async_db as adb
+from database.async_db import AsyncDB, RequestScope
+
+
+class DummyDB:
+    def __init__(self):
+        self.threads = []
+
+    def get_tasks_by_user(self, user_id):
+        self.threads.append(threading.current_thread().name)
+        return [(1, f"task for {user_id}")]
+
+    def fail(self):
+        raise ValueError("boom")
+
+
+class LoopPage:
+    """Stands in for ft.Page: run_task schedules the coroutine on a real loop."""
+
+    def __init__(self, loop):
+        self.loop = loop
+
+    def run_task(self, handler, *args):
+        return asyncio.run_coroutine_threadsafe(handler(*args), self.loop)
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(2)
+    loop.close()
+
+
+# -----------------------------
+# Test: executor-backed calls
+# -----------------------------
+def test_run_and_wrapper_use_db_threads():
+    target = DummyDB()
+
+    async def main():
+        rows = await AsyncDB(target).get_tasks_by_user(7)
+        total = await adb.run(sum, [1, 2, 3])
+        return rows, total
+
+    rows, total = asyncio.run(main())
+
+    assert rows == [(1, "task for 7")] and total == 6
+    assert target.threads[0].startswith("taskwise-db")
+
+
+def test_errors_propagate_to_the_awaiting_handler():
+    async def main():
+        await AsyncDB(DummyDB()).fail()
+
+    with pytest.raises(ValueError, match="boom"):
+        asyncio.run(main())
+
+
+# -----------------------------
+# Test: stale request cancellation
+# -----------------------------
+def test_newer_request_cancels_previous(loop):
+    page, scope = LoopPage(loop), RequestScope()
+    release, rendered = threading.Event(), []
+
+    async def slow(label):
+        await adb.run(release.wait, 2)
+        rendered.append(label)
+
+    first = scope.start(page, "task_list", slow, "first")
+    second = scope.start(page, "task_list", slow, "second")
+    release.set()
+    second.result(2)
+
+    assert first.cancelled()
+    assert rendered == ["second"]
+    assert scope.pending() == []
+
+
+def test_cancel_all_drops_every_pending_request(loop):
+    page, scope = LoopPage(loop), RequestScope()
+    release, started, rendered = threading.Event(), threading.Semaphore(0), []
+
+    async def slow(label):
+        started.release()
+        await adb.run(release.wait, 2)
+        rendered.append(label)
+
+    futures = [scope.start(page, key, slow, key) for key in ("task_list", "analytics")]
+    assert started.acquire(timeout=2) and started.acquire(timeout=2)
+    assert sorted(scope.pending()) == ["analytics", "task_list"]
+
+    scope.cancel()
+    release.set()
+
+    assert all(f.cancelled() for f in futures)
+    assert scope.pending() == []
+    assert rendered == []
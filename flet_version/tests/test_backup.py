@@ -0,0 +1,125 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import sqlite3
+import threading
+
+import pytest
+
+import database.db as db
+from database import backup
+
+
+@pytest.fixture
+def live_db(tmp_path, monkeypatch):
+    db.close_connections()
+    backup.close_snapshot()
+    monkeypatch.setattr(db, "DB_NAME", str(tmp_path / "live.db"))
+    monkeypatch.setattr(backup, "BACKUP_DIR", str(tmp_path / "backups"))
+    monkeypatch.setattr(backup, "REPORTING_SNAPSHOT", True)
+    db.init_db()
+    db.create_user("Ann", "ann@x.com", "h")
+    user_id = db.get_user_by_email("ann@x.com").id
+    db.add_tasks_bulk(user_id, [(f"Task {i}", "x" * 400) for i in range(1500)])
+    yield user_id
+    backup.close_snapshot()
+    db.close_connections()
+
+
+# -----------------------------
+# Test: stepped online backup
+# -----------------------------
+def test_backup_copies_in_steps_while_writers_run(live_db):
+    stop = threading.Event()
+    written = []
+
+    def writer():
+        while not stop.is_set():
+            written.append(db.add_task(live_db, "during backup"))
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    steps = []
+    try:
+        path = backup.create_backup(pages=8, pause=0.001, on_progress=steps.append)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert len(steps) > 1 and steps[-1]["copied"] == steps[-1]["total"]
+    assert written  # writers kept committing during the copy
+    assert not any(name.endswith(".partial") for name in os.listdir(os.path.dirname(path)))
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+    assert conn.execute("PRAGMA journal_mode").fetchone() == ("delete",)
+    assert conn.execute("SELECT COUNT(*) FROM tasks WHERE title LIKE 'Task %'").fetchone() == (1500,)
+    conn.close()
+
+
+def test_backups_rotate(live_db):
+    paths = [backup.create_backup(pages=-1, keep=3) for _ in range(5)]
+    assert backup.list_backups() == paths[:-4:-1]
+    assert backup.latest_backup() == paths[-1]
+
+
+# -----------------------------
+# Test: read-only reporting snapshot
+# -----------------------------
+def test_reporting_snapshot_is_read_only_and_frozen(live_db):
+    assert backup.reporting_snapshot() == (None, None)
+
+    backup.create_backup(pages=-1)
+    db.create_user("Bob", "bob@x.com", "h")
+
+    conn, taken_at = backup.reporting_snapshot()
+    assert taken_at is not None
+    assert "bob@x.com" not in [u.email for u in db.get_users(conn=conn)]
+    assert "bob@x.com" in [u.email for u in db.get_users()]
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("DELETE FROM users")
+
+    assert backup.reporting_snapshot()[0] is conn  # reused until a newer backup lands
+    backup.create_backup(pages=-1)
+    newer, _ = backup.reporting_snapshot()
+    assert newer is not conn
+    assert "bob@x.com" in [u.email for u in db.get_users(conn=newer)]
+    assert backup.reporting_snapshot(max_age_hours=0) == (None, None)
+
+
+# -----------------------------
+# Test: sharded databases
+# -----------------------------
+def test_sharded_backup_includes_every_shard(tmp_path, monkeypatch):
+    db.close_connections()
+    backup.close_snapshot()
+    monkeypatch.setattr(db, "DB_NAME", str(tmp_path / "global.db"))
+    monkeypatch.setattr(db, "DB_SHARDS", "3")
+    monkeypatch.setattr(backup, "BACKUP_DIR", str(tmp_path / "backups"))
+    monkeypatch.setattr(backup, "REPORTING_SNAPSHOT", True)
+    db.init_db()
+    try:
+        ids = []
+        for i in range(6):
+            db.create_user(f"U{i}", f"u{i}@x.com", "h")
+            ids.append(db.get_user_by_email(f"u{i}@x.com").id)
+            db.add_tasks_bulk(ids[-1], [(f"t{n}",) for n in range(i + 1)])
+        db.flush_writes()
+
+        paths = [backup.create_backup(pages=-1, keep=2) for _ in range(3)]
+        shards = backup.backup_shard_paths(paths[-1])
+        assert [os.path.basename(p) for p in shards] == [os.path.basename(p) for p in db.shard_paths()]
+        assert len(shards) == 3
+        # Rotation drops a backup's shard copies with it
+        assert not os.path.exists(paths[0] + ".shards")
+
+        db.add_task(ids[0], "after the backup")
+        conn, _ = backup.reporting_snapshot()
+        counts = db.get_user_data_counts(conn=conn)
+        assert {uid: counts[uid]["tasks"] for uid in ids} == {uid: i + 1 for i, uid in enumerate(ids)}
+        assert db.get_user_data_counts()[ids[0]]["tasks"] == 2
+    finally:
+        backup.close_snapshot()
+        db.close_connections()
@@ -0,0 +1,85 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+import database.db as db
+from app import passwords
+from benchmarks import datagen, db_bench, login_bench, write_bench
+
+
+@pytest.fixture
+def bench_db(tmp_path, monkeypatch):
+    db.close_connections()
+    monkeypatch.setattr(db, "DB_NAME", str(tmp_path / "bench.db"))
+    db.migrate()
+    yield
+    db.close_connections()
+
+
+def _snapshot():
+    conn = db.connect()
+    return [
+        conn.execute(f"SELECT * FROM {table} WHERE user_id IS NOT NULL ORDER BY id").fetchall()
+        for table in ("tasks", "journals", "logs")
+    ]
+
+
+# -----------------------------
+# Test: synthetic data generator
+# -----------------------------
+def test_generator_is_deterministic(bench_db, tmp_path):
+    counts = datagen.generate(users=3, tasks_per_user=20, seed=7)
+    first = _snapshot()
+
+    assert {k: counts[k] for k in ("tasks", "journals", "logs")} == {"tasks": 60, "journals": 12, "logs": 30}
+    assert db.get_task_stats(counts["user_ids"][0])["total"] == 20
+
+    db.close_connections()
+    db.DB_NAME = str(tmp_path / "again.db")
+    db.migrate()
+    datagen.generate(users=3, tasks_per_user=20, seed=7)
+
+    assert _snapshot() == first
+
+
+# -----------------------------
+# Test: scenarios and baseline comparison
+# -----------------------------
+def test_scenarios_report_and_compare(bench_db):
+    counts = datagen.generate(users=4, tasks_per_user=10)
+    results = {"results": db_bench.run_scenarios(counts["user_ids"], repeat_scale=0.05, delete_runs=1)}
+
+    assert {"login_lookup", "filtered_search", "calendar_month", "get_logs", "delete_user"} <= set(results["results"])
+    assert all(r["min_ms"] <= r["median_ms"] <= r["p95_ms"] for r in results["results"].values())
+
+    slower = {"results": {name: dict(r, median_ms=r["median_ms"] / 2) for name, r in results["results"].items()}}
+    rows = db_bench.compare(results, slower, tolerance=0.25)
+    assert rows and all(regressed for _name, _now, _base, _ratio, regressed in rows)
+    assert not any(regressed for _name, _now, _base, _ratio, regressed in db_bench.compare(results, results))
+
+
+# -----------------------------
+# Test: concurrent-write benchmark
+# -----------------------------
+def test_write_bench_runs_every_mode(bench_db):
+    user_ids = datagen.generate(users=5, tasks_per_user=5)["user_ids"]
+    for mode in write_bench.MODES:
+        result = write_bench.run_sessions(user_ids, mode, ops=10)
+        assert (result["sessions"], result["writes"], result["errors"]) == (5, 50, 0)
+        assert result["transactions"] <= result["writes"]
+    db.flush_writes()
+
+
+# -----------------------------
+# Test: login benchmark
+# -----------------------------
+def test_login_bench_runs_every_mode():
+    try:
+        for mode in login_bench.MODES:
+            result = login_bench.run_logins(mode, logins=3, rounds=4)
+            assert (result["logins"], result["rounds"], result["latency"]["runs"]) == (3, 4, 3)
+    finally:
+        passwords.shutdown()
@@ -1,20 +1,28 @@
 import pytest
 from datetime import date
 from unittest.mock import Mock
+from database.async_db import RequestScope
+from database.db import parse_due_ts
+from database.models import Task
 from taskwise.pages.calendar_page import CalendarPage
 
 
 class DummyDB:
     def get_tasks_by_user(self, user_id):
-        return [
+        rows = [
             (1, "Task 1", "Desc 1", "Work", "2026-03-14 10:00", "Pending", "2026-03-01", "2026-03-02"),
             (2, "Task 2", "Desc 2", "Personal", "2026-03-15", "Completed", "2026-03-05", "2026-03-06"),
         ]
+        return [Task.from_row(t + (parse_due_ts(t[4]),)) for t in rows]
+
+    def get_tasks_due_between(self, user_id, start_ts, end_ts):
+        return [t for t in self.get_tasks_by_user(user_id) if start_ts <= t.due_ts < end_ts]
 
 
 class DummyState:
     def __init__(self):
         self.db = DummyDB()
+        self.requests = RequestScope()
         self.user = {"id": 1, "name": "Ivy"}
         self.colors = {
             "TEXT_PRIMARY": "#111",
@@ -82,3 +90,18 @@ def test_month_navigation_logic(cal_page):
         state.cal_month += 1
 
     assert state.cal_month == (original_month + 1 if original_month < 12 else 1)
+
+
+def test_due_cache_keeps_only_recent_ranges(cal_page):
+    from taskwise.pages import calendar_page
+
+    for month in range(1, 13):  # a year of month flipping
+        cal_page._put_due_range((month, month + 1), [])
+    assert len(cal_page._due_cache) == calendar_page.DUE_CACHE_RANGES
+    assert cal_page._get_due_range((1, 2)) is None
+
+    # Looking at a range again keeps it over older ones
+    cal_page._get_due_range((7, 8))
+    cal_page._put_due_range((13, 14), [])
+    assert cal_page._get_due_range((7, 8)) == []
+    assert cal_page._get_due_range((8, 9)) is None
@@ -0,0 +1,147 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+import database.db as db
+from database.db import parse_due_ts
+from taskwise.pages.calendar_page import CalendarPage
+from taskwise.pages.journal_page import JournalPage
+from taskwise.pages.task_page import TaskPage
+
+
+@pytest.fixture
+def user(tmp_path, monkeypatch):
+    db.close_connections()
+    monkeypatch.setattr(db, "DB_NAME", str(tmp_path / "feed.db"))
+    monkeypatch.setattr(db, "DB_SHARDS", "0")
+    db.init_db()
+    db.create_user("Ann", "ann@x.com", "h")
+    yield db.get_user_by_email("ann@x.com").id
+    db.close_connections()
+
+
+class FeedState:
+    def __init__(self, user_id):
+        self.db = db
+        self.user = {"id": user_id}
+        self.current_filter = "All Tasks"
+        self.current_sort = "Custom"
+        self.colors = {}
+
+
+# -----------------------------
+# Test: versions, tombstones, pruning
+# -----------------------------
+def test_every_write_takes_the_next_version(user):
+    assert db.get_change_version(user) == 0
+    db.add_task(user, "a")
+    db.add_tasks_bulk(user, [("b",), ("c",)])
+    a, b, c = sorted(db.get_tasks_by_user(user), key=lambda t: t.id)
+    assert db.get_change_version(user) == 3
+
+    db.update_task_status(user, a.id, "completed")
+    db.delete_task(user, b.id)
+    journal_id = db.add_journal(user, "j", "text")
+    assert db.get_change_version(user) == 6
+
+    delta = db.changes_since(user, 3)
+    assert delta["version"] == 6 and not delta["reset"]
+    assert [(t.id, str(t.status)) for t in delta["tasks"]] == [(a.id, "completed")]
+    assert delta["deleted_tasks"] == [b.id]
+    assert [j.id for j in delta["journals"]] == [journal_id]
+    assert db.changes_since(user, 6)["tasks"] == []
+
+    # Only what was asked for
+    assert db.changes_since(user, 3, ("tasks",))["journals"] == []
+
+    # Other users keep their own counter
+    db.create_user("Bob", "bob@x.com", "h")
+    bob = db.get_user_by_email("bob@x.com").id
+    db.add_task(bob, "x")
+    assert (db.get_change_version(bob), db.get_change_version(user)) == (1, 6)
+
+
+def test_pruned_tombstones_force_a_reset(user):
+    db.add_tasks_bulk(user, [("a",), ("b",)])
+    db.delete_tasks_bulk(user, [t.id for t in db.get_tasks_by_user(user)])
+    assert db.prune_tombstones() == 0  # still inside retention
+
+    db.connect(user).execute("UPDATE tombstones SET deleted_at = '2000-01-01 00:00:00'")
+    assert db.prune_tombstones() == 2
+    assert db.changes_since(user, 2)["reset"]
+    assert not db.changes_since(user, 4)["reset"]
+
+
+def test_purge_drops_the_feed(user):
+    db.add_task(user, "a")
+    db.delete_task(user, db.get_tasks_by_user(user)[0].id)
+    db.delete_user(user)
+
+    conn = db.connect()
+    assert conn.execute("SELECT COUNT(*) FROM tombstones").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM change_seq").fetchone()[0] == 0
+
+
+# -----------------------------
+# Test: pages merge deltas into what they show
+# -----------------------------
+@pytest.mark.parametrize("sort", ["Custom", "Title (A-Z)", "Title (Z-A)", "Due Date", "Date Created"])
+def test_task_page_merge_matches_a_reload(user, sort):
+    db.add_tasks_bulk(user, [
+        (f"Task {i:02d}", "", "Work" if i % 2 else "Study", f"2026-03-{i % 27 + 1:02d}" if i % 3 else "")
+        for i in range(30)
+    ])
+    page = TaskPage(FeedState(user))
+    page.state.current_sort = sort
+    page.state.current_filter = "Work"
+    page.PAGE_SIZE = 8
+    page._version, page._loaded_tasks, page._next_cursor = page._load_window(page.PAGE_SIZE)
+
+    tasks = {t.title: t for t in db.get_tasks_by_user(user)}
+    db.add_task(user, "aaa first", "", "Work", "2026-03-01")
+    db.add_task(user, "zzz last", "", "Work", "")
+    db.add_task(user, "other category", "", "Personal", "")
+    db.update_task(user, tasks["Task 01"].id, "Task 01 renamed", "", "Study", "", "pending")
+    db.update_task(user, tasks["Task 03"].id, "Task 03", "", "Work", "2026-03-02", "completed")
+    db.delete_task(user, tasks["Task 05"].id)
+
+    assert page._merge_task_changes(db.changes_since(user, page._version, ("tasks",)))
+    merged = [t.id for t in page._loaded_tasks]
+    reloaded = [t.id for t in page._query_page(limit=len(merged))[0]]
+    assert merged == reloaded
+
+
+def test_task_page_search_reloads_instead(user):
+    page = TaskPage(FeedState(user))
+    page.search_query = "report"
+    page._version = 0
+    db.add_task(user, "report")
+    assert not page._merge_task_changes(db.changes_since(user, 0, ("tasks",)))
+
+
+def test_calendar_and_journal_merge(user):
+    start, end = parse_due_ts("2026-03-01"), parse_due_ts("2026-04-01")
+    db.add_tasks_bulk(user, [("a", "", "", "2026-03-10"), ("b", "", "", "2026-03-20"), ("c", "", "", "2026-05-01")])
+    a, b, c = sorted(db.get_tasks_by_user(user), key=lambda t: t.id)
+    first = db.add_journal(user, "one", "")
+
+    cal = CalendarPage(FeedState(user))
+    cal._due_version = db.get_change_version(user)
+    cal._due_cache[(start, end)] = db.get_tasks_due_between(user, start, end)
+    journal = JournalPage(FeedState(user))
+    journal._version, journal._entries = journal._load_entries()
+
+    db.update_task(user, c.id, "c", "", "", "2026-03-01", "pending")   # moves into March
+    db.update_task(user, a.id, "a", "", "", "2026-06-01", "pending")   # moves out
+    db.delete_task(user, b.id)
+    db.add_task(user, "d", "", "", "2026-03-31 11:00 PM")
+    db.update_journal(user, first, "one edited", "")
+    db.add_journal(user, "two", "")
+
+    cal._apply_task_changes(db.changes_since(user, cal._due_version, ("tasks",)))
+    assert [t.id for t in cal._due_cache[(start, end)]] == [t.id for t in db.get_tasks_due_between(user, start, end)]
+    assert journal._merge_changes(db.changes_since(user, journal._version, ("journals",)))
+    assert sorted(j.title for j in journal._entries) == ["one edited", "two"]
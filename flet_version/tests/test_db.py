@@ -3,10 +3,15 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+import threading
+import time
+from datetime import datetime
+
 import pytest
 from passlib.hash import bcrypt
 
 import database.db as db
+from database.models import due_ts_to_datetime
 
 
 # -----------------------------
@@ -15,22 +20,99 @@ import database.db as db
 TEST_DB = "test_taskwise.db"
 
 
+def _remove_test_db():
+    # Land queued audit rows, then close pooled connections (they keep the file and its WAL open)
+    db.flush_logs()
+    db.close_connections()
+    for path in (TEST_DB, TEST_DB + "-wal", TEST_DB + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
 @pytest.fixture(scope="module", autouse=True)
 def setup_test_db():
     # Override DB name
     db.DB_NAME = TEST_DB
 
     # Create fresh database
-    if os.path.exists(TEST_DB):
-        os.remove(TEST_DB)
+    _remove_test_db()
 
     db.init_db()
 
     yield
 
     # Cleanup after tests
-    if os.path.exists(TEST_DB):
-        os.remove(TEST_DB)
+    _remove_test_db()
+
+
+# -----------------------------
+# Connection Tests
+# -----------------------------
+def test_connection_reused_per_thread():
+    assert db.connect() is db.connect()
+
+    other = []
+    t = threading.Thread(target=lambda: other.append(db.connect()))
+    t.start()
+    t.join()
+
+    assert other[0] is not db.connect()
+
+
+def test_connection_pragmas():
+    conn = db.connect()
+
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+
+def test_transaction_rolls_back_on_error():
+    with pytest.raises(RuntimeError):
+        with db.transaction() as cur:
+            cur.execute(
+                "INSERT INTO logs (action, details) VALUES (?, ?)",
+                ("ROLLBACK_TEST", ""),
+            )
+            raise RuntimeError("boom")
+
+    row = db.connect().execute(
+        "SELECT COUNT(*) FROM logs WHERE action = 'ROLLBACK_TEST'"
+    ).fetchone()
+    assert row[0] == 0
+
+
+# -----------------------------
+# Migration Tests
+# -----------------------------
+def test_schema_at_latest_version():
+    assert db.get_schema_version() == db.SCHEMA_VERSION
+
+
+def test_init_db_is_idempotent():
+    db.init_db()
+    db.init_db()
+
+    admins = db.connect().execute(
+        "SELECT COUNT(*) FROM users WHERE email = 'admin@taskwise.com'"
+    ).fetchone()[0]
+    assert admins == 1
+    assert db.get_schema_version() == db.SCHEMA_VERSION
+
+
+def test_hot_queries_use_indexes():
+    conn = db.connect()
+
+    plan = " ".join(r[3] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM tasks WHERE user_id = ? ORDER BY created_at DESC", (1,)
+    ))
+    assert "idx_tasks_user_created" in plan
+    assert "TEMP B-TREE" not in plan
+
+    plan = " ".join(r[3] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM users WHERE name = ?", ("Admin",)
+    ))
+    assert "idx_users_name" in plan
 
 
 # -----------------------------
@@ -85,6 +167,95 @@ def test_unban_user():
     assert banned == False
 
 
+def test_user_cache_hits_and_invalidation():
+    db.reset_user_cache_stats()
+    assert db.get_user_by_email("cached@email.com") is None
+    assert db.get_user_by_email("cached@email.com") is None  # cached miss
+
+    db.create_user("Cached", "cached@email.com", bcrypt.hash("pw"))
+    user = db.get_user_by_email("cached@email.com")
+    assert user is not None
+
+    # id and email lookups share one read-only record
+    with pytest.raises(TypeError):
+        user["role"] = "admin"
+    assert db.get_user_by_id(user["id"]) is user
+    assert user["role"] == user.role == "user"
+    assert db.is_user_banned("cached@email.com") is False
+
+    db.ban_user(user["id"])
+    assert db.is_user_banned("cached@email.com") is True
+    db.unban_user(user["id"])
+    assert db.get_user_by_id(user["id"])["is_banned"] is False
+
+    db.update_user_password(user["id"], "new-hash")
+    assert db.get_user_by_email("cached@email.com")["password_hash"] == "new-hash"
+
+    db.delete_user(user["id"])
+    assert db.get_user_by_id(user["id"]) is None
+    assert db.get_user_by_email("cached@email.com") is None
+
+    stats = db.user_cache_stats()
+    assert stats["hits"] >= 3
+    assert stats["misses"] >= 5
+
+
+def test_user_cache_is_bounded_and_expires():
+    cache = db.UserCache(maxsize=4, ttl=60)
+    for i in range(5):
+        cache.put("id", i, {"id": i, "email": f"u{i}@x"})
+
+    # Two keys per user: only the two most recent users still fit
+    assert cache.get("id", 0) == (False, None)
+    assert cache.get("email", "u4@x")[1]["id"] == 4
+    assert cache.stats()["size"] == 4
+
+    cache.ttl = 0
+    cache.put("id", 9, {"id": 9, "email": "u9@x"})
+    assert cache.get("id", 9) == (False, None)
+
+
+def test_migration_adds_cascading_foreign_keys():
+    path = "test_migrate_cascade.db"
+    for p in (path, path + "-wal", path + "-shm"):
+        if os.path.exists(p):
+            os.remove(p)
+    db.DB_NAME = path
+    try:
+        db.migrate(8)
+        assert db.connect().execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        db.create_user("Old", "old@email.com", "hash")
+        uid = db.connect().execute("SELECT id FROM users WHERE email = 'old@email.com'").fetchone()[0]
+        db.add_task(uid, "Water plants", "", "Home", "2026-03-01")
+        db.add_journal(uid, "Notes", "garden", "")
+        db.set_setting(uid, "theme_name", "Dark Mode")
+
+        db.migrate()
+
+        conn = db.connect()
+        for table in db.CASCADE_TABLES:
+            sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (table,)).fetchone()[0]
+            assert "ON DELETE CASCADE" in sql
+        names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE tbl_name = 'tasks'")}
+        assert {"idx_tasks_user_due", "idx_tasks_user_pending_due", "tasks_fts_ai", "task_stats_ai"} <= names
+        assert [r[1] for r in db.search_tasks(uid, "plants")[0]] == ["Water plants"]
+
+        # Triggers survived the rebuild
+        db.add_task(uid, "Repot cactus", "", "Home", "")
+        assert db.get_task_stats(uid)["categories"] == {"Home": 2}
+
+        with db.transaction() as cur:
+            cur.execute("DELETE FROM users WHERE id = ?", (uid,))
+        for table in db.CASCADE_TABLES + ("task_stats",):
+            assert conn.execute(f"SELECT COUNT(*) FROM {table} WHERE user_id = ?", (uid,)).fetchone()[0] == 0
+    finally:
+        db.close_connections()
+        db.DB_NAME = TEST_DB
+        for p in (path, path + "-wal", path + "-shm"):
+            if os.path.exists(p):
+                os.remove(p)
+
+
 # -----------------------------
 # Task Tests
 # -----------------------------
@@ -112,6 +283,225 @@ def test_delete_task():
     assert all(t[0] != task_id for t in tasks_after)
 
 
+def test_query_tasks_filters_sorts_and_pages():
+    db.create_user("Pager", "pager@email.com", "password123")
+    uid = db.get_user_by_email("pager@email.com")["id"]
+
+    db.add_task(uid, "Banana", "yellow fruit", "Personal", "2026-05-02")
+    db.add_task(uid, "apple", "", "Work", "2026-05-01 9:00 AM")
+    db.add_task(uid, "Cherry", "red FRUIT", "Personal", "")
+    db.add_task(uid, "Date", "", "Work", "2026-05-01 8:00 AM")
+
+    rows, cursor = db.query_tasks(uid, sort="Title (A-Z)", limit=10)
+    assert [r[1] for r in rows] == ["apple", "Banana", "Cherry", "Date"]
+    assert cursor is None
+    assert len(rows[0]) == 9
+
+    rows, _ = db.query_tasks(uid, sort="Due Date", limit=10)
+    assert [r[1] for r in rows] == ["Date", "apple", "Banana", "Cherry"]
+
+    rows, _ = db.query_tasks(uid, category="personal", text="fruit", sort="Title (Z-A)")
+    assert [r[1] for r in rows] == ["Cherry", "Banana"]
+
+    # Keyset pages cover every row exactly once, in order
+    seen, cursor = [], None
+    while True:
+        rows, cursor = db.query_tasks(uid, sort="Date Created", after=cursor, limit=3)
+        seen.extend(r[0] for r in rows)
+        if cursor is None:
+            break
+    assert seen == [t[0] for t in db.get_tasks_by_user(uid)]
+
+
+def test_search_tasks_prefix_rank_and_sync():
+    db.create_user("Finder", "finder@email.com", "password123")
+    uid = db.get_user_by_email("finder@email.com")["id"]
+
+    db.add_task(uid, "Quarterly report", "numbers", "Work", "")
+    db.add_task(uid, "Groceries", "remember the report binder", "Personal", "")
+    db.add_task(uid, "Gym", "", "Personal", "")
+
+    rows, cursor = db.search_tasks(uid, "rep")
+    assert [r[1] for r in rows] == ["Quarterly report", "Groceries"]  # title hits rank first
+    assert "[report]" in rows[0][9]
+    assert cursor is None
+
+    rows, _ = db.search_tasks(uid, "rep", category="Personal")
+    assert [r[1] for r in rows] == ["Groceries"]
+
+    gym = next(t for t in db.get_tasks_by_user(uid) if t[1] == "Gym")
+    db.update_task(uid, gym[0], "Gym report", "", "Personal", "", "pending")
+    db.delete_task(uid, rows[0][0])
+    rows, _ = db.search_tasks(uid, "report")
+    assert sorted(r[1] for r in rows) == ["Gym report", "Quarterly report"]
+
+    # Operators and quotes are searched literally instead of raising
+    assert db.search_tasks(uid, 'AND "(') == ([], None)
+
+
+def test_search_journals():
+    user = db.get_user_by_email("finder@email.com")
+
+    db.add_journal(user["id"], "Monday", "Walked in the rain", "")
+    db.add_journal(user["id"], "Tuesday", "Sunny afternoon", "")
+
+    rows = db.search_journals(user["id"], "rai")
+
+    assert [r[1] for r in rows] == ["Monday"]
+    assert "[rain]" in rows[0][8]
+
+
+def test_due_ts_maintained_and_queried():
+    db.create_user("Due", "due@email.com", "password123")
+    uid = db.get_user_by_email("due@email.com")["id"]
+
+    db.add_task(uid, "Morning", "", "Work", "2026-03-14 09:30 AM")
+    db.add_task(uid, "Anytime", "", "Work", "2026-03-14")
+    db.add_task(uid, "Undated", "", "Work", "")
+
+    rows = db.get_tasks_due_between(
+        uid,
+        db.parse_due_ts("2026-03-14 00:00"),
+        db.parse_due_ts("2026-03-15 00:00"),
+    )
+    assert [r[1] for r in rows] == ["Morning", "Anytime"]
+    assert due_ts_to_datetime(rows[1][8]) == datetime(2026, 3, 14, 23, 59)
+
+    morning = rows[0]
+    db.update_task(uid, morning[0], "Morning", "", "Work", "2026-04-01 13:00", "pending")
+    soon = db.get_due_soon_tasks(uid, db.parse_due_ts("2026-03-20"))
+    assert [r[1] for r in soon] == ["Anytime"]
+
+    db.update_task_status(uid, soon[0][0], "completed")
+    assert db.get_due_soon_tasks(uid, db.parse_due_ts("2026-03-20")) == []
+    assert db.count_overdue_tasks(uid, db.parse_due_ts("2026-05-01")) == 1
+
+    rows, _ = db.query_tasks(uid, sort="Due Date")
+    assert [r[1] for r in rows] == ["Anytime", "Morning", "Undated"]
+
+
+def test_bulk_task_operations():
+    db.create_user("Bulk", "bulk@email.com", "password123")
+    uid = db.get_user_by_email("bulk@email.com")["id"]
+
+    added = db.add_tasks_bulk(uid, [("Task %d" % i, "", "Work", "2026-01-0%d" % (i % 9 + 1)) for i in range(20)] + [("",)])
+    assert added == 21
+
+    tasks = db.get_tasks_by_user(uid)
+    assert "Untitled" in [t[1] for t in tasks]
+    assert all(t[3] == "Work" for t in tasks if t[1] != "Untitled")
+
+    ids = [t[0] for t in tasks]
+    assert db.set_status_bulk(uid, ids[:10], "completed") == 10
+    assert sum(1 for t in db.get_tasks_by_user(uid) if t[5] == "completed") == 10
+
+    # Ids of another user are ignored
+    other = db.get_user_by_email("test@email.com")["id"]
+    assert db.delete_tasks_bulk(other, ids) == 0
+
+    assert db.delete_tasks_bulk(uid, ids) == 21
+    assert db.get_tasks_by_user(uid) == []
+
+
+def test_task_stats_match_task_rows():
+    db.create_user("Stats", "stats@email.com", bcrypt.hash("pw"))
+    uid = db.get_user_by_email("stats@email.com")["id"]
+
+    def expected():
+        rows = db.get_tasks_by_user(uid)
+        cats = {}
+        for t in rows:
+            c = (t[3] or "").strip()
+            cats[c] = cats.get(c, 0) + 1
+        done = sum(1 for t in rows if t[5] == "completed")
+        return {"total": len(rows), "completed": done, "pending": len(rows) - done, "categories": cats}
+
+    assert db.get_task_stats(uid) == expected()
+
+    db.add_tasks_bulk(uid, [(f"T{i}", "", ["Work", " School ", ""][i % 3]) for i in range(9)])
+    ids = [t[0] for t in db.get_tasks_by_user(uid)]
+    db.set_status_bulk(uid, ids[:4], "completed")
+    db.update_task(uid, ids[5], "Moved", "", "Health", "", "completed")
+    db.update_task_status(uid, ids[0], "pending")
+    db.delete_task(uid, ids[1])
+    assert db.get_task_stats(uid) == expected()
+
+    db.delete_tasks_bulk(uid, ids)
+    assert db.get_task_stats(uid) == {"total": 0, "completed": 0, "pending": 0, "categories": {}}
+    assert db.connect().execute("SELECT COUNT(*) FROM task_stats WHERE user_id = ?", (uid,)).fetchone()[0] == 0
+
+
+def test_overdue_count_uses_partial_index():
+    plan = " ".join(r[3] for r in db.connect().execute(
+        f"EXPLAIN QUERY PLAN SELECT COUNT(*) FROM tasks "
+        f"WHERE user_id = ? AND {db.DUE_TS_KEY} < ? AND status = 'pending'", (1, 0)
+    ))
+    assert "idx_tasks_user_pending_due" in plan
+
+
+def test_delete_user_tombstones_then_purges_in_chunks(monkeypatch):
+    monkeypatch.setattr(db, "PURGE_CHUNK_SIZE", 5)
+    db.create_user("Heavy", "heavy@email.com", bcrypt.hash("pw"))
+    uid = db.get_user_by_email("heavy@email.com")["id"]
+    db.add_tasks_bulk(uid, [(f"Task {i}",) for i in range(12)])
+    db.add_journal(uid, "Day", "text", "")
+    db.set_setting(uid, "theme_name", "Dark Mode")
+
+    progress = []
+    thread = db.delete_user(uid, background=True, on_progress=progress.append)
+
+    # Invisible as soon as delete_user returns
+    assert db.get_user_by_email("heavy@email.com") is None
+    assert all(u["id"] != uid for u in db.get_users())
+
+    thread.join(10)
+    assert progress[-1]["finished"] is True
+    assert progress[-1]["done"] == progress[-1]["total"] >= 14
+    assert len(progress) > 4  # reported per chunk
+    assert db.get_purge_progress(uid)["finished"] is True
+
+    conn = db.connect()
+    assert conn.execute("SELECT COUNT(*) FROM users WHERE id = ?", (uid,)).fetchone()[0] == 0
+    for table in db.PURGE_TABLES + ("task_stats",):
+        assert conn.execute(f"SELECT COUNT(*) FROM {table} WHERE user_id = ?", (uid,)).fetchone()[0] == 0
+
+
+def test_resume_pending_purges():
+    db.create_user("Crashed", "crashed@email.com", bcrypt.hash("pw"))
+    uid = db.get_user_by_email("crashed@email.com")["id"]
+    db.add_task(uid, "Left behind")
+    with db.transaction() as cur:
+        cur.execute("UPDATE users SET is_deleted = 1 WHERE id = ?", (uid,))
+
+    assert uid in db.resume_pending_purges()
+    for _ in range(200):
+        if (db.get_purge_progress(uid) or {}).get("finished"):
+            break
+        time.sleep(0.05)
+
+    assert db.get_purge_progress(uid)["finished"] is True
+    assert db.connect().execute("SELECT COUNT(*) FROM tasks WHERE user_id = ?", (uid,)).fetchone()[0] == 0
+
+
+def test_readers_return_typed_records():
+    user = db.get_user_by_email("test@email.com")
+    assert isinstance(user, db.User)
+
+    db.add_task(user["id"], "Typed", "", "Work", "2026-05-01 9:00 AM")
+    task = next(t for t in db.get_tasks_by_user(user["id"]) if t.title == "Typed")
+    assert isinstance(task, db.Task)
+    assert task.status is db.TaskStatus.PENDING
+    assert task.due == datetime(2026, 5, 1, 9, 0)
+
+    db.add_journal(user["id"], "Typed entry", "body", "")
+    entry = next(j for j in db.get_journals_by_user(user["id"]) if j.title == "Typed entry")
+    assert db.get_journal(user["id"], entry.id) == entry
+    assert db.get_journal(user["id"] + 1000, entry.id) is None
+
+    db.add_log("TYPED", "", user_id=user["id"])
+    assert isinstance(db.get_logs(limit=1)[0], db.LogEntry)
+
+
 # -----------------------------
 # Settings Tests
 # -----------------------------
@@ -125,6 +515,18 @@ def test_set_and_get_setting():
     assert value == "dark"
 
 
+def test_set_settings_batch_and_get_settings():
+    user = db.get_user_by_email("test@email.com")
+
+    db.set_settings(user["id"], {"theme": "light", "notify": True, "size": 14})
+
+    settings = db.get_settings(user["id"])
+    assert settings["theme"] == "light"
+    assert settings["notify"] == db.setting_text(True) == "1"
+    assert settings["size"] == "14"
+    assert db.get_setting(user["id"], "notify", False) is True
+
+
 # -----------------------------
 # Log Tests
 # -----------------------------
@@ -136,6 +538,70 @@ def test_add_log():
     logs = db.get_logs()
 
     assert any(log["action"] == "TEST_ACTION" for log in logs)
+
+
+def test_add_log_batches_and_resolves_email():
+    user = db.get_user_by_email("test@email.com")
+
+    for i in range(250):
+        db.add_log("BATCH_ACTION", f"row {i}", user["id"])
+
+    logs = [log for log in db.get_logs() if log["action"] == "BATCH_ACTION"]
+
+    assert len(logs) == 250
+    assert all(log["email"] == "test@email.com" for log in logs)
+
+
+def test_log_retention_archives_by_age_and_count():
+    with db.transaction() as cur:
+        cur.executemany(
+            "INSERT INTO logs (action, details, created_at) VALUES (?, ?, ?)",
+            [("OLD_ACTION", str(i), "2020-01-15 10:00:00") for i in range(7)]
+            + [("OLD_ACTION", "feb", "2020-02-01 08:00:00")],
+        )
+    live_before = len(db.get_logs())
+
+    stats = db.run_log_maintenance(max_age_days=365, max_rows=10**9, batch_size=3, pause=0)
+
+    assert stats == {"archived": 8, "batches": 3}
+    assert not any(log["action"] == "OLD_ACTION" for log in db.get_logs())
+    assert {"logs_archive_2020_01", "logs_archive_2020_02"} <= set(db.list_log_archives())
+    assert db.connect().execute("SELECT COUNT(*) FROM logs_archive_2020_01").fetchone()[0] == 7
+
+    # Row cap: keep only the newest 5 live rows
+    stats = db.run_log_maintenance(max_age_days=-1, max_rows=5, pause=0)
+    assert stats["archived"] == live_before - 8 - 5
+    assert len(db.get_logs()) == 5
+    assert len(db.get_logs(limit=2)) == 2
+
+
+def test_log_rollups_survive_archiving():
+    db.add_log("ROLLUP_ACTION", "a")
+    db.add_log("ROLLUP_ACTION", "b")
+
+    before = [r for r in db.get_log_rollups(days=2) if r["action"] == "ROLLUP_ACTION"]
+    db.run_log_maintenance(max_age_days=-1, max_rows=0, pause=0)
+    after = [r for r in db.get_log_rollups(days=2) if r["action"] == "ROLLUP_ACTION"]
+
+    assert sum(r["count"] for r in before) == 2
+    assert after == before
+    assert db.get_logs() == []
+
+
+def test_log_maintenance_failures_reach_stderr(monkeypatch, capsys):
+    def boom(**kwargs):
+        raise RuntimeError("disk went away")
+
+    monkeypatch.setattr(db, "run_log_maintenance", boom)
+    monkeypatch.setattr(db, "_maintenance_started", False)
+    db.start_log_maintenance()
+    for thread in threading.enumerate():
+        if thread.name == "taskwise-log-maintenance":
+            thread.join(5)
+
+    captured = capsys.readouterr()
+    assert "[log maintenance] stopped: disk went away" in captured.err
+    assert "log maintenance" not in captured.out
     
 # -----------------------------
 # Title Input Tests
@@ -150,4 +616,49 @@ def test_auto_untitled_task():
 
     titles = [t[1] for t in tasks]
 
-    assert "Untitled" in titles
\ No newline at end of file
+    assert "Untitled" in titles
+
+def test_untitled_reuses_lowest_gap():
+    db.create_user("Blank", "blank@email.com", "password123")
+    uid = db.get_user_by_email("blank@email.com")["id"]
+
+    for _ in range(4):
+        db.add_task(uid, "", "", "", "")
+    db.add_task(uid, "Untitled (5)", "", "", "")  # typed by hand, still reserves 5
+
+    ids = {t[1]: t[0] for t in db.get_tasks_by_user(uid)}
+    db.delete_task(uid, ids["Untitled (1)"])
+    db.delete_task(uid, ids["Untitled (2)"])
+
+    db.add_task(uid, "", "", "", "")
+    db.update_task(uid, ids["Untitled (3)"], "Renamed", "", "", "", "pending")
+    db.add_task(uid, "", "", "", "")
+    db.add_task(uid, "", "", "", "")
+    db.add_task(uid, "", "", "", "")
+
+    titles = sorted(t[1] for t in db.get_tasks_by_user(uid))
+    assert titles == [
+        "Renamed", "Untitled", "Untitled (1)", "Untitled (2)",
+        "Untitled (3)", "Untitled (4)", "Untitled (5)",
+    ]
+
+    db.add_task(uid, "", "", "", "")  # skips the hand-typed 5
+    assert "Untitled (6)" in [t[1] for t in db.get_tasks_by_user(uid)]
+
+    # Clearing a title lets the task keep its own number
+    db.update_task(uid, ids["Untitled (5)"], "", "", "", "", "pending")
+    titles = [t[1] for t in db.get_tasks_by_user(uid)]
+    assert titles.count("Untitled (5)") == 1
+
+
+def test_untitled_journals():
+    user = db.get_user_by_email("blank@email.com")
+
+    db.add_journal(user["id"])
+    db.add_journal(user["id"])
+    first = [j for j in db.get_journals_by_user(user["id"]) if j[1] == "Untitled"][0]
+
+    db.update_journal(user["id"], first[0], "", "kept blank")
+
+    titles = sorted(j[1] for j in db.get_journals_by_user(user["id"]))
+    assert titles == ["Untitled", "Untitled (1)"]
@@ -0,0 +1,79 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import sqlite3
+
+import pytest
+
+import database.db as db
+from database import instrumentation
+
+
+@pytest.fixture
+def instrumented(tmp_path, monkeypatch):
+    db.close_connections()
+    monkeypatch.setattr(db, "DB_NAME", str(tmp_path / "inst.db"))
+    instrumentation.reset()
+    instrumentation.enable(threshold_ms=10_000)
+    yield tmp_path
+    instrumentation.disable()
+    instrumentation.reset()
+    db.close_connections()
+
+
+def _function(snap, name):
+    return next(r for r in snap["functions"] if r["function"] == name)
+
+
+# -----------------------------
+# Test: counters per statement and per db function
+# -----------------------------
+def test_counts_statements_by_calling_function(instrumented, monkeypatch):
+    # Queued writes share the writer's transaction; this checks direct attribution
+    monkeypatch.setattr(db, "DB_SINGLE_WRITER", False)
+    db.init_db()
+    user_id = db.create_user("Ann", "ann@x.com", "h")
+    db.add_task(user_id, "Pay rent", "", "Bills", "")
+    for _ in range(3):
+        db.get_tasks_by_user(user_id)
+
+    assert isinstance(db.connect(), instrumentation.InstrumentedConnection)
+    snap = instrumentation.snapshot()
+
+    reads = _function(snap, "get_tasks_by_user")
+    assert reads["calls"] == 3
+    assert 0 <= reads["p50_ms"] <= reads["p95_ms"] <= reads["p99_ms"] <= reads["max_ms"]
+
+    stmt = next(s for s in snap["statements"] if s["sql"].startswith("SELECT id, title, description"))
+    assert stmt["functions"] == ["get_tasks_by_user"] and stmt["calls"] == 3
+    # BEGIN IMMEDIATE is charged to the function that opened the transaction
+    begin = next(s for s in snap["statements"] if s["sql"] == "BEGIN IMMEDIATE")
+    assert "add_task" in begin["functions"] and "transaction" not in begin["functions"]
+    assert snap["slow_queries"] == []
+
+
+def test_slow_queries_carry_their_plan(instrumented, capsys):
+    db.init_db()
+    instrumentation.enable(threshold_ms=0)
+    db.get_user_by_email("nobody@x.com")
+
+    slow = instrumentation.snapshot()["slow_queries"]
+    entry = next(q for q in slow if q["function"] == "get_user_by_email")
+    assert any("sqlite_autoindex_users_1" in line for line in entry["plan"])
+    assert "slow query" in capsys.readouterr().err
+
+
+def test_dump_json_and_disabled_connections(instrumented):
+    db.init_db()
+    path = instrumented / "snap.json"
+    instrumentation.dump_json(str(path), top=3)
+
+    data = json.loads(path.read_text())
+    assert data["enabled"] and len(data["functions"]) <= 3
+
+    instrumentation.disable()
+    db.close_connections()
+    assert type(db.connect()) is sqlite3.Connection
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from database.async_db import RequestScope
+from database.models import Journal
+from taskwise.pages.journal_page import JournalPage
+
+
+class DummyDB:
+    """Journal reads that record whether they ran on the main (UI) thread."""
+
+    def __init__(self):
+        self.calls = []
+        self.entry = Journal.from_row((7, "Trip", "Went hiking", "Happy",
+                                       "2026-03-01 10:00:00", "2026-03-01 10:00:00", "", ""))
+
+    def _record(self, name):
+        self.calls.append((name, threading.current_thread() is threading.main_thread()))
+
+    def get_journals_by_user(self, user_id):
+        self._record("get_journals_by_user")
+        return [self.entry]
+
+    def get_change_version(self, user_id):
+        return 1
+
+    def changes_since(self, user_id, version, kinds):
+        return {"version": version, "reset": False, "journals": [], "deleted_journals": []}
+
+    def get_journal(self, user_id, journal_id):
+        self._record("get_journal")
+        return self.entry if journal_id == self.entry.id else None
+
+
+class DummyState:
+    def __init__(self):
+        self.db = DummyDB()
+        self.requests = RequestScope()
+        self.user = {"id": 1, "username": "Ivy"}
+        self.colors = {}
+
+
+class CollectingPage(Mock):
+    """Stands in for ft.Page: run_task only collects the coroutines."""
+
+    def run_task(self, handler, *args):
+        self.__dict__.setdefault("tasks", []).append(handler(*args))
+
+
+@pytest.fixture
+def journal():
+    return JournalPage(DummyState())
+
+
+def _drain(page):
+    async def run():
+        while page.__dict__.get("tasks"):
+            await page.tasks.pop(0)
+
+    asyncio.run(run())
+
+
+def test_editor_fetches_the_entry_off_the_ui_thread(journal):
+    page = CollectingPage()
+    journal._selected_id = 7
+    journal.view(page)
+    assert ("get_journal", True) not in journal.state.db.calls
+
+    _drain(page)
+    assert ("get_journal", False) in journal.state.db.calls
+    assert journal._selected_id == 7  # the entry was found
+
+
+def test_editor_drops_a_selection_that_is_gone(journal):
+    page = CollectingPage()
+    journal.view(page)
+    _drain(page)
+
+    journal._selected_id = 99
+    journal._refresh_editor(page)
+    _drain(page)
+    assert journal._selected_id is None
@@ -0,0 +1,137 @@
+import sys
+import os
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from database.log_writer import LogWriter
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+class Recorder:
+    def __init__(self):
+        self.batches = []
+        self.threads = set()
+
+    def __call__(self, rows):
+        self.batches.append(list(rows))
+        self.threads.add(threading.current_thread().name)
+
+
+# -----------------------------
+# Batching Tests
+# -----------------------------
+def test_flush_writes_everything_in_order():
+    rec = Recorder()
+    writer = LogWriter(rec, batch_size=50, interval=10)
+
+    for i in range(120):
+        writer.put(i)
+
+    assert writer.flush()
+    assert [r for batch in rec.batches for r in batch] == list(range(120))
+    assert max(len(batch) for batch in rec.batches) == 50
+    assert threading.current_thread().name not in rec.threads
+
+    writer.close()
+
+
+def test_close_flushes_pending_rows():
+    rec = Recorder()
+    writer = LogWriter(rec, batch_size=1000, interval=10)
+
+    writer.put("a")
+    writer.put("b")
+    writer.close()
+
+    assert rec.batches == [["a", "b"]]
+
+
+def test_full_queue_writes_inline():
+    rec = Recorder()
+    blocker = threading.Event()
+
+    def slow_in_worker(rows):
+        # Hold the worker so the queue stays full; inline writes go straight through
+        if threading.current_thread().name == "taskwise-log-writer":
+            blocker.wait(5)
+        rec(rows)
+
+    writer = LogWriter(slow_in_worker, interval=0, maxsize=1)
+    for row in ("first", "second", "third"):
+        writer.put(row)
+
+    assert "MainThread" in rec.threads
+
+    blocker.set()
+    writer.close()
+    assert sorted(r for batch in rec.batches for r in batch) == ["first", "second", "third"]
+
+
+def test_write_errors_do_not_kill_worker():
+    rec = Recorder()
+    calls = []
+
+    def flaky(rows):
+        calls.append(rows)
+        if len(calls) == 1:
+            raise RuntimeError("disk full")
+        rec(rows)
+
+    writer = LogWriter(flaky, interval=10, retries=0)  # no retry: the first row is lost
+    writer.put("lost")
+    writer.flush()
+    writer.put("kept")
+    writer.flush()
+    writer.close()
+
+    assert rec.batches == [["kept"]]
+    assert writer.stats()["dropped"] == 1
+
+
+# -----------------------------
+# Failure handling
+# -----------------------------
+class Flaky(Recorder):
+    """Fails the first `failures` calls, and always on rows listed in `bad`."""
+
+    def __init__(self, failures=0, bad=()):
+        super().__init__()
+        self.failures = failures
+        self.bad = set(bad)
+
+    def __call__(self, rows):
+        if self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError("database is locked")
+        if self.bad & set(rows):
+            raise RuntimeError("bad row")
+        super().__call__(rows)
+
+
+def test_transient_failure_is_retried():
+    rec = Flaky(failures=2)
+    writer = LogWriter(rec, batch_size=1000, interval=10, retry_delay=0.001)
+
+    for i in range(5):
+        writer.put(i)
+    assert writer.flush()
+
+    assert rec.batches == [[0, 1, 2, 3, 4]]
+    assert writer.stats() == {"written": 5, "retried": 2, "dropped": 0}
+    writer.close()
+
+
+def test_only_failing_rows_are_dropped():
+    rec = Flaky(bad={2})
+    writer = LogWriter(rec, batch_size=1000, interval=10, retries=1, retry_delay=0.001)
+
+    for i in range(4):
+        writer.put(i)
+    assert writer.flush()
+
+    assert [r for batch in rec.batches for r in batch] == [0, 1, 3]
+    assert writer.stats() == {"written": 3, "retried": 1, "dropped": 1}
+    writer.close()
@@ -55,6 +55,13 @@ def mock_page():
     return MockPage()
 
 
+@pytest.fixture(autouse=True)
+def no_background_startup():
+    """main() starts backups and the password pool; neither belongs in a unit test."""
+    with patch("app.main.backup") as mock_backup, patch("app.main.passwords") as mock_passwords:
+        yield mock_backup, mock_passwords
+
+
 @patch("app.main.db")
 @patch("app.main.get_secret")
 def test_main_initialization(mock_secret, mock_db, mock_page):
@@ -71,6 +78,7 @@ def test_main_initialization(mock_secret, mock_db, mock_page):
     assert mock_page.window_height == 600
 
     mock_db.init_db.assert_called_once()
+    mock_db.start_log_maintenance.assert_called_once()
 
 
 @patch("app.main.db")
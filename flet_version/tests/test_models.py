@@ -0,0 +1,71 @@
+from datetime import datetime
+
+import pytest
+
+from database.models import Journal, LogEntry, Task, TaskStatus, User
+
+
+# -----------------------------
+# Test: Task records
+# -----------------------------
+def test_task_from_row_parses_once():
+    t = Task.from_row((7, "Pay rent", "", "Bills", "2026-03-01", "Pending",
+                       "2026-02-01 08:30:00", "2026-02-01 08:30:00", 1772409540))
+
+    assert t.status is TaskStatus.PENDING
+    assert t.due == datetime(2026, 3, 1, 23, 59)
+    assert t.created == datetime(2026, 2, 1, 8, 30)
+    assert not t.is_completed
+    assert not hasattr(t, "__dict__")
+
+
+def test_task_keeps_tuple_access():
+    row = (1, "A", "d", "Work", "", "completed", "c", "u", None)
+    t = Task.from_row(row)
+
+    assert len(t) == 9
+    assert t[1] == "A" and t[-1] is None
+    assert t[:2] == (1, "A")
+    assert tuple(t) == row and t == row
+    with pytest.raises(IndexError):
+        t[9]
+
+    task_id, title, *_ = t
+    assert (task_id, title) == (1, "A")
+
+
+def test_task_status_is_a_plain_string():
+    assert TaskStatus.COMPLETED == "completed"
+    assert f"{TaskStatus.PENDING}" == str(TaskStatus.PENDING) == "pending"
+    assert TaskStatus.parse(" Completed ") is TaskStatus.COMPLETED
+    assert TaskStatus.parse("archived") == "archived"
+
+
+# -----------------------------
+# Test: Journal / User / LogEntry records
+# -----------------------------
+def test_journal_snippet_and_dates():
+    j = Journal.from_row((3, "Day", "text", "", "2026-01-02 10:00:00", "bad", None, None, "[te]xt"))
+
+    assert j.snippet == "[te]xt"
+    assert j.ai_reflection == "" and j.ai_mood == ""
+    assert j.created == datetime(2026, 1, 2, 10, 0)
+    assert j.updated is None
+
+
+def test_user_reads_like_a_dict():
+    u = User.from_row((1, "Ivy", "ivy@x.com", "hash", "admin", 0))
+
+    assert u["email"] == u.email == "ivy@x.com"
+    assert u.get("missing", "x") == "x"
+    assert u.is_banned is False and u.is_admin
+    assert dict(u) == {"id": 1, "name": "Ivy", "email": "ivy@x.com",
+                       "password_hash": "hash", "role": "admin", "is_banned": False}
+    assert User.from_row(None) is None
+
+
+def test_log_entry_reads_like_a_dict():
+    log = LogEntry.from_row((1, 2, "a@b.c", "Login", "", "2026-01-01 00:00:00"))
+
+    assert log.get("action") == "Login"
+    assert log["created"] == datetime(2026, 1, 1)
@@ -0,0 +1,102 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from app import passwords
+
+
+@pytest.fixture
+def cheap(monkeypatch):
+    """Low bcrypt costs so hashing in tests stays fast; stops the pool afterwards."""
+    monkeypatch.setattr(passwords, "PASSWORD_MIN_ROUNDS", 4)
+    monkeypatch.setattr(passwords, "_rounds", 5)
+    yield
+    passwords.shutdown()
+
+
+# -----------------------------
+# Test: work factor
+# -----------------------------
+def test_calibration_stays_in_bounds(monkeypatch):
+    monkeypatch.setattr(passwords, "PASSWORD_MIN_ROUNDS", 10)
+    monkeypatch.setattr(passwords, "PASSWORD_MAX_ROUNDS", 14)
+    assert passwords.calibrate_rounds(target_ms=0.001) == 10
+    assert passwords.calibrate_rounds(target_ms=10 ** 9) == 14
+
+
+def test_hash_rounds_reads_the_stored_cost(cheap):
+    assert passwords.hash_rounds(passwords.hash_sync("pw", 4)) == 4
+    assert passwords.hash_rounds("$2b$12$example") is None
+
+
+# -----------------------------
+# Test: pool-backed hashing
+# -----------------------------
+def test_verify_and_update_upgrades_weak_hashes(cheap):
+    weak = passwords.hash_sync("secret", 4)
+
+    async def run():
+        return (
+            await passwords.verify_and_update("secret", weak),
+            await passwords.verify_and_update("wrong", weak),
+            await passwords.verify_and_update("secret", passwords.hash_sync("secret", 5)),
+            await passwords.verify_password("secret", "not a hash"),
+            await passwords.hash_password("fresh"),
+        )
+
+    upgraded, wrong, current, malformed, fresh = asyncio.run(run())
+    ok, new_hash = upgraded
+    assert ok and passwords.hash_rounds(new_hash) == 5
+    assert passwords.verify_sync("secret", new_hash)
+    assert wrong == (False, None)
+    assert current == (True, None)
+    assert malformed is False
+    assert passwords.hash_rounds(fresh) == 5 and passwords.verify_sync("fresh", fresh)
+
+
+def test_hash_many_keeps_order(cheap):
+    hashes = passwords.hash_many(["a", "b", "c"], rounds=4)
+    assert [passwords.verify_sync(pw, h) for pw, h in zip("abc", hashes)] == [True] * 3
+    assert not passwords.verify_sync("b", hashes[0])
+
+
+def test_start_calibrates_in_a_worker(monkeypatch):
+    monkeypatch.setattr(passwords, "_rounds", None)
+    monkeypatch.setattr(passwords, "PASSWORD_ROUNDS", "")
+    monkeypatch.setattr(passwords, "calibrate_rounds", lambda: pytest.fail("calibrated in this process"))
+    try:
+        rounds = passwords.start().result(30)
+        assert passwords.PASSWORD_MIN_ROUNDS <= rounds <= passwords.PASSWORD_MAX_ROUNDS
+        # The done-callback may run just after result() returns
+        for _ in range(100):
+            if passwords._rounds is not None:
+                break
+            time.sleep(0.05)
+        assert passwords._rounds == rounds
+    finally:
+        passwords.shutdown()
+
+
+def test_early_hashes_wait_for_the_calibration(cheap, monkeypatch):
+    calibration = Future()
+    monkeypatch.setattr(passwords, "_rounds", None)
+    monkeypatch.setattr(passwords, "PASSWORD_ROUNDS", "")
+    monkeypatch.setattr(passwords, "_calibration", calibration)
+
+    async def run():
+        pending = [asyncio.ensure_future(passwords.hash_password(pw)) for pw in ("a", "b")]
+        await asyncio.sleep(0.05)
+        assert not any(task.done() for task in pending)
+        calibration.set_result(4)
+        return await asyncio.gather(*pending)
+
+    hashes = asyncio.run(run())
+    assert [passwords.hash_rounds(h) for h in hashes] == [4, 4]
+    assert passwords._rounds == 4
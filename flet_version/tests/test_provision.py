@@ -0,0 +1,99 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+
+import pytest
+
+import database.db as db
+import provision_users
+from app import passwords
+
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    db.close_connections()
+    monkeypatch.setattr(db, "DB_NAME", str(tmp_path / "provision.db"))
+    db.init_db()
+    db.create_user("Ann", "ann@x.com", "h")
+    yield tmp_path
+    passwords.shutdown()
+    db.flush_logs()
+    db.close_connections()
+
+
+# -----------------------------
+# Test: bulk insert
+# -----------------------------
+def test_create_users_bulk_reports_duplicates(fresh_db):
+    created = db.create_users_bulk([
+        ("Bob", "bob@x.com", "h1"),
+        ("Ann again", "ann@x.com", "h2"),
+        ("Cat", "cat@x.com", "h3", "admin"),
+        ("Bob twin", "bob@x.com", "h4"),
+    ])
+    assert created == [True, False, True, False]
+    assert db.get_user_by_email("cat@x.com")["role"] == "admin"
+    assert db.get_user_by_email("bob@x.com")["password_hash"] == "h1"
+    assert db.get_taken_emails(["ann@x.com", "bob@x.com", "nobody@x.com"]) == {"ann@x.com", "bob@x.com"}
+
+
+# -----------------------------
+# Test: CLI provisioning
+# -----------------------------
+def test_provision_csv(fresh_db):
+    path = fresh_db / "users.csv"
+    path.write_text(
+        "Name,Email,Password,Role\n"
+        "Bob,Bob@X.com ,password-b,\n"
+        "Ann,ann@x.com,password-a,user\n"
+        "Dee,dee@x.com,short,user\n"
+        "Eve,eve@x.com,password-e,root\n"
+        "Bobby,bob@x.com,password-c,user\n"
+        "Fay,fay@x.com,password-f,admin\n",
+        encoding="utf-8",
+    )
+    result = provision_users.provision(str(path), batch_size=2, rounds=4)
+
+    assert result["created"] == 2
+    assert sorted((line, reason) for line, _, reason in result["rejected"]) == [
+        (3, "email already registered"),
+        (4, "password shorter than 8 characters"),
+        (5, "unknown role 'root'"),
+        (6, "email already registered"),
+    ]
+    bob = db.get_user_by_email("bob@x.com")
+    assert bob["name"] == "Bob" and passwords.verify_sync("password-b", bob["password_hash"])
+    assert passwords.hash_rounds(bob["password_hash"]) == 4
+    assert db.get_user_by_email("fay@x.com")["role"] == "admin"
+
+
+def test_provision_jsonl_skips_bad_lines(fresh_db):
+    path = fresh_db / "users.jsonl"
+    lines = [json.dumps({"name": f"U{i}", "email": f"u{i}@x.com", "password": f"password{i}"}) for i in range(5)]
+    lines[2] = "{not json"
+    path.write_text("\n".join(lines) + "\n\n", encoding="utf-8")
+
+    result = provision_users.provision(str(path), rounds=4)
+    assert result["created"] == 4
+    assert result["rejected"] == [(3, "", "not a JSON object")]
+    assert len(db.get_taken_emails([f"u{i}@x.com" for i in range(5)])) == 4
+
+
+@pytest.mark.parametrize("flags, message", [
+    (["--rounds", "3"], "--rounds must be between 4 and 31"),
+    (["--rounds", "32"], "--rounds must be between 4 and 31"),
+    (["--workers", "0"], "--workers must be at least 1"),
+])
+def test_main_rejects_out_of_range_options(tmp_path, monkeypatch, capsys, flags, message):
+    path = tmp_path / "users.csv"
+    path.write_text("name,email,password\n", encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", ["provision_users.py", str(path), *flags])
+
+    with pytest.raises(SystemExit) as exit_info:
+        provision_users.main()
+
+    assert exit_info.value.code == 2
+    assert message in capsys.readouterr().err
@@ -0,0 +1,109 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+import database.db as db
+from benchmarks import datagen
+from database import shard_migrate
+
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    db.close_connections()
+    monkeypatch.setattr(db, "DB_NAME", str(tmp_path / "global.db"))
+    monkeypatch.setattr(db, "DB_SHARDS", "0")
+    yield tmp_path
+    db.close_connections()
+
+
+def _make_users(n):
+    ids = []
+    for i in range(n):
+        db.create_user(f"U{i}", f"u{i}@x.com", "h")
+        ids.append(db.get_user_by_email(f"u{i}@x.com").id)
+    return ids
+
+
+def _user_view(user_id):
+    return (
+        sorted((t.id, t.title, t.category, t.due_ts, str(t.status)) for t in db.get_tasks_by_user(user_id)),
+        sorted((j.id, j.title, j.content) for j in db.get_journals_by_user(user_id)),
+        db.get_settings(user_id),
+        db.get_task_stats(user_id),
+        [t.id for t in db.search_tasks(user_id, "task")[0]],
+    )
+
+
+# -----------------------------
+# Test: hash-sharded routing
+# -----------------------------
+def test_user_data_lives_in_its_shard(fresh_db, monkeypatch):
+    monkeypatch.setattr(db, "DB_SHARDS", "3")
+    db.init_db()
+    ids = _make_users(4)
+    for uid in ids:
+        db.add_task(uid, f"Task for {uid}", "", "Work", "2026-03-01")
+        db.add_task(uid, "", "", "", "")
+        db.add_journal(uid, "Entry", "text")
+        db.set_setting(uid, "theme_name", "Dark Mode")
+
+    assert sorted(os.path.basename(p) for p in db.shard_paths()) == [
+        f"shard-{n:04d}.db" for n in sorted({uid % 3 for uid in ids})
+    ]
+    # The global database keeps users and logs only
+    assert db.connect().execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 0
+
+    for uid in ids:
+        shard = db.connect(uid)
+        assert {r[0] for r in shard.execute("SELECT DISTINCT user_id FROM tasks")} <= {u for u in ids if u % 3 == uid % 3}
+        assert shard.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0  # no admin seeded in shards
+        assert [t.title for t in db.search_tasks(uid, "task")[0]] == [f"Task for {uid}"]
+        assert sorted(t.title for t in db.get_tasks_by_user(uid)) == ["Task for %d" % uid, "Untitled"]
+        assert db.get_task_stats(uid)["total"] == 2
+        assert db.get_setting(uid, "theme_name") == "Dark Mode"
+
+    counts = db.get_user_data_counts()
+    assert counts == {uid: {"tasks": 2, "journals": 1} for uid in ids}
+
+    db.delete_user(ids[0])
+    assert db.get_user_by_id(ids[0]) is None
+    assert db.get_tasks_by_user(ids[0]) == [] and db.get_settings(ids[0]) == {}
+    assert ids[0] not in db.get_user_data_counts()
+
+
+def test_one_file_per_user(fresh_db, monkeypatch):
+    monkeypatch.setattr(db, "DB_SHARDS", "user")
+    db.init_db()
+    ids = _make_users(2)
+    for uid in ids:
+        db.add_tasks_bulk(uid, [("a",), ("b",)])
+
+    assert sorted(os.path.basename(p) for p in db.shard_paths()) == sorted(f"user-{uid}.db" for uid in ids)
+    assert db.get_user_data_counts() == {uid: {"tasks": 2, "journals": 0} for uid in ids}
+
+
+# -----------------------------
+# Test: splitting a single-file database
+# -----------------------------
+def test_migrate_single_file_into_shards(fresh_db):
+    db.init_db()
+    ids = datagen.generate(users=5, tasks_per_user=12, seed=3)["user_ids"]
+    for uid in ids:
+        db.set_setting(uid, "notifications", True)
+        db.add_task(uid, "", "", "", "")  # builds the user's untitled_free ranges
+    before = {uid: _user_view(uid) for uid in ids}
+
+    result = shard_migrate.migrate_to_shards("2", keep_source=True)
+    assert (result["users"], result["shards"], result["tasks"]) == (5, 2, 65)
+    # Re-running skips rows that are already there
+    assert shard_migrate.migrate_to_shards("2")["tasks"] == 0
+
+    assert db.connect().execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 0
+    assert {uid: _user_view(uid) for uid in ids} == before
+
+    # Ids keep counting up from the copied rows in each shard
+    db.add_task(ids[0], "after the move", "", "", "")
+    assert max(t.id for t in db.get_tasks_by_user(ids[0])) > max(t[0] for t in before[ids[0]][0])
@@ -1,6 +1,9 @@
 import pytest
-from datetime import date, datetime, timedelta
+from datetime import date, datetime
+from unittest.mock import Mock
 
+from database.db import now_due_ts
+from database.models import Task
 from taskwise.pages.task_page import TaskPage
 
 
@@ -79,14 +82,16 @@ def test_safe_parse_datetime(page):
 # -----------------------------
 def test_is_overdue(page):
 
-    past = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    past = now_due_ts() - 86400
 
     assert page._is_overdue(past, "pending") is True
+    assert page._is_overdue(past, "completed") is False
+    assert page._is_overdue(None, "pending") is False
 
 
 def test_not_overdue(page):
 
-    future = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    future = now_due_ts() + 86400
 
     assert page._is_overdue(future, "pending") is False
 
@@ -99,10 +104,75 @@ def test_sort_tasks_title(page):
     page.state.current_sort = "Title (A-Z)"
 
     tasks = [
-        (1, "Banana", "", "", "", "", "", ""),
-        (2, "Apple", "", "", "", "", "", ""),
+        Task(1, "Banana"),
+        Task(2, "Apple"),
     ]
 
     sorted_tasks = page._sort_tasks(tasks)
 
-    assert sorted_tasks[0][1] == "Apple"
+    assert sorted_tasks[0].title == "Apple"
+
+
+def test_sort_tasks_by_due_and_created(page):
+
+    tasks = [
+        Task(1, "Later", due_ts=200, created_at="2026-01-01 09:00:00"),
+        Task(2, "Undated", created_at="2026-03-01 09:00:00"),
+        Task(3, "Sooner", due_ts=100, created_at="2026-02-01 09:00:00"),
+    ]
+
+    page.state.current_sort = "Due Date"
+    assert [t.id for t in page._sort_tasks(tasks)] == [3, 1, 2]
+
+    page.state.current_sort = "Date Created"
+    assert [t.id for t in page._sort_tasks(tasks)] == [2, 3, 1]
+
+
+# -----------------------------
+# Test: paging through the DB
+# -----------------------------
+class PagingDB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def query_tasks(self, user_id, category=None, text=None, sort=None, after=None, limit=50):
+        self.calls.append({"category": category, "text": text, "sort": sort, "after": after})
+        start = 0 if after is None else after[1]
+        chunk = self.rows[start:start + limit]
+        more = start + limit < len(self.rows)
+        return chunk, (None, start + limit) if more else None
+
+
+def test_get_filtered_tasks_pages(page):
+
+    rows = [Task(i, f"Task {i}", "", "Work", "", "pending") for i in range(5)]
+    page.state.db = PagingDB(rows)
+    page.state.current_filter = "Work"
+    page.state.current_sort = "Title (A-Z)"
+    page.search_query = "task"
+    page.PAGE_SIZE = 2
+
+    assert [t.id for t in page._get_filtered_tasks()] == [0, 1]
+    assert page.state.db.calls[0] == {"category": "Work", "text": "task", "sort": "Title (A-Z)", "after": None}
+
+    assert [t.id for t in page._load_more_tasks()] == [0, 1, 2, 3]
+    assert [t.id for t in page._load_more_tasks()] == [0, 1, 2, 3, 4]
+    assert page._next_cursor is None
+
+
+# -----------------------------
+# Test: local re-render
+# -----------------------------
+def test_render_task_list_uses_loaded_rows_only(page):
+
+    page.state.db = PagingDB([])  # any query would be recorded
+    page._loaded_tasks = [Task(i, f"Task {i}", "", "Work", "", "pending") for i in range(3)]
+    page._custom_order_ids = [2, 0, 1]
+    page._task_list_host = Mock(page=None)
+    page._build_task_list = lambda _page, tasks: [t.id for t in tasks]
+
+    page._render_task_list(Mock())
+
+    assert page._task_list_host.content == [2, 0, 1]
+    assert page.state.db.calls == []
@@ -0,0 +1,93 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import io
+
+import pytest
+
+import database.db as db
+from database import transfer
+
+
+@pytest.fixture
+def users(tmp_path, monkeypatch):
+    db.close_connections()
+    monkeypatch.setattr(db, "DB_NAME", str(tmp_path / "transfer.db"))
+    db.init_db()
+
+    db.create_user("Src", "src@x.com", "h")
+    source = db.get_user_by_email("src@x.com").id
+    db.add_tasks_bulk(source, [(f"Task {i}", "d", "Work", "2026-03-01 9:00 AM") for i in range(25)] + [("",)])
+    db.set_status_bulk(source, [1, 2], "completed")
+    db.add_journal(source, "Day one", "line 1\nline, \"quoted\" 2", "Happy")
+    db.set_settings(source, {"theme_name": "Dark Mode", "notifications": True})
+
+    db.create_user("Dst", "dst@x.com", "h")
+    target = db.get_user_by_email("dst@x.com").id
+    yield source, target
+    db.close_connections()
+
+
+def _task_view(user_id):
+    return sorted((t.title, t.category, t.due_ts, str(t.status)) for t in db.get_tasks_by_user(user_id))
+
+
+# -----------------------------
+# Test: export -> import round trips
+# -----------------------------
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_round_trip(users, fmt):
+    source, target = users
+    buf = io.BytesIO()
+
+    counts = transfer.export_user(source, buf, fmt=fmt, batch_size=4)
+    assert counts == {"task": 26, "journal": 1, "setting": 2}
+
+    buf.seek(0)
+    assert transfer.import_user(target, buf, batch_size=10) == counts
+    assert not buf.closed  # caller-owned streams stay open
+
+    assert _task_view(target) == _task_view(source)
+    [journal] = db.get_journals_by_user(target)
+    assert (journal.title, journal.content, journal.mood) == ("Day one", "line 1\nline, \"quoted\" 2", "Happy")
+    assert journal.created_at == db.get_journals_by_user(source)[0].created_at
+    assert db.get_settings(target) == {"theme_name": "Dark Mode", "notifications": "1"}
+
+
+def test_compressed_file_round_trip(users, tmp_path):
+    pytest.importorskip("zstandard")
+    source, target = users
+    path = tmp_path / "export.csv.zst"
+
+    transfer.export_user(source, str(path))
+    assert path.read_bytes()[:4] == b"\x28\xb5\x2f\xfd"
+
+    transfer.import_user(target, str(path))
+    assert _task_view(target) == _task_view(source)
+
+
+def test_import_is_batched_and_streamed(users, monkeypatch):
+    source, target = users
+    buf = io.BytesIO()
+    transfer.export_user(source, buf)
+    buf.seek(0)
+
+    batches, progress = [], []
+    real_restore = db.restore_tasks
+    monkeypatch.setattr(db, "restore_tasks", lambda uid, rows: batches.append(len(rows)) or real_restore(uid, rows))
+
+    transfer.import_user(target, buf, batch_size=10, on_progress=progress.append)
+
+    assert batches == [10, 10, 6]
+    assert progress == sorted(progress) and progress[-1] == 29
+
+
+def test_rejects_foreign_streams(users):
+    _, target = users
+    with pytest.raises(transfer.TransferError):
+        list(transfer.iter_records(io.BytesIO(b'{"type": "meta", "format": "other"}\n'), fmt="jsonl"))
+    with pytest.raises(transfer.TransferError):
+        transfer.import_user(target, io.BytesIO(b"title,category\nA,Work\n"), fmt="csv")
+    assert db.get_tasks_by_user(target) == []
@@ -30,4 +30,86 @@ def test_encrypt_decrypt(monkeypatch):
 def test_invalid_token(monkeypatch):
     monkeypatch.setenv("BROKEN_SECRET", "ENC(invalidtoken)")
     with pytest.raises(RuntimeError):
-        vault.get_secret("BROKEN_SECRET")
\ No newline at end of file
+        vault.get_secret("BROKEN_SECRET")
+
+@pytest.fixture
+def isolated_vault(tmp_path, monkeypatch):
+    """A vault reading .env and .vault_key from tmp_path, with nothing loaded yet."""
+    monkeypatch.setattr(vault, "ENV_PATH", tmp_path / ".env")
+    monkeypatch.setattr(vault, "VAULT_KEY_PATH", tmp_path / ".vault_key")
+    monkeypatch.setattr(vault, "_env_loaded", False)
+    monkeypatch.setattr(vault, "_env_from_file", {})
+    monkeypatch.setattr(vault, "_fernet", None)
+    monkeypatch.setattr(vault, "_decrypted", {})
+    yield tmp_path
+    for name in vault._env_from_file:
+        os.environ.pop(name, None)
+
+def test_import_does_no_key_or_crypto_work():
+    import subprocess
+    code = (
+        "import database.db\n"
+        "from app import vault\n"
+        "assert vault._fernet is None and not vault._decrypted\n"
+    )
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    subprocess.run([sys.executable, "-c", code], cwd=root, check=True)
+
+def test_key_and_env_load_lazily(isolated_vault, monkeypatch):
+    monkeypatch.delenv("LAZY_SECRET", raising=False)
+    (isolated_vault / ".env").write_text("LAZY_SECRET=from-file\n")
+    assert not vault._env_loaded
+    assert vault.get_secret("LAZY_SECRET") == "from-file"
+    # A plain value never needs the key
+    assert not (isolated_vault / ".vault_key").exists()
+
+def test_decrypted_values_are_memoized(isolated_vault, monkeypatch):
+    token = vault.encrypt_value("hunter2")
+    monkeypatch.setenv("MEMO_SECRET", token)
+    calls = []
+    real = vault._get_fernet
+    monkeypatch.setattr(vault, "_get_fernet", lambda: calls.append(1) or real())
+    assert [vault.get_secret("MEMO_SECRET") for _ in range(5)] == ["hunter2"] * 5
+    assert len(calls) == 1
+
+def test_get_secrets(isolated_vault, monkeypatch):
+    monkeypatch.setenv("BULK_A", "a")
+    monkeypatch.setenv("BULK_B", vault.encrypt_value("b"))
+    monkeypatch.delenv("BULK_C", raising=False)
+    assert vault.get_secrets(["BULK_A", "BULK_B", "BULK_C"]) == {"BULK_A": "a", "BULK_B": "b", "BULK_C": None}
+    assert vault.get_secrets(["BULK_A", "BULK_C"], {"BULK_C": "c"}) == {"BULK_A": "a", "BULK_C": "c"}
+
+def test_reload_rereads_env_but_real_env_wins(isolated_vault, monkeypatch):
+    monkeypatch.delenv("RELOAD_SECRET", raising=False)
+    monkeypatch.delenv("GONE_SECRET", raising=False)
+    monkeypatch.setenv("REAL_SECRET", "process")
+    env = isolated_vault / ".env"
+    env.write_text("RELOAD_SECRET=one\nGONE_SECRET=x\nREAL_SECRET=file\n")
+    assert vault.get_secrets(["RELOAD_SECRET", "REAL_SECRET"]) == {"RELOAD_SECRET": "one", "REAL_SECRET": "process"}
+
+    env.write_text("RELOAD_SECRET=two\nREAL_SECRET=file\n")
+    assert vault.get_secret("RELOAD_SECRET") == "one"  # cached until reload()
+    vault.reload()
+    assert vault.get_secret("RELOAD_SECRET") == "two"
+    assert vault.get_secret("GONE_SECRET") is None
+    assert vault.get_secret("REAL_SECRET") == "process"
+
+def test_rotate_key_reencrypts_env(isolated_vault, monkeypatch):
+    monkeypatch.delenv("ROTATED_SECRET", raising=False)
+    old_token = vault.encrypt_value("s3cret")
+    env = isolated_vault / ".env"
+    env.write_text(f"# comment\nPLAIN=1\nROTATED_SECRET={old_token}\n")
+    old_key = vault._read_keys()[0]
+
+    assert vault.rotate_key() == 1
+    keys = vault._read_keys()
+    assert len(keys) == 2 and keys[1] == old_key
+    assert old_token not in env.read_text() and "PLAIN=1\n" in env.read_text()
+    assert vault.get_secret("ROTATED_SECRET") == "s3cret"
+
+    assert vault.rotate_key(drop_old=True) == 1
+    assert len(vault._read_keys()) == 1
+    assert vault.get_secret("ROTATED_SECRET") == "s3cret"
+    monkeypatch.setenv("OLD_TOKEN", old_token)
+    with pytest.raises(RuntimeError):
+        vault.get_secret("OLD_TOKEN")
@@ -0,0 +1,127 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import threading
+
+import pytest
+
+import database.db as db
+
+
+@pytest.fixture
+def user(tmp_path, monkeypatch):
+    db.close_connections()
+    monkeypatch.setattr(db, "DB_NAME", str(tmp_path / "writer.db"))
+    monkeypatch.setattr(db, "DB_SINGLE_WRITER", True)
+    db.init_db()
+    db.create_user("Ann", "ann@x.com", "h")
+    yield db.get_user_by_email("ann@x.com").id
+    db.flush_writes()
+    db.close_connections()
+
+
+def _hold_writer(user_id):
+    """Parks the writer thread on a write until the returned event is set."""
+    release, parked = threading.Event(), threading.Event()
+
+    def block(_user_id):
+        parked.set()
+        release.wait(5)
+
+    db._write_queue.submit(db.user_db_path(user_id), block, (user_id,))
+    assert parked.wait(5)
+    return release
+
+
+# -----------------------------
+# Test: one transaction per tick, coalescing, futures
+# -----------------------------
+def test_queued_writes_share_a_transaction_and_coalesce(user):
+    db.add_task(user, "flip me")
+    task_id = db.get_tasks_by_user(user)[0].id
+    db._write_queue.reset_stats()
+
+    release = _hold_writer(user)
+    flips = [
+        db.update_task_status.submit(user, task_id, status)
+        for status in ("completed", "pending", "completed", "pending", "completed")
+    ]
+    added = db.add_journal.submit(user, "queued", "")
+    assert not any(f.done() for f in flips)
+    release.set()
+
+    assert [f.result(5) for f in flips] == [None] * 5
+    assert db.get_journal(user, added.result(5)).title == "queued"
+    assert str(db.get_tasks_by_user(user)[0].status) == "completed"
+
+    stats = db.write_queue_stats()
+    assert stats["coalesced"] == 4
+    assert stats["transactions"] == 2  # the parked write, then everything queued behind it
+
+
+def test_failed_write_rolls_back_alone(user):
+    release = _hold_writer(user)
+
+    def broken(user_id):
+        db.add_task(user_id, "never committed")
+        raise ValueError("boom")
+
+    good = db.add_task.submit(user, "kept")
+    bad = db._write_queue.submit(db.user_db_path(user), broken, (user,))
+    release.set()
+
+    good.result(5)
+    with pytest.raises(ValueError):
+        bad.result(5)
+    assert [t.title for t in db.get_tasks_by_user(user)] == ["kept"]
+
+
+def test_writes_inside_a_transaction_run_inline(user):
+    with db.transaction(user):
+        db.add_task(user, "a")
+        future = db.add_task.submit(user, "b")
+        assert future.done()  # joined the open transaction instead of waiting on the writer
+    assert sorted(t.title for t in db.get_tasks_by_user(user)) == ["a", "b"]
+
+
+def test_concurrent_sessions_are_serialized(user):
+    db.add_tasks_bulk(user, [(f"t{i}",) for i in range(10)])
+    ids = [t.id for t in db.get_tasks_by_user(user)]
+    errors = []
+
+    def session(n):
+        try:
+            for _ in range(20):
+                db.update_task_status(user, ids[n], "completed")
+                db.add_task(user, f"from {n}")
+        except Exception as ex:
+            errors.append(ex)
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert db.get_task_stats(user) == {"total": 210, "completed": 10, "pending": 200,
+                                       "categories": {"Others": 210}}
+
+
+def test_coalescing_is_per_user(user):
+    db.create_user("Bob", "bob@x.com", "h")
+    bob = db.get_user_by_email("bob@x.com").id
+    db.add_task(user, "ann's")
+    task_id = db.get_tasks_by_user(user)[0].id
+    db._write_queue.reset_stats()
+
+    release = _hold_writer(user)
+    owner = db.update_task_status.submit(user, task_id, "completed")
+    stranger = db.update_task_status.submit(bob, task_id, "pending")  # same id, not bob's row
+    release.set()
+
+    owner.result(5), stranger.result(5)
+    assert str(db.get_tasks_by_user(user)[0].status) == "completed"
+    assert db.write_queue_stats()["coalesced"] == 0